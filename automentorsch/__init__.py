@@ -0,0 +1,4 @@
+# automentorsch: draw and copy Mentor schematics through the Designer COM API.
+#
+# Only automentorsch.com loads pywin32 (lazily), so records, transforms, formats,
+# plan and store import on any platform for offline CSV tooling.
@@ -0,0 +1,793 @@
+# Command line entry point.
+
+import argparse
+import json
+import os
+
+from .constants import (
+    RUN_REPORT,
+    SERVER_HOST,
+    SERVER_PORT,
+    TEMPLATE_LINK,
+)
+from .records import (
+    normalize_box,
+)
+from .transforms import (
+    compress_records,
+    replicate_from_spec,
+    replication_hash,
+    write_template_export,
+)
+from .formats import (
+    read_component_records,
+    read_indexed_net_records,
+    read_net_records,
+    write_component_records,
+    write_net_records,
+    write_tables,
+)
+from .plan import (
+    compile_plan,
+    load_or_compile_plan,
+    plan_input_hash,
+    summarize_plan,
+)
+from .store import (
+    DesignStore,
+)
+from .com import (
+    TraceRecorder,
+    TraceReplay,
+    get_active_app,
+    stringlist_to_list,
+)
+from .report import (
+    RunReport,
+    finish_report,
+)
+from .designer import (
+    AuditWriter,
+    ImportJournal,
+    choose_source_sheet,
+    clear_sheet,
+    direct_copy,
+    execute_plan,
+    export_all_sheets,
+    export_components,
+    export_nets,
+    export_stamp_key,
+    export_tables,
+    export_templates,
+    fan_out_copy,
+    get_view_from_doc,
+    import_component_records,
+    import_components,
+    import_net_records,
+    import_nets,
+    insert_sheet,
+    load_export_stamp,
+    open_sheet,
+    parse_destination,
+    plan_handle_counts,
+    preflight_symbols,
+    save_export_stamp,
+    sheet_fingerprint,
+    symbol_placements,
+)
+from .jobs import (
+    JobError,
+    send_job,
+    serve,
+)
+from .shard import (
+    shard_copy,
+)
+
+
+def parse_box(text):
+    values = [int(float(v)) for v in str(text).split(",")]
+    if len(values) != 4:
+        raise ValueError(f"Expected X1,Y1,X2,Y2, got {text!r}")
+    return values
+
+
+def parse_pair(text, sep=","):
+    values = [int(float(v)) for v in str(text).lower().split(sep)]
+    if len(values) != 2:
+        raise ValueError(f"Expected two values separated by {sep!r}, got {text!r}")
+    return values
+
+
+def parse_sheet_pairs(text):
+    pairs = []
+    for item in str(text).split(","):
+        src_sheet, _, dst_sheet = item.partition("=")
+        src_sheet = src_sheet.strip()
+        if src_sheet:
+            pairs.append((src_sheet, dst_sheet.strip() or f"{src_sheet}_copy"))
+    return pairs
+
+
+def transform_spec_from_args(args):
+    spec = {}
+    if args.offset:
+        spec["dx"], spec["dy"] = parse_pair(args.offset)
+    if args.rotate:
+        spec["rotate"] = args.rotate
+    if args.mirror:
+        spec["mirror"] = True
+    if args.array:
+        spec["rows"], spec["cols"] = parse_pair(args.array, "x")
+    if args.pitch:
+        spec["pitch_x"], spec["pitch_y"] = parse_pair(args.pitch)
+    return spec or None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Copy a schematic sheet via CSV.")
+    parser.add_argument(
+        "--serve", action="store_true", help="run a persistent automation server"
+    )
+    parser.add_argument(
+        "--send", metavar="JOB", help="send a JSON job to a running server"
+    )
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="parse CSV rows on a background stage while COM calls run",
+    )
+    parser.add_argument(
+        "--parse-processes",
+        type=int,
+        default=0,
+        metavar="N",
+        help="decode rows on a pool of N processes (with --pipelined)",
+    )
+    parser.add_argument(
+        "--direct",
+        action="store_true",
+        help="copy records straight from the source sheet without CSV files",
+    )
+    parser.add_argument(
+        "--audit",
+        action="store_true",
+        help="with --direct, also write parts/net CSV in the background",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="compile the CSV exports into an operation plan and replay it",
+    )
+    parser.add_argument(
+        "--plan-cache", metavar="DIR", help="cache compiled plans by input hash"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="compile --parts/--nets into a plan and report it without COM",
+    )
+    parser.add_argument(
+        "--journal",
+        metavar="PATH",
+        help="record applied CSV rows so an interrupted import can resume",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="keep the destination sheet and skip rows already applied to it",
+    )
+    parser.add_argument(
+        "--tables",
+        metavar="DIR",
+        help="export to normalized tables in DIR instead of parts.csv/net.csv",
+    )
+    parser.add_argument(
+        "--templates",
+        metavar="PATH",
+        help="export repeated sub-circuits as templates plus instances (.json)",
+    )
+    parser.add_argument(
+        "--encode-attributes",
+        action="store_true",
+        help="write shared attribute sets next to parts.csv instead of per row",
+    )
+    parser.add_argument(
+        "--db", metavar="PATH", help="also store the exported sheet in SQLite"
+    )
+    parser.add_argument(
+        "--find", metavar="REFDES", help="look up a component in --db and exit"
+    )
+    parser.add_argument(
+        "--net-segments", metavar="NAME", help="list segments of a net in --db"
+    )
+    parser.add_argument(
+        "--region",
+        metavar="X1,Y1,X2,Y2",
+        help="list components and segments inside a box in --db",
+    )
+    parser.add_argument(
+        "--lookup-net",
+        metavar="NAME",
+        help="print one net from --nets through its byte-offset index and exit",
+    )
+    parser.add_argument(
+        "--mmap", action="store_true", help="memory-map net.csv for index lookups"
+    )
+    parser.add_argument(
+        "--window",
+        metavar="X1,Y1,X2,Y2",
+        help="copy only objects whose extents intersect this box",
+    )
+    parser.add_argument(
+        "--from-db",
+        metavar="[SCHEMATIC:]SHEET",
+        help="take the --window of a sheet stored in --db instead of exporting",
+    )
+    parser.add_argument(
+        "--report",
+        metavar="PATH",
+        help=f"append the per-phase run report here (default: {RUN_REPORT})",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="trace allocations per phase (peak, top sites, live COM proxies)",
+    )
+    parser.add_argument(
+        "--record-trace",
+        metavar="PATH",
+        help="log every COM call of this run to a gzip'd trace file",
+    )
+    parser.add_argument(
+        "--replay-trace",
+        metavar="PATH",
+        help="answer COM calls from a recorded trace instead of Designer",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        help="scale for the recorded latencies during replay (0 = no waits)",
+    )
+    parser.add_argument(
+        "--batch-oats",
+        action="store_true",
+        help="send each part's attributes in one AddBatchOats call",
+    )
+    parser.add_argument(
+        "--no-preflight",
+        action="store_true",
+        help="skip probing each library symbol once before the import",
+    )
+    parser.add_argument(
+        "--no-reuse",
+        action="store_true",
+        help="always re-export, even when the sheet fingerprint is unchanged",
+    )
+    parser.add_argument(
+        "--export-all",
+        metavar="ARCHIVE",
+        help="export every sheet of every schematic into one zip archive",
+    )
+    parser.add_argument(
+        "--fanout",
+        metavar="SHEETS",
+        help="copy the source sheet to every comma-separated [SCHEMATIC:]SHEET",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="SRC=DST,...",
+        help="copy each SRC sheet to DST (default SRC_copy) across --backends",
+    )
+    parser.add_argument(
+        "--backends",
+        metavar="SPECS",
+        default="active",
+        help="comma-separated active, HOST:PORT job servers or MODULE:FACTORY "
+        "callables; one worker process per backend",
+    )
+    parser.add_argument(
+        "--offset", metavar="DX,DY", help="move the copied block by DX,DY"
+    )
+    parser.add_argument(
+        "--rotate",
+        type=int,
+        choices=(0, 90, 180, 270),
+        default=0,
+        help="rotate the copied block counter-clockwise",
+    )
+    parser.add_argument(
+        "--mirror", action="store_true", help="mirror the copied block left-right"
+    )
+    parser.add_argument(
+        "--array",
+        metavar="ROWSxCOLS",
+        help="place ROWS x COLS copies of the block, renumbering refdes",
+    )
+    parser.add_argument(
+        "--pitch",
+        metavar="PX,PY",
+        help="spacing between array copies (default: block size plus a gap)",
+    )
+    parser.add_argument("--parts", help="parts CSV path (default: parts.csv)")
+    parser.add_argument("--nets", help="nets CSV path (default: net.csv)")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument(
+        "--token",
+        help="shared secret for --serve/--send/--shard servers "
+        "(required to serve on a non-loopback address)",
+    )
+    args = parser.parse_args(argv)
+    if args.plan and (args.journal or args.resume):
+        # Plan replay has no per-record checkpoints to journal.
+        parser.error("--plan cannot be combined with --journal or --resume")
+    transform_flags = "--offset/--rotate/--mirror/--array"
+    if args.pipelined and (args.plan or transform_spec_from_args(args)):
+        # Plans and transforms need every record up front, not a stream.
+        parser.error(f"--pipelined cannot be combined with --plan or {transform_flags}")
+    if args.audit and not args.direct:
+        parser.error("--audit needs --direct")
+    if args.fanout and (args.window or transform_spec_from_args(args)):
+        parser.error(f"--fanout cannot be combined with --window or {transform_flags}")
+    if args.direct:
+        conflicts = [
+            flag
+            for flag, value in (
+                ("--plan", args.plan),
+                ("--journal", args.journal),
+                ("--resume", args.resume),
+                (transform_flags, transform_spec_from_args(args)),
+            )
+            if value
+        ]
+        if conflicts:
+            parser.error(f"--direct cannot be combined with {', '.join(conflicts)}")
+    return args
+
+
+def _print_missing(missing):
+    for entry in missing:
+        print(
+            f"Missing symbol {entry['Partition']}:{entry['Symbol']}, "
+            f"skipping {entry['Rows']} rows."
+        )
+
+
+def main(argv=None, base_dir=None):
+    args = parse_args(argv)
+    if args.replay_trace:
+        with TraceReplay(args.replay_trace, args.replay_speed) as replay:
+            _main(args, base_dir)
+        print(
+            f"Replayed {replay.calls} COM calls ({replay.misses} not in the trace, "
+            f"{replay.seconds:.3f}s of recorded latency)."
+        )
+    elif args.record_trace:
+        with TraceRecorder(args.record_trace) as recorder:
+            _main(args, base_dir)
+        print(f"Recorded {recorder.calls} COM calls to {args.record_trace}.")
+    else:
+        _main(args, base_dir)
+
+
+def _main(args, base_dir=None):
+    base_dir = base_dir or os.getcwd()
+    if args.serve:
+        try:
+            serve(args.host, args.port, base_dir, args.token)
+        except JobError as exc:
+            print(exc)
+        return
+    if args.send:
+        response = send_job(
+            json.loads(args.send), args.host, args.port, token=args.token
+        )
+        print(json.dumps(response, indent=2))
+        return
+
+    parts_csv = args.parts or os.path.join(base_dir, "parts.csv")
+    nets_csv = args.nets or os.path.join(base_dir, "net.csv")
+    if args.tables:
+        parts_csv = nets_csv = os.path.abspath(args.tables)
+    elif args.templates:
+        parts_csv = nets_csv = os.path.abspath(args.templates)
+
+    if args.find or args.net_segments or args.region:
+        if not args.db:
+            print("--find/--net-segments/--region need --db.")
+            return
+        with DesignStore(args.db) as store:
+            if args.find:
+                result = store.find_component(args.find)
+            elif args.net_segments:
+                result = store.segments_for_net(args.net_segments)
+            else:
+                result = store.query_region(*parse_box(args.region))
+        print(json.dumps(result, indent=2))
+        return
+
+    region = normalize_box(*parse_box(args.window)) if args.window else None
+    if args.from_db and not (args.db and region):
+        print("--from-db needs --db and --window.")
+        return
+
+    if args.lookup_net:
+        records = read_indexed_net_records(
+            nets_csv, [args.lookup_net], region, args.mmap
+        )
+        print(json.dumps([rec.to_row() for rec in records], indent=2))
+        return
+
+    if args.dry_run:
+        plan = load_or_compile_plan(parts_csv, nets_csv, args.plan_cache)
+        print(json.dumps(summarize_plan(plan), indent=2))
+        return
+
+    if args.shard:
+        copies = parse_sheet_pairs(args.shard)
+        backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+        job = {
+            "direct": args.direct,
+            "plan": args.plan,
+            "plan_cache": args.plan_cache,
+            "pipelined": args.pipelined,
+            "processes": args.parse_processes,
+            "journal": args.journal,
+            "resume": args.resume,
+            "region": list(region) if region else None,
+            "transform": transform_spec_from_args(args),
+            "encode_attributes": args.encode_attributes,
+            "batch_oats": args.batch_oats,
+            "preflight": not args.no_preflight,
+            "reuse": not args.no_reuse,
+        }
+        try:
+            sharded = shard_copy(backends, copies, job, base_dir, token=args.token)
+        except (JobError, ValueError) as exc:
+            print(exc)
+            return
+        for entry in sharded["Sheets"]:
+            where = f"{entry['Source']} -> {entry['Sheet']} on {entry['Backend']}"
+            if "Error" in entry:
+                print(f"{where} failed: {entry['Error']}")
+            else:
+                print(
+                    f"{where}: {entry['Components']} components, "
+                    f"{entry['NetCount']} nets in {entry['Seconds']:.3f}s"
+                )
+        print(
+            f"Copied {len(copies)} sheets on {len(backends)} backends in "
+            f"{sharded['Seconds']:.3f}s ({sharded['Busy']:.3f}s of work, "
+            f"{sharded['Speedup']}x)."
+        )
+        return
+
+    app = get_active_app()
+    if app is None:
+        print("Please open Xpedition Designer and a schematic page first.")
+        return
+
+    schematic_name = "Schematic1"
+    dst_sheet = "Schematic2"
+
+    try:
+        sheets = app.SchematicSheetDocuments()
+    except Exception:
+        sheets = app.SchematicSheetDocuments
+
+    if args.export_all:
+        index = export_all_sheets(sheets, args.export_all, reuse=not args.no_reuse)
+        for entry in index["Sheets"]:
+            where = f"{entry['Schematic']}:{entry['Sheet']}"
+            if "Error" in entry:
+                print(f"{where} skipped: {entry['Error']}")
+            elif entry.get("Reused"):
+                print(f"{where} unchanged, reused")
+            else:
+                print(
+                    f"{where} {entry['Components']} components, "
+                    f"{entry['NetCount']} nets in {entry['Seconds']:.3f}s"
+                )
+        print(
+            f"Exported {len(index['Sheets'])} sheets to {args.export_all} "
+            f"in {index['Seconds']:.3f}s."
+        )
+        return
+
+    report = RunReport(args.memory, Mode="direct" if args.direct else "csv")
+    with report.phase("catalog") as phase:
+        schems = stringlist_to_list(sheets.GetAvailableSchematics())
+        if not any(s.lower() == schematic_name.lower() for s in schems):
+            if schems:
+                schematic_name = schems[0]
+            else:
+                print("Cannot find any schematic.")
+                return
+        src_sheet = choose_source_sheet(sheets, schematic_name, preferred="2")
+        phase["Count"] = len(schems)
+    if not src_sheet:
+        print("Cannot find source sheet.")
+        return
+
+    if args.fanout:
+        src_doc = open_sheet(sheets, schematic_name, src_sheet)
+        src_view = get_view_from_doc(src_doc) if src_doc is not None else None
+        if src_view is None:
+            print("Cannot open source sheet.")
+            return
+        destinations = [d for d in args.fanout.split(",") if d.strip()]
+        fanout = fan_out_copy(app, sheets, src_view, destinations, schematic_name)
+        for entry in fanout["Destinations"]:
+            where = f"{entry['Schematic']}:{entry['Sheet']}"
+            if "Error" in entry:
+                print(f"{where} skipped: {entry['Error']}")
+            else:
+                print(
+                    f"{where} {entry['Components']} components, "
+                    f"{entry['NetCount']} nets in {entry['Seconds']:.3f}s"
+                )
+        print(
+            f"Copied {schematic_name}:{src_sheet} to {len(destinations)} sheets "
+            f"in {fanout['Seconds']:.3f}s."
+        )
+        return
+
+    report.info.update(
+        Schematic=schematic_name, Source=src_sheet, Destination=dst_sheet
+    )
+    reuse_export = not (args.direct or args.resume or args.from_db or args.no_reuse)
+    with report.phase("open_sheets") as phase:
+        insert_sheet(sheets, schematic_name, dst_sheet)
+        src_doc = open_sheet(sheets, schematic_name, src_sheet)
+        src_view = get_view_from_doc(src_doc) if src_doc is not None else None
+        dst_doc = open_sheet(sheets, schematic_name, dst_sheet)
+        dst_view = get_view_from_doc(dst_doc) if dst_doc is not None else None
+        dst_block = dst_view.Block if dst_view is not None else None
+        if src_view is not None:
+            source = sheet_fingerprint(src_doc, src_view, reuse_export)
+            phase["Count"] = (source["Components"] or 0) + (source["Nets"] or 0)
+
+    if src_doc is None:
+        print("Cannot open source sheet.")
+        return
+    if src_view is None:
+        print("Cannot resolve source view.")
+        return
+    if dst_doc is None:
+        print("Cannot open destination sheet.")
+        return
+    if dst_view is None:
+        print("Cannot get destination view.")
+        return
+    if dst_block is None:
+        print("Cannot access destination block.")
+        return
+
+    batch_oats = {} if args.batch_oats else None
+    if args.direct:
+        audit = None
+        if args.audit:
+            audit = AuditWriter(
+                args.parts or os.path.join(base_dir, "parts.csv"),
+                args.nets or os.path.join(base_dir, "net.csv"),
+            )
+        app.SetRedraw(False)
+        try:
+            with report.phase("clear_sheet") as phase:
+                phase["Count"] = clear_sheet(dst_view)
+            with report.phase("direct_copy") as phase:
+                placed, nets_added, missing = direct_copy(
+                    src_view,
+                    dst_block,
+                    {},
+                    region,
+                    audit,
+                    batch_oats,
+                    not args.no_preflight,
+                )
+                phase["Count"] = placed + nets_added
+            _print_missing(missing)
+        finally:
+            app.SetRedraw(True)
+            if audit is not None:
+                with report.phase("audit_wait"):
+                    audit.close()
+        with report.phase("refresh"):
+            try:
+                dst_view.Refresh()
+            except Exception:
+                pass
+        msg = (
+            f"{dst_sheet} created and copied from {schematic_name}:{src_sheet} "
+            f"directly ({placed} components, {nets_added} nets)."
+        )
+        if audit is not None and audit.errors:
+            msg += f" Audit CSV failed: {audit.errors[0]}"
+        print(msg)
+        finish_report(report, args.report or os.path.join(base_dir, RUN_REPORT))
+        return
+
+    spec = transform_spec_from_args(args)
+    journal_path = args.journal
+    if args.resume and not journal_path:
+        journal_path = os.path.join(base_dir, "import_journal.jsonl")
+
+    app.SetRedraw(False)
+    journal = None
+    try:
+        stamp_key = None
+        reused = None
+        if reuse_export:
+            with report.phase("fingerprint"):
+                stamp_key = export_stamp_key(
+                    src_doc,
+                    src_view,
+                    schematic_name,
+                    src_sheet,
+                    source,
+                    tables=bool(args.tables),
+                    templates=bool(args.templates),
+                    encoded=args.encode_attributes,
+                    region=list(region) if region else None,
+                )
+                reused = load_export_stamp(parts_csv, stamp_key)
+        if args.resume and os.path.exists(parts_csv) and os.path.exists(nets_csv):
+            parts_csv_used, nets_csv_used = parts_csv, nets_csv
+        elif reused is not None:
+            parts_csv_used, nets_csv_used = reused
+        elif args.from_db:
+            with report.phase("load_region") as phase:
+                db_schematic, db_sheet = parse_destination(args.from_db, None)
+                with DesignStore(args.db) as store:
+                    comp_records, net_records = store.load_region(
+                        *region, db_schematic, db_sheet
+                    )
+                if args.tables:
+                    parts_csv_used = nets_csv_used = write_tables(
+                        comp_records, net_records, parts_csv
+                    )
+                elif args.templates:
+                    parts_csv_used = nets_csv_used = write_template_export(
+                        compress_records(comp_records, net_records), parts_csv
+                    )
+                else:
+                    parts_csv_used = write_component_records(comp_records, parts_csv)
+                    nets_csv_used = write_net_records(net_records, nets_csv)
+                phase["Count"] = len(comp_records) + len(net_records)
+        elif args.tables or args.templates:
+            written = {}
+            with report.phase("export") as phase:
+                if args.tables:
+                    parts_csv_used = nets_csv_used = export_tables(
+                        src_view, parts_csv, region, written
+                    )
+                else:
+                    parts_csv_used = nets_csv_used = export_templates(
+                        src_view, parts_csv, TEMPLATE_LINK, region, written
+                    )
+                phase["Count"] = written["Components"] + written["Nets"]
+        else:
+            written = {}
+            with report.phase("export_components") as phase:
+                parts_csv_used = export_components(
+                    src_view, parts_csv, region, args.encode_attributes, written
+                )
+                phase["Count"] = written["Components"]
+            with report.phase("export_nets") as phase:
+                nets_csv_used = export_nets(src_view, nets_csv, region, written)
+                phase["Count"] = written["Nets"]
+        if stamp_key is not None and reused is None:
+            save_export_stamp(parts_csv, stamp_key, parts_csv_used, nets_csv_used)
+        if args.db and not args.from_db:
+            with report.phase("write_db"):
+                with DesignStore(args.db) as store:
+                    store.write_sheet(
+                        schematic_name,
+                        str(src_sheet),
+                        read_component_records(parts_csv_used),
+                        read_net_records(nets_csv_used),
+                    )
+        if journal_path:
+            input_hash = plan_input_hash(parts_csv_used, nets_csv_used)
+            if spec:
+                input_hash = replication_hash(input_hash, spec)
+            journal = ImportJournal(
+                journal_path,
+                input_hash,
+                f"{schematic_name}:{dst_sheet}",
+                resume=args.resume,
+            )
+        if args.resume:
+            with report.phase("load_destination"):
+                journal.load_destination(dst_view)
+        else:
+            with report.phase("clear_sheet") as phase:
+                phase["Count"] = clear_sheet(dst_view)
+        if spec:
+            with report.phase("replicate") as phase:
+                comp_records, net_records = replicate_from_spec(
+                    read_component_records(parts_csv_used),
+                    read_net_records(nets_csv_used),
+                    spec,
+                )
+                phase["Count"] = len(comp_records) + len(net_records)
+        symbol_cache = {}
+        missing = None
+        if args.pipelined:
+            # Probed while the pipelined import streams the rows.
+            missing = None if args.no_preflight else []
+        elif not args.no_preflight:
+            with report.phase("preflight") as phase:
+                preflight = preflight_symbols(
+                    dst_block,
+                    symbol_placements(
+                        comp_records if spec else read_component_records(parts_csv_used)
+                    ),
+                    symbol_cache,
+                )
+                phase["Count"] = preflight["Symbols"]
+            _print_missing(preflight["Missing"])
+        if args.plan:
+            with report.phase("execute_plan") as phase:
+                if spec:
+                    plan = compile_plan(comp_records, net_records)
+                else:
+                    plan = load_or_compile_plan(
+                        parts_csv_used, nets_csv_used, args.plan_cache
+                    )
+                counts = plan_handle_counts(
+                    plan, execute_plan(plan, dst_block, symbol_cache)
+                )
+                phase["Count"] = counts["components"] + counts["nets"]
+        elif spec:
+            with report.phase("import_components") as phase:
+                phase["Count"] = import_component_records(
+                    comp_records, dst_block, symbol_cache, journal, batch_oats
+                )
+            with report.phase("import_nets") as phase:
+                phase["Count"] = import_net_records(
+                    net_records, dst_block, journal=journal
+                )
+        else:
+            with report.phase("import_components") as phase:
+                phase["Count"] = import_components(
+                    parts_csv_used,
+                    dst_block,
+                    symbol_cache,
+                    pipelined=args.pipelined,
+                    processes=args.parse_processes,
+                    journal=journal,
+                    batch_oats=batch_oats,
+                    missing=missing,
+                )
+            _print_missing(missing or ())
+            with report.phase("import_nets") as phase:
+                phase["Count"] = import_nets(
+                    nets_csv_used,
+                    dst_block,
+                    pipelined=args.pipelined,
+                    processes=args.parse_processes,
+                    journal=journal,
+                )
+        if journal is not None:
+            journal.close(complete=True)
+    finally:
+        if journal is not None:
+            journal.close()
+        app.SetRedraw(True)
+
+    with report.phase("refresh"):
+        try:
+            dst_view.Refresh()
+        except Exception:
+            pass
+
+    msg = f"{dst_sheet} created and copied from {schematic_name}:{src_sheet} via CSV."
+    if journal is not None and journal.skipped:
+        msg += f" Resumed: {journal.skipped} rows already on {dst_sheet}."
+    if parts_csv_used != parts_csv or nets_csv_used != nets_csv:
+        msg += f" (fallback CSV: {os.path.basename(parts_csv_used)}, {os.path.basename(nets_csv_used)})"
+    print(msg)
+    finish_report(report, args.report or os.path.join(base_dir, RUN_REPORT))
@@ -0,0 +1,495 @@
+# COM access: lazy pywin32 loading, call proxies and trace record/replay.
+
+import contextlib
+import gzip
+import inspect
+import json
+import threading
+import time
+
+from .constants import (
+    PROXY_CACHED_CALLS,
+    PROXY_WRITE_PREFIXES,
+    TRACE_SCALARS,
+    TRACE_VERSION,
+)
+from .records import (
+    ATTRIBUTE_MEMO,
+)
+
+# Process-wide COM state: the getter form that worked per object type, the
+# active trace recorder or replay, failure and probe counters, and symbol
+# info per SymbolBlock identity.
+ACCESSOR_STRATEGIES = {}
+COM_TRACE = {}
+COM_FAILURES = {"n": 0, "probes": 0, "probing": 0}
+SYMBOL_INFO_CACHE = {}
+
+
+def load_win32com():
+    # pywin32 is only needed against a live Designer, so it is imported on first
+    # use and the offline modules stay importable on any platform.
+    try:
+        import win32com.client
+    except ImportError:
+        return None
+    return win32com.client
+
+
+def get_active_app():
+    if COM_TRACE.get("replay") is not None:
+        return COM_TRACE["replay"].root()
+    client = load_win32com()
+    if client is None:
+        return None
+    try:
+        app = client.GetActiveObject("ViewDraw.Application")
+    except Exception:
+        return None
+    if COM_TRACE.get("recorder") is not None:
+        return COM_TRACE["recorder"].wrap(app)
+    return app
+
+
+def stringlist_to_list(sl):
+    items = []
+    if sl is None:
+        return items
+    try:
+        with com_probe():
+            count = sl.GetCount()
+            for i in range(1, count + 1):
+                items.append(str(sl.GetItem(i)))
+        return items
+    except Exception:
+        items = []
+    try:
+        count = sl.Count
+        for i in range(1, count + 1):
+            items.append(str(sl.Item(i)))
+    except Exception:
+        return items
+    return items
+
+
+def _get_count_items(coll):
+    return [coll.GetItem(i) for i in range(1, coll.GetCount() + 1)]
+
+
+def iter_collection(coll):
+    for strategy in (list, _get_count_items):
+        try:
+            with com_probe():
+                items = strategy(coll)
+        except Exception:
+            continue
+        for obj in items:
+            yield com_proxy(obj)
+        return
+    try:
+        count = coll.Count
+        for i in range(1, count + 1):
+            yield com_proxy(coll.Item(i))
+    except Exception:
+        return
+
+
+def clear_caches():
+    ACCESSOR_STRATEGIES.clear()
+    SYMBOL_INFO_CACHE.clear()
+    ATTRIBUTE_MEMO.clear()
+
+
+def com_identity(obj):
+    key = getattr(unwrap_com(obj), "_oleobj_", obj)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def get_accessor(obj, name):
+    # Late-bound objects expose getters either as methods or as properties.
+    # Remember which form worked per object type so later sheets and objects
+    # do not pay for the failing probe again.
+    key = (type(unwrap_com(obj)), name)
+    order = ACCESSOR_STRATEGIES.get(key, ("call", "property"))
+    for strategy in order:
+        try:
+            with com_probe(strategy != order[-1]):
+                member = getattr(obj, name)
+                value = member() if strategy == "call" else member
+        except Exception:
+            continue
+        if strategy != order[0]:
+            ACCESSOR_STRATEGIES[key] = (strategy, order[0])
+        return value
+    return None
+
+
+@contextlib.contextmanager
+def com_probe(active=True):
+    # Failures inside a probe are expected fallbacks (a getter tried as a
+    # method, an optional property) and are counted as probes; only a failure
+    # of the last strategy counts in COM_FAILURES.
+    if active:
+        COM_FAILURES["probing"] += 1
+    try:
+        yield
+    finally:
+        if active:
+            COM_FAILURES["probing"] -= 1
+
+
+def count_com_failure():
+    if COM_FAILURES["probing"]:
+        COM_FAILURES["probes"] += 1
+    else:
+        COM_FAILURES["n"] += 1
+
+
+class ComProxy:
+    # Reads each property of a dispatch object once per operation; the
+    # read-only calls in PROXY_CACHED_CALLS are memoized per argument. Any
+    # write through the proxy drops everything it remembered. Failed calls
+    # are counted by count_com_failure, whether or not the caller swallows
+    # them.
+    __slots__ = ("_com_obj", "_com_memo")
+
+    def __init__(self, obj):
+        object.__setattr__(self, "_com_obj", obj)
+        object.__setattr__(self, "_com_memo", {})
+
+    def __getattr__(self, name):
+        memo = self._com_memo
+        try:
+            value = memo[name]
+        except KeyError:
+            try:
+                value = getattr(self._com_obj, name)
+            except Exception:
+                count_com_failure()
+                raise
+            if not inspect.isroutine(value):
+                value = com_proxy(value)
+            memo[name] = value
+        # The memo keeps the bare bound method; a _ProxyMethod stored there
+        # would point back at the proxy and keep it alive until a gc pass.
+        if inspect.isroutine(value):
+            return _ProxyMethod(self, name, value)
+        return value
+
+    def __setattr__(self, name, value):
+        self._com_memo.clear()
+        try:
+            setattr(self._com_obj, name, unwrap_com(value))
+        except Exception:
+            count_com_failure()
+            raise
+
+    def __iter__(self):
+        memo = self._com_memo
+        items = memo.get(_PROXY_ITEMS)
+        if items is None:
+            try:
+                items = tuple(com_proxy(obj) for obj in self._com_obj)
+            except Exception:
+                count_com_failure()
+                raise
+            memo[_PROXY_ITEMS] = items
+        return iter(items)
+
+    def invalidate(self):
+        self._com_memo.clear()
+
+
+_PROXY_ITEMS = ("__iter__",)
+
+
+class _ProxyMethod:
+    __slots__ = ("proxy", "name", "method")
+
+    def __init__(self, proxy, name, method):
+        self.proxy = proxy
+        self.name = name
+        self.method = method
+
+    def __call__(self, *args):
+        args = tuple(unwrap_com(arg) for arg in args)
+        if self.name not in PROXY_CACHED_CALLS:
+            value = self.invoke(args)
+            if self.name.startswith(PROXY_WRITE_PREFIXES):
+                self.proxy.invalidate()
+            return value
+        key = (self.name,) + tuple(com_identity(arg) for arg in args)
+        memo = self.proxy._com_memo
+        try:
+            return memo[key]
+        except (KeyError, TypeError):
+            pass
+        value = self.invoke(args)
+        if None not in key:
+            memo[key] = value
+        return value
+
+    def invoke(self, args):
+        try:
+            return com_proxy(self.method(*args))
+        except Exception:
+            count_com_failure()
+            raise
+
+
+def com_proxy(obj):
+    if type(obj) is ComProxy or not hasattr(obj, "_oleobj_"):
+        return obj
+    return ComProxy(obj)
+
+
+def unwrap_com(obj):
+    if type(obj) is ComProxy:
+        return obj._com_obj
+    return obj
+
+
+class ComTraceError(Exception):
+    pass
+
+
+def _trace_encode(value):
+    if isinstance(value, TRACE_SCALARS):
+        return value
+    if type(value) in (_TracedObject, _ReplayObject):
+        return {"$": value._trace_id}
+    if isinstance(value, (list, tuple)):
+        return [_trace_encode(item) for item in value]
+    return str(value)
+
+
+def _trace_key(obj_id, kind, name, args):
+    return (obj_id, kind, name, json.dumps(args, separators=(",", ":")))
+
+
+class _TracedObject:
+    __slots__ = ("_recorder", "_obj", "_trace_id")
+
+    def __init__(self, recorder, obj, trace_id):
+        object.__setattr__(self, "_recorder", recorder)
+        object.__setattr__(self, "_obj", obj)
+        object.__setattr__(self, "_trace_id", trace_id)
+
+    def __getattr__(self, name):
+        if name == "_oleobj_":
+            return self
+        recorder = self._recorder
+        start = time.perf_counter()
+        try:
+            value = getattr(self._obj, name)
+        except Exception as exc:
+            recorder.log(self._trace_id, "get", name, [], None, start, exc)
+            raise
+        if not inspect.isroutine(value):
+            value = recorder.wrap(value)
+            recorder.log(self._trace_id, "get", name, [], value, start)
+            return value
+
+        def method(*args):
+            raw_args = [arg._obj if type(arg) is _TracedObject else arg for arg in args]
+            call_start = time.perf_counter()
+            try:
+                result = recorder.wrap(value(*raw_args))
+            except Exception as exc:
+                recorder.log(self._trace_id, "call", name, args, None, call_start, exc)
+                raise
+            recorder.log(self._trace_id, "call", name, args, result, call_start)
+            return result
+
+        return method
+
+    def __setattr__(self, name, value):
+        start = time.perf_counter()
+        raw = value._obj if type(value) is _TracedObject else value
+        try:
+            setattr(self._obj, name, raw)
+        except Exception as exc:
+            self._recorder.log(self._trace_id, "set", name, [value], None, start, exc)
+            raise
+        self._recorder.log(self._trace_id, "set", name, [value], None, start)
+
+    def __iter__(self):
+        start = time.perf_counter()
+        try:
+            items = [self._recorder.wrap(obj) for obj in self._obj]
+        except Exception as exc:
+            self._recorder.log(self._trace_id, "iter", "", [], None, start, exc)
+            raise
+        self._recorder.log(self._trace_id, "iter", "", [], items, start)
+        return iter(items)
+
+
+class TraceRecorder:
+    # Logs every COM call made through the wrapped application, one JSON
+    # array per line: [object, kind, name, args, result, seconds(, error)].
+    # Objects are numbered by COM identity; the application is object 0.
+    def __init__(self, path):
+        self.path = path
+        self.objects = {}
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        header = {"Kind": "ComTrace", "Version": TRACE_VERSION}
+        self.file.write(json.dumps(header) + "\n")
+
+    def __enter__(self):
+        COM_TRACE["recorder"] = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        COM_TRACE.pop("recorder", None)
+        self.close()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def wrap(self, obj):
+        if isinstance(obj, TRACE_SCALARS) or type(obj) is _TracedObject:
+            return obj
+        if isinstance(obj, (list, tuple)):
+            return type(obj)(self.wrap(item) for item in obj)
+        key = com_identity(obj)
+        if key is None:
+            key = id(obj)
+        with self.lock:
+            traced = self.objects.get(key)
+            if traced is None:
+                traced = _TracedObject(self, obj, len(self.objects))
+                self.objects[key] = traced
+        return traced
+
+    def log(self, obj_id, kind, name, args, result, start, exc=None):
+        event = [
+            obj_id,
+            kind,
+            name,
+            _trace_encode(list(args)),
+            _trace_encode(result),
+            round(time.perf_counter() - start, 7),
+        ]
+        if exc is not None:
+            event.append(f"{type(exc).__name__}: {exc}")
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        with self.lock:
+            self.calls += 1
+            if self.file is not None:
+                self.file.write(line)
+
+
+class _ReplayObject:
+    __slots__ = ("_replay", "_trace_id")
+
+    def __init__(self, replay, trace_id):
+        object.__setattr__(self, "_replay", replay)
+        object.__setattr__(self, "_trace_id", trace_id)
+
+    def __getattr__(self, name):
+        if name == "_oleobj_":
+            return self
+        replay = self._replay
+        kind = replay.kinds.get((self._trace_id, name)) or replay.name_kinds.get(name)
+        if kind != "call":
+            return replay.answer(self._trace_id, "get", name, [])
+
+        def method(*args):
+            return replay.answer(self._trace_id, "call", name, list(args))
+
+        return method
+
+    def __setattr__(self, name, value):
+        self._replay.answer(self._trace_id, "set", name, [value])
+
+    def __iter__(self):
+        return iter(self._replay.answer(self._trace_id, "iter", "", []))
+
+
+class TraceReplay:
+    # Answers COM calls from a recorded trace with the recorded latencies
+    # (scaled by speed). A call the trace never saw with these arguments
+    # falls back to the first recording of the same method or property.
+    def __init__(self, path, speed=1.0):
+        self.speed = speed
+        self.answers = {}
+        self.by_name = {}
+        self.kinds = {}
+        self.name_kinds = {}
+        self.cursor = {}
+        self.objects = {}
+        self.calls = 0
+        self.misses = 0
+        self.seconds = 0.0
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("Kind") != "ComTrace":
+                raise ValueError(f"{path} is not a COM trace.")
+            if header.get("Version") != TRACE_VERSION:
+                raise ValueError(f"{path} has trace version {header.get('Version')}.")
+            for line in f:
+                event = json.loads(line)
+                obj_id, kind, name, args, result, seconds = event[:6]
+                answer = (result, seconds, event[6] if len(event) > 6 else None)
+                key = _trace_key(obj_id, kind, name, args)
+                self.answers.setdefault(key, []).append(answer)
+                self.by_name.setdefault((kind, name), answer)
+                if kind in ("get", "call"):
+                    self.kinds.setdefault((obj_id, name), kind)
+                    self.name_kinds.setdefault(name, kind)
+
+    def __enter__(self):
+        COM_TRACE["replay"] = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        COM_TRACE.pop("replay", None)
+
+    def root(self):
+        return self.object(0)
+
+    def object(self, obj_id):
+        obj = self.objects.get(obj_id)
+        if obj is None:
+            obj = _ReplayObject(self, obj_id)
+            self.objects[obj_id] = obj
+        return obj
+
+    def decode(self, value):
+        if isinstance(value, dict) and "$" in value:
+            return self.object(value["$"])
+        if isinstance(value, list):
+            return [self.decode(item) for item in value]
+        return value
+
+    def answer(self, obj_id, kind, name, args):
+        self.calls += 1
+        key = _trace_key(obj_id, kind, name, _trace_encode(args))
+        answers = self.answers.get(key)
+        if answers:
+            pos = self.cursor.get(key, 0)
+            self.cursor[key] = pos + 1
+            result, seconds, error = answers[min(pos, len(answers) - 1)]
+        else:
+            self.misses += 1
+            fallback = self.by_name.get((kind, name))
+            if fallback is None:
+                if kind == "get":
+                    raise AttributeError(name)
+                raise ComTraceError(f"{kind} {name} is not in the trace.")
+            result, seconds, error = fallback
+        if seconds and self.speed:
+            time.sleep(seconds * self.speed)
+            self.seconds += seconds * self.speed
+        if error:
+            raise ComTraceError(error)
+        return self.decode(result)
@@ -0,0 +1,132 @@
+# Shared constants and process-wide caches.
+
+import re
+
+VDM_COMP = 128
+VDM_NET = 32
+VDM_LABEL = 256
+VDM_TEXT = 4
+VDM_LINE = 1
+VD_ALL = 0
+VD_WIRE = 0
+VDJ_LOW = 0
+VDJ_HIGH = 1
+VDLABELVISIBLE = 1
+SHORT_NAME = 1
+ATTRIBUTE_FIELDS = (
+    ("name", "Name"),
+    ("value", "Value"),
+    ("either_value", "EitherValue"),
+    ("instance_value", "InstanceValue"),
+    ("text_string", "TextString"),
+    ("visible", "Visible"),
+    ("name_visible", "NameVisible"),
+    ("value_visible", "ValueVisible"),
+    ("orientation", "Orientation"),
+    ("size", "Size"),
+    ("origin_x", "OriginX"),
+    ("origin_y", "OriginY"),
+)
+ATTRIBUTE_PROPS = ATTRIBUTE_FIELDS[5:10]
+ATTRIBUTE_SLOTS = {key: slot for slot, key in ATTRIBUTE_FIELDS}
+PARTS_FIELDS = [
+    "Refdes",
+    "Partition",
+    "Symbol",
+    "X",
+    "Y",
+    "Orientation",
+    "Scale",
+    "Attributes",
+]
+NETS_FIELDS = ["Segments", "Labels", "Attributes"]
+ENCODED_PARTS_FIELDS = PARTS_FIELDS[:-1] + ["AttributeSet"]
+REFDES_ATTRIBUTE_KEYS = ("Value", "EitherValue", "InstanceValue", "TextString")
+ATTRIBUTE_COLUMNS = [key for _, key in ATTRIBUTE_FIELDS]
+LABEL_COLUMNS = [
+    "Name",
+    "X",
+    "Y",
+    "SegX1",
+    "SegY1",
+    "SegX2",
+    "SegY2",
+    "Orientation",
+    "Size",
+]
+EXPORT_TABLES = {
+    "components": (
+        "components.csv",
+        ["ComponentId"] + PARTS_FIELDS[:-1],
+    ),
+    "component_attributes": (
+        "component_attributes.csv",
+        ["ComponentId"] + ATTRIBUTE_COLUMNS,
+    ),
+    "nets": ("nets.csv", ["NetId", "SegmentCount", "LabelCount"]),
+    "segments": ("segments.csv", ["NetId", "X1", "Y1", "X2", "Y2"]),
+    "labels": ("labels.csv", ["NetId"] + LABEL_COLUMNS),
+    "net_attributes": ("net_attributes.csv", ["NetId"] + ATTRIBUTE_COLUMNS),
+}
+SYMBOL_CACHE_SIZE = 4096
+PROXY_CACHED_CALLS = frozenset(
+    (
+        "GetLocation",
+        "Location",
+        "GetSegments",
+        "GetLabel",
+        "GetConnectedLabel",
+        "GetName",
+    )
+)
+PROXY_WRITE_PREFIXES = ("Add", "Set", "Delete", "Insert", "Remove", "DeSelect")
+TRACE_VERSION = 1
+TRACE_SCALARS = (str, int, float, bool, type(None))
+RUN_REPORT = "run_report.jsonl"
+MEMORY_FRAMES = 4
+MEMORY_TOP = 5
+ATTRIBUTE_MEMO_SIZE = 4096
+REFDES_MARK = "\x00"
+ARCHIVE_VERSION = 1
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 50726
+ATTRIBUTE_SETS_VERSION = 1
+ATTRIBUTE_SETS_SUFFIX = ".attrsets.json"
+STAMP_VERSION = 1
+STAMP_SUFFIX = ".stamp.json"
+NET_INDEX_VERSION = 2
+NET_INDEX_SUFFIX = ".idx"
+JOURNAL_BATCH = 25
+DB_CHUNK = 500
+PLAN_VERSION = 1
+PLAN_CALL_MS = 2.0
+PLAN_OP_CALLS = {
+    "AddSymbolInstance": 1,
+    "SetRefdes": 1,
+    "SetOrientation": 1,
+    "SetScale": 1,
+    "ApplyAttrs": 9,
+    "SetValue": 4,
+    "AddNet": 1,
+    "AddLabel": 12,
+}
+PLAN_BATCH_ORDER = (
+    "AddSymbolInstance",
+    "SetRefdes",
+    "SetOrientation",
+    "SetScale",
+    "AddNet",
+    "ApplyAttrs",
+    "SetValue",
+    "AddLabel",
+)
+ORIENTATION_ROTATIONS = 4
+ORIENTATION_MIRRORED = 4
+ROTATION_MATRICES = ((1, 0, 0, 1), (0, -1, 1, 0), (-1, 0, 0, -1), (0, 1, -1, 0))
+IDENTITY_TRANSFORM = (1, 0, 0, 1, 0, False)
+ARRAY_GAP = 100
+TEMPLATE_VERSION = 2
+TEMPLATE_LINK = 100
+TEMPLATE_SUFFIX = ".json"
+SHARD_SHEET_OVERHEAD = 20
+REFDES_PATTERN = re.compile(r"^(\D*)(\d+)(.*)$")
@@ -0,0 +1,1788 @@
+# Designer-side export, import and copy operations.
+
+import csv
+import hashlib
+import io
+import json
+import os
+import queue
+import threading
+import time
+import zipfile
+
+from .constants import (
+    ARCHIVE_VERSION,
+    ATTRIBUTE_FIELDS,
+    ATTRIBUTE_PROPS,
+    JOURNAL_BATCH,
+    NETS_FIELDS,
+    PARTS_FIELDS,
+    PLAN_BATCH_ORDER,
+    SHORT_NAME,
+    STAMP_SUFFIX,
+    STAMP_VERSION,
+    SYMBOL_CACHE_SIZE,
+    TEMPLATE_LINK,
+    TEMPLATE_VERSION,
+    VDJ_HIGH,
+    VDJ_LOW,
+    VDLABELVISIBLE,
+    VDM_COMP,
+    VDM_LABEL,
+    VDM_LINE,
+    VDM_NET,
+    VDM_TEXT,
+    VD_ALL,
+    VD_WIRE,
+)
+from .records import (
+    AttributeRecord,
+    ComponentRecord,
+    LabelRecord,
+    NetRecord,
+    SegmentRecord,
+    as_attribute_record,
+    box_intersects,
+    encode_batch_oats,
+    point_on_segment,
+    point_to_segment_distance,
+    segment_key,
+    segments_intersect_box,
+)
+from .transforms import (
+    compress_records,
+    is_template_export,
+    write_template_export,
+)
+from .formats import (
+    PIPELINE_DONE,
+    decoded_record,
+    export_input_files,
+    is_encoded_parts,
+    is_table_export,
+    iter_parsed_pipeline,
+    iter_records,
+    parse_component_row,
+    parse_component_row_decoded,
+    parse_net_row,
+    passthrough,
+    read_component_records,
+    read_net_records,
+    write_component_records,
+    write_encoded_component_records,
+    write_net_records,
+    write_tables,
+)
+from .plan import (
+    compile_plan,
+)
+from .store import (
+    archive_part,
+)
+from .com import (
+    COM_FAILURES,
+    SYMBOL_INFO_CACHE,
+    com_identity,
+    com_probe,
+    com_proxy,
+    get_accessor,
+    iter_collection,
+    stringlist_to_list,
+)
+from .report import (
+    timed,
+)
+
+
+def open_sheet(sheets, schematic_name, sheet_name):
+    try:
+        return sheets.Open(schematic_name, sheet_name)
+    except Exception:
+        pass
+    try:
+        if isinstance(sheet_name, str) and sheet_name.isdigit():
+            return sheets.Open(schematic_name, int(sheet_name))
+    except Exception:
+        pass
+    return None
+
+
+def insert_sheet(sheets, schematic_name, sheet_name):
+    ok = False
+    try:
+        ok = sheets.InsertSheet(schematic_name, sheet_name)
+    except Exception:
+        ok = False
+    if not ok:
+        try:
+            if isinstance(sheet_name, str) and sheet_name.isdigit():
+                ok = sheets.InsertSheet(schematic_name, int(sheet_name))
+        except Exception:
+            ok = False
+    return ok
+
+
+def get_view_from_doc(doc):
+    try:
+        views = doc.GetViews()
+    except Exception:
+        return None
+    if views is None:
+        return None
+    try:
+        return com_proxy(views.Item(1))
+    except Exception:
+        pass
+    try:
+        for v in views:
+            return com_proxy(v)
+    except Exception:
+        pass
+    return None
+
+
+def get_location(obj):
+    return get_accessor(obj, "GetLocation")
+
+
+def get_segments(net):
+    return get_accessor(net, "GetSegments")
+
+
+def get_symbol_info(comp):
+    part = ""
+    sym_name = ""
+    try:
+        sym_block = comp.SymbolBlock
+    except Exception:
+        sym_block = None
+    if sym_block is None:
+        return part, sym_name
+    key = com_identity(sym_block)
+    if key is not None:
+        cached = SYMBOL_INFO_CACHE.get(key)
+        if cached is not None:
+            return cached
+    try:
+        part = str(sym_block.LibraryName).strip()
+    except Exception:
+        part = ""
+    try:
+        sym_name = str(sym_block.GetName(SHORT_NAME)).strip()
+    except Exception:
+        sym_name = ""
+    if key is not None and part and sym_name:
+        if len(SYMBOL_INFO_CACHE) >= SYMBOL_CACHE_SIZE:
+            SYMBOL_INFO_CACHE.clear()
+        SYMBOL_INFO_CACHE[key] = (part, sym_name)
+    return part, sym_name
+
+
+def find_attribute(obj, name):
+    try:
+        with com_probe():
+            return obj.FindAttribute(name)
+    except Exception:
+        pass
+    try:
+        attrs = obj.Attributes
+    except Exception:
+        return None
+    try:
+        with com_probe():
+            return attrs.Item(name)
+    except Exception:
+        pass
+    lname = str(name).lower()
+    for attr in iter_collection(attrs):
+        try:
+            if str(attr.Name).lower() == lname:
+                return attr
+        except Exception:
+            pass
+    return None
+
+
+def find_attributes_by_name(obj, name):
+    attrs_list = []
+    try:
+        coll = obj.Attributes
+    except Exception:
+        return attrs_list
+    lname = str(name).lower()
+    for attr in iter_collection(coll):
+        try:
+            if str(attr.Name).lower() == lname:
+                attrs_list.append(attr)
+        except Exception:
+            pass
+    return attrs_list
+
+
+def set_attribute_value(attr, value):
+    if attr is None:
+        return False
+    for prop in ("EitherValue", "InstanceValue", "Value"):
+        try:
+            with com_probe():
+                setattr(attr, prop, value)
+            return True
+        except Exception:
+            pass
+    try:
+        attr.TextString = f"{attr.Name}={value}"
+        return True
+    except Exception:
+        return False
+
+
+def set_component_value(comp, value, src_attr=None):
+    if not value:
+        return False
+    dst_attrs = []
+    if src_attr is not None:
+        try:
+            dst_attrs = find_attributes_by_name(comp, src_attr.Name)
+        except Exception:
+            dst_attrs = []
+    if not dst_attrs:
+        dst_attrs = find_attributes_by_name(comp, "Value")
+    if not dst_attrs:
+        dst_attrs = find_attributes_by_name(comp, "VALUE")
+    if not dst_attrs:
+        try:
+            comp.AddOat(f"Value={value}")
+            return True
+        except Exception:
+            return False
+    ok = False
+    for dst_attr in dst_attrs:
+        if set_attribute_value(dst_attr, value):
+            ok = True
+            if src_attr is not None:
+                try:
+                    dst_attr.Visible = src_attr.Visible
+                except Exception:
+                    pass
+    return ok
+
+
+def attribute_to_record(attr):
+    try:
+        rec = AttributeRecord(str(attr.Name))
+    except Exception:
+        rec = AttributeRecord("")
+    # Not every attribute exposes every value form or display property.
+    with com_probe():
+        for slot, prop in ATTRIBUTE_FIELDS[1:5]:
+            try:
+                setattr(rec, slot, str(getattr(attr, prop)))
+            except Exception:
+                pass
+        for slot, prop in ATTRIBUTE_PROPS:
+            try:
+                setattr(rec, slot, getattr(attr, prop))
+            except Exception:
+                pass
+    try:
+        origin = attr.Origin
+        rec.origin_x = int(origin.X)
+        rec.origin_y = int(origin.Y)
+    except Exception:
+        pass
+    return rec
+
+
+def attribute_to_dict(attr):
+    return attribute_to_record(attr).to_dict()
+
+
+def collect_attributes(obj):
+    attrs = []
+    try:
+        coll = obj.Attributes
+    except Exception:
+        return attrs
+    for attr in iter_collection(coll):
+        rec = attribute_to_record(attr)
+        if rec.name:
+            attrs.append(rec)
+    return attrs
+
+
+def add_attribute(attrs_obj, data):
+    rec = as_attribute_record(data)
+    name = str(rec.name).strip()
+    if not name:
+        return None
+    value = rec.resolved_value()
+    name_visible = bool(True if rec.name_visible is None else rec.name_visible)
+    value_visible = bool(True if rec.value_visible is None else rec.value_visible)
+    try:
+        return attrs_obj.Add(name, value, name_visible, value_visible, True)
+    except Exception:
+        return None
+
+
+def apply_attributes(obj, attrs_data):
+    if not attrs_data:
+        return
+    try:
+        attrs_obj = obj.Attributes
+    except Exception:
+        attrs_obj = None
+    for data in attrs_data:
+        rec = as_attribute_record(data)
+        name = str(rec.name).strip()
+        if not name:
+            continue
+        attr = find_attribute(obj, name)
+        if attr is None and attrs_obj is not None:
+            attr = add_attribute(attrs_obj, rec)
+        if attr is None:
+            continue
+        value = rec.resolved_value()
+        if value:
+            set_attribute_value(attr, value)
+        for slot, prop in ATTRIBUTE_PROPS:
+            val = getattr(rec, slot)
+            if val is not None:
+                try:
+                    setattr(attr, prop, val)
+                except Exception:
+                    pass
+        if rec.origin_x is not None and rec.origin_y is not None:
+            try:
+                attr.SetLocation(int(rec.origin_x), int(rec.origin_y))
+            except Exception:
+                pass
+
+
+def _delete_object(block, obj):
+    try:
+        obj.Delete()
+        return
+    except Exception:
+        pass
+    try:
+        block.DeSelectAll()
+        obj.Selected = True
+        block.DeleteSelected()
+    except Exception:
+        pass
+
+
+def probe_symbol(dst_block, part, sym, x, y):
+    try:
+        with com_probe():
+            probe = dst_block.AddSymbolInstance(part, sym, x, y)
+    except Exception:
+        return False
+    if probe is None:
+        return False
+    _delete_object(dst_block, probe)
+    return True
+
+
+def symbol_placements(records):
+    for rec in records:
+        if rec is not None:
+            yield rec.partition, rec.symbol, rec.x, rec.y
+
+
+def preflight_symbols(dst_block, placements, symbol_cache):
+    # One probe per distinct (Partition, Symbol), placed at the pair's first
+    # position and deleted again. The outcome stays in symbol_cache, so the
+    # importers skip rows of a missing symbol without a COM call.
+    dst_block = com_proxy(dst_block)
+    rows = {}
+    first = {}
+    for part, sym, x, y in placements:
+        key = (part, sym)
+        rows[key] = rows.get(key, 0) + 1
+        if key not in first:
+            first[key] = (x, y)
+    probed = 0
+    for key, (x, y) in first.items():
+        if key not in symbol_cache:
+            symbol_cache[key] = probe_symbol(dst_block, key[0], key[1], x, y)
+            probed += 1
+    missing = [
+        {"Partition": part, "Symbol": sym, "Rows": rows[(part, sym)]}
+        for part, sym in first
+        if symbol_cache[(part, sym)] is False
+    ]
+    return {"Symbols": len(first), "Probed": probed, "Missing": missing}
+
+
+def try_add_label(net, seg, name, x, y, orient=None, size=None):
+    try:
+        lbl = net.AddLabel(seg, name, int(x), int(y))
+    except Exception:
+        return False
+    if lbl is None:
+        return False
+    if orient is not None:
+        try:
+            lbl.Orientation = orient
+        except Exception:
+            pass
+    if size is not None:
+        try:
+            lbl.Size = size
+        except Exception:
+            pass
+    try:
+        lbl.SetLocation(int(x), int(y))
+    except Exception:
+        pass
+    try:
+        lbl.TextString = name
+    except Exception:
+        pass
+    try:
+        lbl.Visible = VDLABELVISIBLE
+    except Exception:
+        pass
+    return True
+
+
+def net_has_label(net, name):
+    segs = get_segments(net)
+    if segs is None:
+        return False
+    for seg in iter_collection(segs):
+        lbl = None
+        try:
+            lbl = net.GetLabel(seg)
+        except Exception:
+            lbl = None
+        if lbl is None:
+            try:
+                lbl = net.GetConnectedLabel(seg)
+            except Exception:
+                lbl = None
+        if lbl is not None:
+            if _label_text_from_label(lbl) == name:
+                return True
+    return False
+
+
+def _label_text_from_label(lbl):
+    text = ""
+    try:
+        text = str(lbl.TextString).strip()
+    except Exception:
+        text = ""
+    if not text or text.startswith("$"):
+        try:
+            text = str(lbl.ResolvedName).strip()
+        except Exception:
+            pass
+    return text
+
+
+def get_net_labels(net):
+    segs = get_segments(net)
+    if segs is None:
+        return []
+
+    labels = []
+    seen = set()
+
+    for seg in iter_collection(segs):
+        try:
+            p_low = seg.Location(VDJ_LOW)
+            p_high = seg.Location(VDJ_HIGH)
+        except Exception:
+            continue
+
+        lbl = None
+        try:
+            lbl = net.GetLabel(seg)
+        except Exception:
+            lbl = None
+
+        if lbl is not None:
+            name = _label_text_from_label(lbl)
+            loc = get_location(lbl)
+            if not name or name.startswith("$") or loc is None:
+                continue
+            try:
+                orient = lbl.Orientation
+            except Exception:
+                orient = None
+            try:
+                size = lbl.Size
+            except Exception:
+                size = None
+            key = (name, int(loc.X), int(loc.Y))
+            if key in seen:
+                continue
+            seen.add(key)
+            labels.append(
+                LabelRecord(
+                    name,
+                    int(loc.X),
+                    int(loc.Y),
+                    int(p_low.X),
+                    int(p_low.Y),
+                    int(p_high.X),
+                    int(p_high.Y),
+                    orient,
+                    size,
+                )
+            )
+
+    if labels:
+        return labels
+
+    for seg in iter_collection(segs):
+        try:
+            p_low = seg.Location(VDJ_LOW)
+            p_high = seg.Location(VDJ_HIGH)
+        except Exception:
+            continue
+        lbl = None
+        try:
+            lbl = net.GetConnectedLabel(seg)
+        except Exception:
+            lbl = None
+        if lbl is None:
+            continue
+        name = _label_text_from_label(lbl)
+        loc = get_location(lbl)
+        if not name or name.startswith("$") or loc is None:
+            continue
+        if not point_on_segment(loc.X, loc.Y, p_low.X, p_low.Y, p_high.X, p_high.Y):
+            continue
+        try:
+            orient = lbl.Orientation
+        except Exception:
+            orient = None
+        try:
+            size = lbl.Size
+        except Exception:
+            size = None
+        key = (name, int(loc.X), int(loc.Y))
+        if key in seen:
+            continue
+        seen.add(key)
+        labels.append(
+            LabelRecord(
+                name,
+                int(loc.X),
+                int(loc.Y),
+                int(p_low.X),
+                int(p_low.Y),
+                int(p_high.X),
+                int(p_high.Y),
+                orient,
+                size,
+            )
+        )
+
+    return labels
+
+
+def count_collection(coll):
+    try:
+        return int(coll.Count)
+    except Exception:
+        pass
+    try:
+        return int(coll.GetCount())
+    except Exception:
+        pass
+    count = 0
+    try:
+        for _ in coll:
+            count += 1
+    except Exception:
+        return 0
+    return count
+
+
+def get_parent(obj):
+    try:
+        return obj.Parent
+    except Exception:
+        return None
+
+
+def resolve_net_from_label(lbl):
+    parent = get_parent(lbl)
+    if parent is None:
+        return None
+    if get_segments(parent) is not None:
+        return parent
+    parent2 = get_parent(parent)
+    if parent2 is not None and get_segments(parent2) is not None:
+        return parent2
+    return None
+
+
+def delete_empty_sheet(sheets, schematic_name, sheet_name):
+    doc = open_sheet(sheets, schematic_name, sheet_name)
+    if doc is None:
+        return False
+    view = get_view_from_doc(doc)
+    if view is None:
+        return False
+    comps = view.Query(VDM_COMP, VD_ALL)
+    nets = view.Query(VDM_NET, VD_ALL)
+    if count_collection(comps) == 0 and count_collection(nets) == 0:
+        try:
+            return bool(sheets.DeleteSheet(schematic_name, sheet_name))
+        except Exception:
+            try:
+                if isinstance(sheet_name, str) and sheet_name.isdigit():
+                    return bool(sheets.DeleteSheet(schematic_name, int(sheet_name)))
+            except Exception:
+                pass
+    return False
+
+
+def clear_sheet(view):
+    block = view.Block
+    if block is None:
+        return 0
+    try:
+        block.DeSelectAll()
+    except Exception:
+        pass
+    mask = VDM_COMP | VDM_NET | VDM_LABEL | VDM_TEXT | VDM_LINE
+    objs = view.Query(mask, VD_ALL)
+    selected = 0
+    for obj in iter_collection(objs):
+        try:
+            obj.Selected = True
+            selected += 1
+        except Exception:
+            pass
+    try:
+        block.DeleteSelected()
+    except Exception:
+        pass
+    return selected
+
+
+def get_sheet_object_count(view):
+    comps = view.Query(VDM_COMP, VD_ALL)
+    nets = view.Query(VDM_NET, VD_ALL)
+    return count_collection(comps) + count_collection(nets)
+
+
+def _doc_file_time(doc):
+    for name in ("FullName", "FullPath", "Path"):
+        try:
+            path = getattr(doc, name)
+            if callable(path):
+                path = path()
+            if path and os.path.isfile(str(path)):
+                return os.stat(str(path)).st_mtime_ns
+        except Exception:
+            continue
+    return None
+
+
+def _geometry_digest(view):
+    # Component origins and refdes plus segment endpoints; stands in for the
+    # file time on documents that do not expose a path.
+    items = []
+    for comp in iter_collection(view.Query(VDM_COMP, VD_ALL)):
+        loc = get_location(comp)
+        try:
+            refdes = str(comp.Refdes)
+        except Exception:
+            refdes = ""
+        if loc is not None:
+            items.append(("C", refdes, int(loc.X), int(loc.Y)))
+    for net in iter_collection(view.Query(VDM_NET, VD_ALL)):
+        for entry in get_segment_table(net) or ():
+            items.append(("S",) + tuple(int(v) for v in entry[1:5]))
+    items.sort()
+    return hashlib.sha1(repr(items).encode("utf-8")).hexdigest()
+
+
+def sheet_fingerprint(doc, view, geometry=True):
+    # A few COM calls instead of a full walk: object counts per kind, the
+    # document's unsaved-changes flag and its file time, or a geometry digest
+    # when the document has no file to stat.
+    fingerprint = {}
+    for key, mask in (
+        ("Components", VDM_COMP),
+        ("Nets", VDM_NET),
+        ("Labels", VDM_LABEL),
+    ):
+        try:
+            fingerprint[key] = count_collection(view.Query(mask, VD_ALL))
+        except Exception:
+            fingerprint[key] = None
+    try:
+        fingerprint["Modified"] = bool(doc.Modified)
+    except Exception:
+        fingerprint["Modified"] = None
+    fingerprint["FileTime"] = _doc_file_time(doc)
+    if geometry and fingerprint["FileTime"] is None:
+        try:
+            fingerprint["Geometry"] = _geometry_digest(view)
+        except Exception:
+            fingerprint["Geometry"] = None
+    return fingerprint
+
+
+def fingerprint_unchanged(old, new):
+    if not old or new.get("Modified") or old.get("Modified"):
+        return False
+    if any(val is None for key, val in new.items() if key != "FileTime"):
+        return False
+    return old == new
+
+
+def _output_stamps(paths):
+    stamps = []
+    for path in paths:
+        for file_path in export_input_files(path):
+            st = os.stat(file_path)
+            stamps.append([file_path, st.st_size, st.st_mtime_ns])
+    return stamps
+
+
+def load_export_stamp(path, key):
+    # Returns the (parts, nets) paths of an earlier export of the same sheet
+    # when its fingerprint still matches and the files are untouched.
+    try:
+        with open(path + STAMP_SUFFIX, "r", encoding="utf-8") as f:
+            stamp = json.load(f)
+        if stamp.get("Version") != STAMP_VERSION or stamp.get("Key") != key["Key"]:
+            return None
+        if not fingerprint_unchanged(stamp.get("Fingerprint"), key["Fingerprint"]):
+            return None
+        parts_used, nets_used = stamp["Parts"], stamp["Nets"]
+        if _output_stamps(sorted({parts_used, nets_used})) != stamp["Files"]:
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return parts_used, nets_used
+
+
+def save_export_stamp(path, key, parts_used, nets_used):
+    stamp = {
+        "Version": STAMP_VERSION,
+        "Key": key["Key"],
+        "Fingerprint": key["Fingerprint"],
+        "Parts": parts_used,
+        "Nets": nets_used,
+        "Files": _output_stamps(sorted({parts_used, nets_used})),
+    }
+    tmp_path = f"{path}{STAMP_SUFFIX}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(stamp, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path + STAMP_SUFFIX)
+
+
+def export_stamp_key(doc, view, schematic, sheet, fingerprint=None, **options):
+    if options.get("templates"):
+        options["templates"] = TEMPLATE_VERSION
+    if fingerprint is None:
+        fingerprint = sheet_fingerprint(doc, view)
+    return {
+        "Key": {"Schematic": schematic, "Sheet": str(sheet), "Options": options},
+        "Fingerprint": fingerprint,
+    }
+
+
+def choose_source_sheet(sheets, schematic_name, preferred=None):
+    try:
+        sheet_list = stringlist_to_list(sheets.GetAvailableSheets(schematic_name))
+    except Exception:
+        sheet_list = []
+    if not sheet_list:
+        return None
+    if preferred and preferred in sheet_list:
+        return preferred
+    best_sheet = sheet_list[0]
+    best_count = -1
+    for name in sheet_list:
+        doc = open_sheet(sheets, schematic_name, name)
+        if doc is None:
+            continue
+        view = get_view_from_doc(doc)
+        if view is None:
+            continue
+        count = get_sheet_object_count(view)
+        if count > best_count:
+            best_count = count
+            best_sheet = name
+    return best_sheet
+
+
+def component_to_record(comp, region=None):
+    loc = get_location(comp)
+    if loc is None:
+        return None
+    if region is not None and not box_intersects(region, loc.X, loc.Y, loc.X, loc.Y):
+        return None
+    part, sym_name = get_symbol_info(comp)
+    if not part or not sym_name:
+        return None
+    rec = ComponentRecord(
+        getattr(comp, "Refdes", ""), part, sym_name, int(loc.X), int(loc.Y)
+    )
+    try:
+        rec.orientation = comp.Orientation
+    except Exception:
+        pass
+    try:
+        rec.scale = comp.Scale
+    except Exception:
+        pass
+    rec.attributes = collect_attributes(comp)
+    return rec
+
+
+def net_to_record(net, region=None):
+    segs = get_segments(net)
+    if segs is None:
+        return None
+    rec = NetRecord()
+    for seg in iter_collection(segs):
+        try:
+            p_low = seg.Location(VDJ_LOW)
+            p_high = seg.Location(VDJ_HIGH)
+            rec.segments.append(
+                SegmentRecord(int(p_low.X), int(p_low.Y), int(p_high.X), int(p_high.Y))
+            )
+        except Exception:
+            continue
+    # Labels and attributes are the expensive part; skip them off-region.
+    if region is not None and not segments_intersect_box(rec.segments, region):
+        return None
+    rec.labels = get_net_labels(net)
+    rec.attributes = collect_attributes(net)
+    return rec
+
+
+def iter_component_records(view, region=None):
+    comps = view.Query(VDM_COMP, VD_ALL)
+    for comp in iter_collection(comps):
+        rec = component_to_record(comp, region)
+        if rec is not None:
+            yield rec
+
+
+def iter_net_records(view, region=None):
+    nets = view.Query(VDM_NET, VD_ALL)
+    for net in iter_collection(nets):
+        rec = net_to_record(net, region)
+        if rec is not None:
+            yield rec
+
+
+def _counted(records, counts, key):
+    if counts is None:
+        yield from records
+        return
+    counts[key] = 0
+    for rec in records:
+        counts[key] += 1
+        yield rec
+
+
+def export_components(view, path, region=None, encoded=False, counts=None):
+    records = list(iter_component_records(view, region))
+    if counts is not None:
+        counts["Components"] = len(records)
+    if encoded:
+        return write_encoded_component_records(records, path)
+    return write_component_records(records, path)
+
+
+def export_nets(view, path, region=None, counts=None):
+    records = list(iter_net_records(view, region))
+    if counts is not None:
+        counts["Nets"] = len(records)
+    return write_net_records(records, path)
+
+
+def export_tables(view, out_dir, region=None, counts=None):
+    return write_tables(
+        _counted(iter_component_records(view, region), counts, "Components"),
+        _counted(iter_net_records(view, region), counts, "Nets"),
+        out_dir,
+    )
+
+
+def export_templates(view, path, link=TEMPLATE_LINK, region=None, counts=None):
+    doc = compress_records(
+        _counted(iter_component_records(view, region), counts, "Components"),
+        _counted(iter_net_records(view, region), counts, "Nets"),
+        link,
+    )
+    return write_template_export(doc, path)
+
+
+def _write_archive_member(zf, member, records, fieldnames):
+    count = 0
+    with zf.open(member, "w") as raw:
+        with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for rec in records:
+                writer.writerow(rec.to_row())
+                count += 1
+    return count
+
+
+def export_sheet_to_archive(zf, view, schematic, sheet):
+    timings = {}
+    prefix = f"{archive_part(schematic)}/{archive_part(sheet)}"
+    parts_member = f"{prefix}/parts.csv"
+    nets_member = f"{prefix}/net.csv"
+    components = timed(
+        timings,
+        "export_components",
+        _write_archive_member,
+        zf,
+        parts_member,
+        iter_component_records(view),
+        PARTS_FIELDS,
+    )
+    nets = timed(
+        timings,
+        "export_nets",
+        _write_archive_member,
+        zf,
+        nets_member,
+        iter_net_records(view),
+        NETS_FIELDS,
+    )
+    return {
+        "Schematic": schematic,
+        "Sheet": sheet,
+        "Parts": parts_member,
+        "Nets": nets_member,
+        "Components": components,
+        "NetCount": nets,
+        "Timings": timings,
+    }
+
+
+def _previous_archive(archive_path):
+    try:
+        old = zipfile.ZipFile(archive_path)
+    except Exception:
+        return None, {}
+    try:
+        index = json.loads(old.read("index.json").decode("utf-8"))
+    except Exception:
+        old.close()
+        return None, {}
+    entries = {}
+    for entry in index.get("Sheets", []):
+        if "Error" not in entry and entry.get("Fingerprint"):
+            entries[(entry["Schematic"], str(entry["Sheet"]))] = entry
+    return old, entries
+
+
+def export_all_sheets(sheets, archive_path, schematics=None, reuse=True):
+    index = {"Version": ARCHIVE_VERSION, "CreatedAt": time.time(), "Sheets": []}
+    start = time.perf_counter()
+    tmp_path = f"{archive_path}.tmp"
+    old, previous = _previous_archive(archive_path) if reuse else (None, {})
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        if schematics is None:
+            schematics = stringlist_to_list(sheets.GetAvailableSchematics())
+        for schem in schematics:
+            try:
+                sheet_list = stringlist_to_list(sheets.GetAvailableSheets(schem))
+            except Exception:
+                sheet_list = []
+            for sheet in sheet_list:
+                sheet_start = time.perf_counter()
+                entry = {"Schematic": schem, "Sheet": sheet}
+                doc = open_sheet(sheets, schem, sheet)
+                view = get_view_from_doc(doc) if doc is not None else None
+                if view is None:
+                    entry["Error"] = "Cannot open sheet."
+                else:
+                    fingerprint = sheet_fingerprint(doc, view)
+                    prev = previous.get((schem, str(sheet)))
+                    try:
+                        if prev is not None and fingerprint_unchanged(
+                            prev["Fingerprint"], fingerprint
+                        ):
+                            for member in (prev["Parts"], prev["Nets"]):
+                                zf.writestr(member, old.read(member))
+                            entry = dict(prev, Reused=True, Timings={})
+                        else:
+                            entry = export_sheet_to_archive(zf, view, schem, sheet)
+                        entry["Fingerprint"] = fingerprint
+                    except Exception as exc:
+                        entry["Error"] = f"{type(exc).__name__}: {exc}"
+                entry["Seconds"] = round(time.perf_counter() - sheet_start, 6)
+                index["Sheets"].append(entry)
+        index["Seconds"] = round(time.perf_counter() - start, 6)
+        zf.writestr("index.json", json.dumps(index, ensure_ascii=False, indent=2))
+    if old is not None:
+        old.close()
+    os.replace(tmp_path, archive_path)
+    return index
+
+
+def apply_component(dst_block, rec, symbol_cache=None, batch_oats=None):
+    dst_block = com_proxy(dst_block)
+    part = rec.partition
+    sym = rec.symbol
+    if symbol_cache is not None and symbol_cache.get((part, sym)) is False:
+        return None
+    # Only preflight_symbols marks a symbol as missing; a failed placement
+    # here is counted and the next row with this symbol is tried again.
+    try:
+        new_comp = dst_block.AddSymbolInstance(part, sym, rec.x, rec.y)
+    except Exception:
+        return None
+    if new_comp is None:
+        COM_FAILURES["n"] += 1
+        return None
+    if rec.refdes:
+        try:
+            new_comp.Refdes = rec.refdes
+        except Exception:
+            pass
+    if rec.orientation is not None:
+        try:
+            new_comp.Orientation = rec.orientation
+        except Exception:
+            pass
+    if rec.scale is not None:
+        try:
+            new_comp.Scale = rec.scale
+        except Exception:
+            pass
+    if rec.attributes:
+        try:
+            if batch_oats is not None and _apply_batch_oats(new_comp, rec, batch_oats):
+                return new_comp
+        except Exception:
+            pass
+        try:
+            apply_attributes(new_comp, rec.attributes)
+            value = rec.value()
+            if value:
+                set_component_value(new_comp, value)
+        except Exception:
+            pass
+    return new_comp
+
+
+def _attribute_defaults(comp, rec, defaults_cache):
+    # What a fresh instance of the symbol already carries, read once per
+    # symbol, orientation and scale. Origins are kept relative to the
+    # instance so they compare across placements.
+    key = (rec.partition, rec.symbol, rec.orientation, rec.scale)
+    defaults = defaults_cache.get(key)
+    if defaults is None:
+        defaults = {}
+        for attr in collect_attributes(comp):
+            offset = None
+            if attr.origin_x is not None and attr.origin_y is not None:
+                offset = (attr.origin_x - rec.x, attr.origin_y - rec.y)
+            defaults.setdefault(attr.name.lower(), (attr, offset))
+        defaults_cache[key] = defaults
+    return defaults
+
+
+def _apply_batch_oats(comp, rec, defaults_cache):
+    # Names, values and visibility go out in one AddBatchOats call; display
+    # properties are written one by one only where they differ from the
+    # symbol's own defaults.
+    attrs = [as_attribute_record(data) for data in rec.attributes]
+    oats, rest = encode_batch_oats(attrs)
+    if not oats:
+        return False
+    defaults = _attribute_defaults(comp, rec, defaults_cache)
+    try:
+        comp.AddBatchOats(oats)
+    except Exception:
+        return False
+    if rest:
+        apply_attributes(comp, rest)
+    for attr in attrs:
+        name = str(attr.name).strip()
+        if not name or attr in rest:
+            continue
+        default, offset = defaults.get(name.lower(), (None, None))
+        writes = []
+        for slot, prop in ATTRIBUTE_PROPS[1:]:
+            val = getattr(attr, slot)
+            if val is not None and (default is None or getattr(default, slot) != val):
+                writes.append((prop, val))
+        origin = None
+        if attr.origin_x is not None and attr.origin_y is not None:
+            if offset != (attr.origin_x - rec.x, attr.origin_y - rec.y):
+                origin = (int(attr.origin_x), int(attr.origin_y))
+        if not writes and origin is None:
+            continue
+        target = find_attribute(comp, name)
+        if target is None:
+            continue
+        for prop, val in writes:
+            try:
+                setattr(target, prop, val)
+            except Exception:
+                pass
+        if origin is not None:
+            try:
+                target.SetLocation(*origin)
+            except Exception:
+                pass
+    return True
+
+
+def get_segment_table(net):
+    dst_segs = get_segments(net)
+    if dst_segs is None:
+        return None
+    dst_seg_list = []
+    for s in iter_collection(dst_segs):
+        try:
+            p_low = s.Location(VDJ_LOW)
+            p_high = s.Location(VDJ_HIGH)
+        except Exception:
+            continue
+        dst_seg_list.append(
+            (
+                s,
+                p_low.X,
+                p_low.Y,
+                p_high.X,
+                p_high.Y,
+                segment_key(p_low.X, p_low.Y, p_high.X, p_high.Y),
+            )
+        )
+    return dst_seg_list
+
+
+def choose_label_segment(dst_seg_list, src_key, lx, ly):
+    for s, x1, y1, x2, y2, key in dst_seg_list:
+        if key == src_key:
+            return s
+    for s, x1, y1, x2, y2, _ in dst_seg_list:
+        if point_on_segment(lx, ly, x1, y1, x2, y2, tol=1):
+            return s
+    best = None
+    best_dist = None
+    for s, x1, y1, x2, y2, _ in dst_seg_list:
+        dist = point_to_segment_distance(lx, ly, x1, y1, x2, y2)
+        if best_dist is None or dist < best_dist:
+            best_dist = dist
+            best = s
+    return best
+
+
+def apply_net(dst_block, rec, net=None):
+    dst_block = com_proxy(dst_block)
+    last_net = net
+    for seg in rec.segments:
+        try:
+            last_net = dst_block.AddNet(
+                seg.x1, seg.y1, seg.x2, seg.y2, None, None, VD_WIRE
+            )
+        except Exception:
+            pass
+    if last_net is None:
+        return None
+    if rec.attributes:
+        try:
+            apply_attributes(last_net, rec.attributes)
+        except Exception:
+            pass
+    if rec.labels:
+        dst_seg_list = get_segment_table(last_net)
+        if dst_seg_list is None:
+            return last_net
+        for lbl in rec.labels:
+            chosen = choose_label_segment(dst_seg_list, lbl.key, lbl.x, lbl.y)
+            if chosen is not None and not net_has_label(last_net, lbl.name):
+                try_add_label(
+                    last_net,
+                    chosen,
+                    lbl.name,
+                    lbl.x,
+                    lbl.y,
+                    lbl.orientation,
+                    lbl.size,
+                )
+    return last_net
+
+
+class ImportJournal:
+    def __init__(
+        self, path, input_hash="", destination="", resume=False, batch_size=None
+    ):
+        self.path = path
+        self.batch_size = batch_size or JOURNAL_BATCH
+        self.done = {"parts": set(), "nets": set()}
+        self.pending = {"parts": [], "nets": []}
+        self.refdes = set()
+        self.seg_nets = {}
+        self.skipped = 0
+        matched = False
+        if resume and os.path.exists(path):
+            matched = self._load(input_hash, destination)
+        if matched:
+            self.f = open(path, "a", encoding="utf-8")
+        else:
+            self.done = {"parts": set(), "nets": set()}
+            self.f = open(path, "w", encoding="utf-8")
+            self._write({"InputHash": input_hash, "Destination": destination})
+
+    def _load(self, input_hash, destination):
+        with open(self.path, "r", encoding="utf-8") as f:
+            header = None
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except Exception:
+                    # A torn final line is expected after a crash.
+                    break
+                if header is None:
+                    header = entry
+                    continue
+                for section in ("parts", "nets"):
+                    self.done[section].update(entry.get(section, ()))
+        if header is None:
+            return False
+        return (
+            header.get("InputHash") == input_hash
+            and header.get("Destination") == destination
+        )
+
+    def _write(self, entry):
+        self.f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def load_destination(self, view):
+        for comp in iter_collection(view.Query(VDM_COMP, VD_ALL)):
+            try:
+                refdes = str(comp.Refdes).strip()
+            except Exception:
+                continue
+            if refdes:
+                self.refdes.add(refdes)
+        for net in iter_collection(view.Query(VDM_NET, VD_ALL)):
+            for row in get_segment_table(net) or ():
+                self.seg_nets[row[5]] = net
+
+    def skip_component(self, index, rec):
+        refdes = rec.refdes
+        if refdes:
+            done = refdes in self.refdes
+        else:
+            done = index in self.done["parts"]
+        if done:
+            self.skipped += 1
+        return done
+
+    def drawn_net(self, rec):
+        for seg in rec.segments:
+            net = self.seg_nets.get(seg.key())
+            if net is not None:
+                return net
+        return None
+
+    def filter_net(self, index, rec):
+        if index in self.done["nets"]:
+            self.skipped += 1
+            return None
+        missing = [seg for seg in rec.segments if seg.key() not in self.seg_nets]
+        if len(missing) == len(rec.segments):
+            return rec
+        # Interrupted after some or all segments were drawn: draw the rest and
+        # apply the labels and attributes to the net that is already there.
+        return NetRecord(missing, rec.labels, rec.attributes)
+
+    def mark(self, section, index):
+        pending = self.pending[section]
+        pending.append(index)
+        self.done[section].add(index)
+        if len(pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        entry = {k: v for k, v in self.pending.items() if v}
+        if entry:
+            self._write(entry)
+            for pending in self.pending.values():
+                pending.clear()
+
+    def close(self, complete=False):
+        if self.f is None:
+            return
+        self.flush()
+        if complete:
+            self._write({"Complete": True})
+        self.f.close()
+        self.f = None
+
+
+def import_components(
+    path,
+    dst_block,
+    symbol_cache=None,
+    pipelined=False,
+    processes=0,
+    journal=None,
+    batch_oats=None,
+    missing=None,
+):
+    if is_table_export(path) or is_template_export(path) or is_encoded_parts(path):
+        records = read_component_records(path)
+        if pipelined:
+            records = iter_parsed_pipeline(records, decoded_record)
+        return import_component_records(
+            records, dst_block, symbol_cache, journal, batch_oats, missing
+        )
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return import_component_rows(
+            csv.DictReader(f),
+            dst_block,
+            symbol_cache,
+            pipelined,
+            processes,
+            journal,
+            batch_oats,
+            missing,
+        )
+
+
+def import_component_rows(
+    rows,
+    dst_block,
+    symbol_cache=None,
+    pipelined=False,
+    processes=0,
+    journal=None,
+    batch_oats=None,
+    missing=None,
+):
+    parse = parse_component_row_decoded if pipelined else parse_component_row
+    records = iter_records(rows, parse, pipelined, processes)
+    return import_component_records(
+        records, dst_block, symbol_cache, journal, batch_oats, missing
+    )
+
+
+def preflight_stream(records, dst_block, symbol_cache, missing):
+    # preflight_symbols for records that are only read once: each symbol is
+    # probed the first time a record uses it, and the missing ones are added
+    # to missing when the records run out.
+    rows = {}
+    for rec in records:
+        if rec is not None:
+            key = (rec.partition, rec.symbol)
+            if key not in symbol_cache:
+                symbol_cache[key] = probe_symbol(dst_block, *key, rec.x, rec.y)
+            if symbol_cache[key] is False:
+                rows[key] = rows.get(key, 0) + 1
+        yield rec
+    missing.extend(
+        {"Partition": part, "Symbol": sym, "Rows": count}
+        for (part, sym), count in rows.items()
+    )
+
+
+def import_component_records(
+    records,
+    dst_block,
+    symbol_cache=None,
+    journal=None,
+    batch_oats=None,
+    missing=None,
+):
+    if missing is not None:
+        if symbol_cache is None:
+            symbol_cache = {}
+        records = preflight_stream(records, com_proxy(dst_block), symbol_cache, missing)
+    dst_block = com_proxy(dst_block)
+    placed = 0
+    for index, rec in enumerate(records):
+        if rec is None:
+            continue
+        if journal is not None and journal.skip_component(index, rec):
+            continue
+        if apply_component(dst_block, rec, symbol_cache, batch_oats) is not None:
+            placed += 1
+        if journal is not None:
+            journal.mark("parts", index)
+    if journal is not None:
+        journal.flush()
+    return placed
+
+
+def import_nets(path, dst_block, pipelined=False, processes=0, journal=None):
+    if is_table_export(path) or is_template_export(path):
+        records = read_net_records(path)
+        if pipelined:
+            records = iter_parsed_pipeline(records, passthrough)
+        return import_net_records(records, dst_block, journal)
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return import_net_rows(
+            csv.DictReader(f), dst_block, pipelined, processes, journal
+        )
+
+
+def import_net_rows(rows, dst_block, pipelined=False, processes=0, journal=None):
+    records = iter_records(rows, parse_net_row, pipelined, processes)
+    return import_net_records(records, dst_block, journal)
+
+
+def import_net_records(records, dst_block, journal=None):
+    dst_block = com_proxy(dst_block)
+    nets_added = 0
+    for index, rec in enumerate(records):
+        if rec is None:
+            continue
+        net = None
+        if journal is not None:
+            net = journal.drawn_net(rec)
+            rec = journal.filter_net(index, rec)
+            if rec is None:
+                continue
+        if apply_net(dst_block, rec, net) is not None:
+            nets_added += 1
+        if journal is not None:
+            journal.mark("nets", index)
+    if journal is not None:
+        journal.flush()
+    return nets_added
+
+
+def _drain_queue(in_queue):
+    while True:
+        item = in_queue.get()
+        if item is PIPELINE_DONE:
+            return
+        yield item
+
+
+class AuditWriter:
+    # Writes the records of a direct copy to CSV on background threads so the
+    # COM thread only pays for a queue put per record.
+    def __init__(self, parts_path, nets_path, queue_size=4096):
+        self.queues = {
+            "parts": queue.Queue(maxsize=queue_size),
+            "nets": queue.Queue(maxsize=queue_size),
+        }
+        self.paths = {}
+        self.errors = []
+        self.threads = [
+            threading.Thread(
+                target=self._run,
+                args=("parts", write_component_records, parts_path),
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._run,
+                args=("nets", write_net_records, nets_path),
+                daemon=True,
+            ),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _run(self, kind, write, path):
+        items = _drain_queue(self.queues[kind])
+        try:
+            self.paths[kind] = write(items, path)
+        except Exception as exc:
+            self.errors.append(exc)
+            for _ in items:
+                pass
+
+    def tee(self, kind, records):
+        out_queue = self.queues[kind]
+        for rec in records:
+            out_queue.put(rec)
+            yield rec
+
+    def close(self):
+        for out_queue in self.queues.values():
+            out_queue.put(PIPELINE_DONE)
+        for thread in self.threads:
+            thread.join()
+        return self.paths.get("parts"), self.paths.get("nets")
+
+
+def direct_copy(
+    src_view,
+    dst_block,
+    symbol_cache=None,
+    region=None,
+    audit=None,
+    batch_oats=None,
+    preflight=False,
+):
+    # Records go straight from the source walk into the importer; the CSV
+    # files are only written when an AuditWriter is passed in.
+    comp_records = iter_component_records(src_view, region)
+    net_records = iter_net_records(src_view, region)
+    if audit is not None:
+        comp_records = audit.tee("parts", comp_records)
+        net_records = audit.tee("nets", net_records)
+    missing = []
+    if preflight:
+        # The component walk is held in memory so every symbol is probed
+        # before the first placement.
+        comp_records = list(comp_records)
+        if symbol_cache is None:
+            symbol_cache = {}
+        missing = preflight_symbols(
+            dst_block, symbol_placements(comp_records), symbol_cache
+        )["Missing"]
+    placed = import_component_records(
+        comp_records, dst_block, symbol_cache, batch_oats=batch_oats
+    )
+    nets_added = import_net_records(net_records, dst_block)
+    return placed, nets_added, missing
+
+
+def _exec_add_symbol(dst_block, handles, ops, ctx):
+    symbol_cache = ctx["symbol_cache"]
+    for _, handle, part, sym, x, y in ops:
+        if symbol_cache is not None and symbol_cache.get((part, sym)) is False:
+            continue
+        try:
+            new_comp = dst_block.AddSymbolInstance(part, sym, x, y)
+        except Exception:
+            continue
+        if new_comp is None:
+            COM_FAILURES["n"] += 1
+        else:
+            handles[handle] = new_comp
+
+
+def _exec_set_property(prop):
+    def run(dst_block, handles, ops, ctx):
+        for _, handle, value in ops:
+            obj = handles.get(handle)
+            if obj is None:
+                continue
+            try:
+                setattr(obj, prop, value)
+            except Exception:
+                pass
+
+    return run
+
+
+def _exec_apply_attrs(dst_block, handles, ops, ctx):
+    for _, handle, attrs_data in ops:
+        obj = handles.get(handle)
+        if obj is None:
+            continue
+        try:
+            apply_attributes(obj, attrs_data)
+        except Exception:
+            pass
+
+
+def _exec_set_value(dst_block, handles, ops, ctx):
+    for _, handle, value in ops:
+        obj = handles.get(handle)
+        if obj is None:
+            continue
+        try:
+            set_component_value(obj, value)
+        except Exception:
+            pass
+
+
+def _exec_add_net(dst_block, handles, ops, ctx):
+    for _, handle, x1, y1, x2, y2 in ops:
+        try:
+            net = dst_block.AddNet(x1, y1, x2, y2, None, None, VD_WIRE)
+        except Exception:
+            continue
+        if net is not None:
+            handles[handle] = net
+
+
+def _collection_item(coll, index):
+    for method in ("Item", "GetItem"):
+        try:
+            return getattr(coll, method)(index + 1)
+        except Exception:
+            pass
+    for pos, obj in enumerate(iter_collection(coll)):
+        if pos == index:
+            return obj
+    return None
+
+
+def _segment_from_hint(net, hint):
+    pos, key = hint
+    segs = get_segments(net)
+    if segs is None:
+        return None
+    seg = _collection_item(segs, pos)
+    if seg is None:
+        return None
+    try:
+        p_low = seg.Location(VDJ_LOW)
+        p_high = seg.Location(VDJ_HIGH)
+    except Exception:
+        return None
+    if segment_key(p_low.X, p_low.Y, p_high.X, p_high.Y) != key:
+        return None
+    return seg
+
+
+def _exec_add_label(dst_block, handles, ops, ctx):
+    # label_hints remembers which destination segment a label landed on, so
+    # replays of the same plan can fetch that one segment instead of
+    # rebuilding the whole segment table of the net.
+    label_hints = ctx["label_hints"]
+    seg_tables = {}
+    for _, handle, name, lx, ly, key, orient, size in ops:
+        net = handles.get(handle)
+        if net is None:
+            continue
+        hint_key = (handle, name, lx, ly)
+        chosen = None
+        if label_hints is not None and hint_key in label_hints:
+            chosen = _segment_from_hint(net, label_hints[hint_key])
+        if chosen is None:
+            if handle not in seg_tables:
+                seg_tables[handle] = get_segment_table(net)
+            dst_seg_list = seg_tables[handle]
+            if not dst_seg_list:
+                continue
+            chosen = choose_label_segment(dst_seg_list, tuple(key), lx, ly)
+            if chosen is not None and label_hints is not None:
+                for pos, row in enumerate(dst_seg_list):
+                    if row[0] is chosen:
+                        label_hints[hint_key] = (pos, row[5])
+                        break
+        if chosen is not None and not net_has_label(net, name):
+            try_add_label(net, chosen, name, lx, ly, orient, size)
+
+
+PLAN_EXECUTORS = {
+    "AddSymbolInstance": _exec_add_symbol,
+    "SetRefdes": _exec_set_property("Refdes"),
+    "SetOrientation": _exec_set_property("Orientation"),
+    "SetScale": _exec_set_property("Scale"),
+    "ApplyAttrs": _exec_apply_attrs,
+    "SetValue": _exec_set_value,
+    "AddNet": _exec_add_net,
+    "AddLabel": _exec_add_label,
+}
+
+
+def execute_plan(plan, dst_block, symbol_cache=None, batched=True, label_hints=None):
+    dst_block = com_proxy(dst_block)
+    handles = {}
+    ctx = {"symbol_cache": symbol_cache, "label_hints": label_hints}
+    ops = plan["Ops"]
+    if not batched:
+        for op in ops:
+            PLAN_EXECUTORS[op[0]](dst_block, handles, [op], ctx)
+        return handles
+    # Symbols and nets are created in plan order; every other kind is
+    # applied as one batch per stage once all of its targets exist.
+    by_kind = {}
+    for op in ops:
+        by_kind.setdefault(op[0], []).append(op)
+    for kind in PLAN_BATCH_ORDER:
+        batch = by_kind.pop(kind, None)
+        if batch:
+            PLAN_EXECUTORS[kind](dst_block, handles, batch, ctx)
+    for kind, batch in by_kind.items():
+        PLAN_EXECUTORS[kind](dst_block, handles, batch, ctx)
+    return handles
+
+
+def plan_handle_counts(plan, handles):
+    kinds = {}
+    for op in plan["Ops"]:
+        if op[0] == "AddSymbolInstance":
+            kinds[op[1]] = "components"
+        elif op[0] == "AddNet":
+            kinds[op[1]] = "nets"
+    counts = {"components": 0, "nets": 0}
+    for handle in handles:
+        kind = kinds.get(handle)
+        if kind:
+            counts[kind] += 1
+    return counts
+
+
+def parse_destination(spec, default_schematic):
+    spec = str(spec).strip()
+    if ":" in spec:
+        schematic_name, sheet_name = spec.split(":", 1)
+        return schematic_name.strip() or default_schematic, sheet_name.strip()
+    return default_schematic, spec
+
+
+def fan_out_copy(
+    app, sheets, src_view, destinations, schematic_name, symbol_cache=None, clear=True
+):
+    # The source sheet is walked and compiled once; every destination only
+    # replays the in-memory plan.
+    report = {"Timings": {}, "Destinations": []}
+    start = time.perf_counter()
+    timings = report["Timings"]
+    component_records = timed(
+        timings, "export_components", list, iter_component_records(src_view)
+    )
+    net_records = timed(timings, "export_nets", list, iter_net_records(src_view))
+    plan = timed(timings, "compile_plan", compile_plan, component_records, net_records)
+    report["Components"] = len(component_records)
+    report["NetCount"] = len(net_records)
+    if symbol_cache is None:
+        symbol_cache = {}
+    label_hints = {}
+    for spec in destinations:
+        dst_start = time.perf_counter()
+        dst_schematic, dst_sheet = parse_destination(spec, schematic_name)
+        entry = {"Schematic": dst_schematic, "Sheet": dst_sheet, "Timings": {}}
+        insert_sheet(sheets, dst_schematic, dst_sheet)
+        dst_doc = open_sheet(sheets, dst_schematic, dst_sheet)
+        dst_view = get_view_from_doc(dst_doc) if dst_doc is not None else None
+        if dst_view is None or dst_view.Block is None:
+            entry["Error"] = "Cannot open sheet."
+        else:
+            app.SetRedraw(False)
+            try:
+                if clear:
+                    timed(entry["Timings"], "clear_sheet", clear_sheet, dst_view)
+                handles = timed(
+                    entry["Timings"],
+                    "execute_plan",
+                    execute_plan,
+                    plan,
+                    dst_view.Block,
+                    symbol_cache,
+                    True,
+                    label_hints,
+                )
+                counts = plan_handle_counts(plan, handles)
+                entry["Components"] = counts["components"]
+                entry["NetCount"] = counts["nets"]
+            except Exception as exc:
+                entry["Error"] = f"{type(exc).__name__}: {exc}"
+            finally:
+                app.SetRedraw(True)
+            try:
+                dst_view.Refresh()
+            except Exception:
+                pass
+        entry["Seconds"] = round(time.perf_counter() - dst_start, 6)
+        report["Destinations"].append(entry)
+    report["Seconds"] = round(time.perf_counter() - start, 6)
+    return report
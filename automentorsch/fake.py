@@ -0,0 +1,459 @@
+# In-process stand-in for the Designer COM API, for tests and for sharding
+# without a licence (--backends automentorsch.fake:make_app).
+
+import os
+import time
+
+from .formats import (
+    read_component_records,
+    read_net_records,
+)
+
+SAMPLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_PARTS = os.path.join(SAMPLE_DIR, "parts_v3.0.csv")
+SAMPLE_NETS = os.path.join(SAMPLE_DIR, "net_v3.0.csv")
+FAKE_SYMBOLS = ("RES", "CAP")
+FAKE_STATS = {"calls": 0, "latency": 0.0}
+
+
+def _tick():
+    FAKE_STATS["calls"] += 1
+    if FAKE_STATS["latency"]:
+        time.sleep(FAKE_STATS["latency"])
+
+
+class Point:
+    def __init__(self, x, y):
+        self.X = x
+        self.Y = y
+
+
+class Collection:
+    def __init__(self, items):
+        self.items = list(items)
+
+    def __iter__(self):
+        _tick()
+        return iter(list(self.items))
+
+    @property
+    def Count(self):
+        _tick()
+        return len(self.items)
+
+    def Item(self, index):
+        _tick()
+        if isinstance(index, str):
+            for item in self.items:
+                if item.Name.lower() == index.lower():
+                    return item
+            raise KeyError(index)
+        return self.items[index - 1]
+
+
+class StringList:
+    def __init__(self, items):
+        self.items = list(items)
+
+    def GetCount(self):
+        return len(self.items)
+
+    def GetItem(self, index):
+        return self.items[index - 1]
+
+
+class Attribute:
+    def __init__(self, name, value="", visible=1, x=0, y=0):
+        self.Name = name
+        self.Value = ""
+        self.Visible = visible
+        self.NameVisible = 0
+        self.ValueVisible = 1
+        self.Orientation = 0
+        self.Size = 10
+        self.origin = (x, y)
+        self.EitherValue = value
+
+    def __setattr__(self, key, value):
+        object.__setattr__(self, key, value)
+        if key == "EitherValue":
+            object.__setattr__(self, "InstanceValue", value)
+            object.__setattr__(self, "TextString", f"{self.Name}={value}")
+
+    @property
+    def Origin(self):
+        _tick()
+        return Point(*self.origin)
+
+    def SetLocation(self, x, y):
+        _tick()
+        self.origin = (x, y)
+
+
+class Attributes(Collection):
+    def __init__(self, items, owner):
+        Collection.__init__(self, items)
+        self.owner = owner
+
+    def Add(self, name, value, name_visible, value_visible, flag):
+        _tick()
+        attr = Attribute(name, value, 1, *self.owner.anchor())
+        self.items.append(attr)
+        return attr
+
+
+class SymbolBlock:
+    def __init__(self, library, name):
+        self.LibraryName = library
+        self.name = name
+
+    def GetName(self, kind):
+        _tick()
+        return self.name
+
+
+class SheetObject:
+    Selected = False
+
+    def Delete(self):
+        _tick()
+        self.block.remove(self)
+
+
+class Component(SheetObject):
+    def __init__(self, block, library, symbol, x, y):
+        self.block = block
+        self.SymbolBlock = SymbolBlock(library, symbol)
+        self.x, self.y = x, y
+        self.Orientation = 0
+        self.Scale = 1.0
+        self.refdes = ""
+        self.attrs = Attributes(
+            [
+                Attribute("Ref Designator", "", 3, x + 15, y + 10),
+                Attribute("Value", "", 3, x + 15, y),
+            ],
+            self,
+        )
+
+    def anchor(self):
+        return self.x + 15, self.y
+
+    @property
+    def Refdes(self):
+        _tick()
+        return self.refdes
+
+    @Refdes.setter
+    def Refdes(self, value):
+        _tick()
+        self.refdes = value
+        self.attrs.items[0].EitherValue = value
+
+    @property
+    def Attributes(self):
+        _tick()
+        return self.attrs
+
+    def GetLocation(self):
+        _tick()
+        return Point(self.x, self.y)
+
+    def FindAttribute(self, name):
+        _tick()
+        for attr in self.attrs.items:
+            if attr.Name.lower() == name.lower():
+                return attr
+        return None
+
+    def GetBatchOats(self):
+        _tick()
+        return "".join(
+            f"{attr.Visible} {attr.Name}={attr.EitherValue}\n"
+            for attr in self.attrs.items
+        )
+
+    def AddBatchOats(self, text):
+        _tick()
+        for line in text.split("\r"):
+            if not line:
+                continue
+            visible, _, rest = line.split(" ", 2)
+            name, value = rest.split("=", 1)
+            attr = self.FindAttribute(name)
+            if attr is None:
+                attr = self.attrs.Add(name, value, 0, 1, True)
+            attr.EitherValue = value
+            attr.Visible = int(visible)
+
+
+class Segment:
+    def __init__(self, x1, y1, x2, y2):
+        self.points = (x1, y1, x2, y2)
+
+    def Location(self, end):
+        _tick()
+        if end == 0:
+            return Point(self.points[0], self.points[1])
+        return Point(self.points[2], self.points[3])
+
+
+class Label(SheetObject):
+    def __init__(self, block, segment, name, x, y):
+        self.block = block
+        self.segment = segment
+        self.TextString = name
+        self.ResolvedName = name
+        self.x, self.y = x, y
+        self.Orientation = 0
+        self.Size = 10
+        self.Visible = 1
+
+    def GetLocation(self):
+        _tick()
+        return Point(self.x, self.y)
+
+    def SetLocation(self, x, y):
+        _tick()
+        self.x, self.y = x, y
+
+
+class Net(SheetObject):
+    def __init__(self, block):
+        self.block = block
+        self.segments = []
+        self.labels = {}
+        self.attrs = Attributes([], self)
+
+    def anchor(self):
+        return self.segments[0].points[:2] if self.segments else (0, 0)
+
+    @property
+    def Attributes(self):
+        _tick()
+        return self.attrs
+
+    def GetSegments(self):
+        _tick()
+        return Collection(self.segments)
+
+    def GetLabel(self, segment):
+        _tick()
+        return self.labels.get(id(segment))
+
+    def GetConnectedLabel(self, segment):
+        _tick()
+        return None
+
+    def AddLabel(self, segment, name, x, y):
+        _tick()
+        label = Label(self.block, segment, name, x, y)
+        self.labels[id(segment)] = label
+        return label
+
+
+class Block:
+    def __init__(self, symbols=FAKE_SYMBOLS):
+        self.symbols = symbols
+        self.components = []
+        self.nets = []
+
+    def remove(self, obj):
+        if obj in self.components:
+            self.components.remove(obj)
+        if obj in self.nets:
+            self.nets.remove(obj)
+
+    def AddSymbolInstance(self, library, symbol, x, y):
+        _tick()
+        if symbol not in self.symbols:
+            return None
+        comp = Component(self, library, symbol, x, y)
+        self.components.append(comp)
+        return comp
+
+    def AddNet(self, x1, y1, x2, y2, start, end, kind):
+        _tick()
+        segment = Segment(x1, y1, x2, y2)
+        ends = {(x1, y1), (x2, y2)}
+        for net in self.nets:
+            for other in net.segments:
+                if ends & {other.points[:2], other.points[2:]}:
+                    net.segments.append(segment)
+                    return net
+        net = Net(self)
+        net.segments.append(segment)
+        self.nets.append(net)
+        return net
+
+    def DeSelectAll(self):
+        _tick()
+
+    def DeleteSelected(self):
+        _tick()
+        self.components = [c for c in self.components if not c.Selected]
+        self.nets = [n for n in self.nets if not n.Selected]
+
+
+class View:
+    def __init__(self):
+        self.Block = Block()
+
+    def Query(self, mask, flag):
+        _tick()
+        items = []
+        if mask & 128:
+            items += self.Block.components
+        if mask & 32:
+            items += self.Block.nets
+        if mask & 256:
+            for net in self.Block.nets:
+                items += list(net.labels.values())
+        return Collection(items)
+
+    def Refresh(self):
+        _tick()
+
+
+class Views:
+    def __init__(self, view):
+        self.view = view
+
+    def Item(self, index):
+        return self.view
+
+
+class Document:
+    def __init__(self, view):
+        self.view = view
+        self.Modified = False
+
+    def GetViews(self):
+        _tick()
+        return Views(self.view)
+
+
+class SheetDocuments:
+    def __init__(self):
+        self.schematics = {"Schematic1": {}}
+
+    def GetAvailableSchematics(self):
+        _tick()
+        return StringList(self.schematics)
+
+    def GetAvailableSheets(self, schematic_name):
+        _tick()
+        return StringList(self.schematics.get(schematic_name, {}))
+
+    def Open(self, schematic_name, sheet_name):
+        _tick()
+        doc = self.schematics.get(schematic_name, {}).get(str(sheet_name))
+        if doc is None:
+            raise KeyError(sheet_name)
+        return doc
+
+    def InsertSheet(self, schematic_name, sheet_name):
+        _tick()
+        sheets = self.schematics.setdefault(schematic_name, {})
+        if str(sheet_name) in sheets:
+            return False
+        sheets[str(sheet_name)] = Document(View())
+        return True
+
+    def DeleteSheet(self, schematic_name, sheet_name):
+        _tick()
+        return bool(self.schematics.get(schematic_name, {}).pop(str(sheet_name), None))
+
+
+class Application:
+    def __init__(self):
+        self.sheets = SheetDocuments()
+        self.redraw = True
+
+    def SchematicSheetDocuments(self):
+        _tick()
+        return self.sheets
+
+    def SetRedraw(self, value):
+        self.redraw = value
+
+    def view(self, sheet_name, schematic_name="Schematic1"):
+        return self.sheets.schematics[schematic_name][str(sheet_name)].view
+
+
+def populate(view, component_records, net_records):
+    block = view.Block
+    for rec in component_records:
+        comp = Component(block, rec.partition, rec.symbol, rec.x, rec.y)
+        comp.refdes = rec.refdes
+        comp.Orientation = rec.orientation or 0
+        attrs = []
+        for index, attr in enumerate(rec.attributes):
+            x, y = attr.origin_x, attr.origin_y
+            if x is None or y is None:
+                x, y = rec.x + 15, rec.y + 10 * (len(rec.attributes) - index)
+            item = Attribute(attr.name, attr.resolved_value(), attr.visible or 0, x, y)
+            attrs.append(item)
+        comp.attrs = Attributes(attrs, comp)
+        block.components.append(comp)
+    for rec in net_records:
+        net = Net(block)
+        for seg in rec.segments:
+            net.segments.append(Segment(seg.x1, seg.y1, seg.x2, seg.y2))
+        for lbl in rec.labels:
+            segment = net.segments[0]
+            for candidate in net.segments:
+                if candidate.points == (lbl.seg_x1, lbl.seg_y1, lbl.seg_x2, lbl.seg_y2):
+                    segment = candidate
+            net.labels[id(segment)] = Label(block, segment, lbl.name, lbl.x, lbl.y)
+        block.nets.append(net)
+
+
+def make_app(sheets=2, parts=SAMPLE_PARTS, nets=SAMPLE_NETS):
+    app = Application()
+    component_records = list(read_component_records(parts))
+    net_records = list(read_net_records(nets))
+    for index in range(sheets):
+        app.sheets.InsertSheet("Schematic1", str(index + 1))
+        populate(app.view(index + 1), component_records, net_records)
+    return app
+
+
+def summary(view):
+    block = view.Block
+    components = sorted(
+        (
+            c.refdes,
+            c.SymbolBlock.name,
+            c.x,
+            c.y,
+            tuple(sorted((a.Name, a.EitherValue, a.Visible) for a in c.attrs.items)),
+        )
+        for c in block.components
+    )
+    nets = sorted(
+        (
+            tuple(sorted(s.points for s in n.segments)),
+            tuple(sorted((l.TextString, l.x, l.y) for l in n.labels.values())),
+        )
+        for n in block.nets
+    )
+    return components, nets
+
+
+for _cls in (
+    Point,
+    Collection,
+    StringList,
+    Attribute,
+    SymbolBlock,
+    SheetObject,
+    Segment,
+    Block,
+    View,
+    Views,
+    Document,
+    SheetDocuments,
+    Application,
+):
+    _cls._oleobj_ = property(lambda self: self)
@@ -0,0 +1,622 @@
+# CSV, table, encoded and template file formats.
+
+import collections
+import csv
+import io
+import itertools
+import json
+import mmap
+import os
+import queue
+import threading
+
+from .constants import (
+    ATTRIBUTE_FIELDS,
+    ATTRIBUTE_SETS_SUFFIX,
+    ATTRIBUTE_SETS_VERSION,
+    ENCODED_PARTS_FIELDS,
+    EXPORT_TABLES,
+    LABEL_COLUMNS,
+    NETS_FIELDS,
+    NET_INDEX_SUFFIX,
+    NET_INDEX_VERSION,
+    PARTS_FIELDS,
+)
+from .records import (
+    AttributeRecord,
+    ComponentRecord,
+    LabelRecord,
+    NetRecord,
+    SegmentRecord,
+    attribute_set_records,
+    box_intersects,
+    decode_attribute_set,
+    encode_attribute_set,
+    net_in_region,
+)
+from .transforms import (
+    expand_templates,
+    is_template_export,
+    read_template_export,
+)
+
+
+def _open_csv_writer(path):
+    try:
+        f = open(path, "w", newline="", encoding="utf-8")
+        return f, path
+    except PermissionError:
+        base, ext = os.path.splitext(path)
+        fallback = f"{base}_tmp{ext}"
+        f = open(fallback, "w", newline="", encoding="utf-8")
+        return f, fallback
+
+
+def write_component_records(records, path):
+    f, used_path = _open_csv_writer(path)
+    with f:
+        writer = csv.DictWriter(f, fieldnames=PARTS_FIELDS)
+        writer.writeheader()
+        for rec in records:
+            writer.writerow(rec.to_row())
+    return used_path
+
+
+def attribute_sets_path(path):
+    return path + ATTRIBUTE_SETS_SUFFIX
+
+
+def write_encoded_component_records(records, path):
+    sets = []
+    set_ids = {}
+    f, used_path = _open_csv_writer(path)
+    with f:
+        writer = csv.DictWriter(f, fieldnames=ENCODED_PARTS_FIELDS)
+        writer.writeheader()
+        for rec in records:
+            encoded = encode_attribute_set(rec.attributes, rec.refdes)
+            key = json.dumps(encoded, ensure_ascii=False, sort_keys=True)
+            set_id = set_ids.get(key)
+            if set_id is None:
+                set_id = set_ids[key] = len(sets)
+                sets.append(encoded)
+            row = rec.to_row()
+            del row["Attributes"]
+            row["AttributeSet"] = set_id
+            writer.writerow(row)
+    doc = {"Version": ATTRIBUTE_SETS_VERSION, "Sets": sets}
+    tmp_path = f"{attribute_sets_path(used_path)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, attribute_sets_path(used_path))
+    return used_path
+
+
+def is_encoded_parts(path):
+    if not os.path.isfile(path) or not os.path.exists(attribute_sets_path(path)):
+        return False
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f), [])
+    return "AttributeSet" in header
+
+
+def iter_encoded_component_records(path):
+    with open(attribute_sets_path(path), "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    if doc.get("Version") != ATTRIBUTE_SETS_VERSION:
+        raise ValueError(f"Unsupported attribute set version for {path}")
+    sets = [decode_attribute_set(encoded) for encoded in doc["Sets"]]
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            rec = ComponentRecord.from_row(row)
+            if rec is None:
+                continue
+            try:
+                decoded = sets[int(row.get("AttributeSet", ""))]
+            except Exception:
+                decoded = []
+            rec.attributes = attribute_set_records(decoded, rec.refdes)
+            yield rec
+
+
+class _ByteCounter:
+    __slots__ = ("f", "offset")
+
+    def __init__(self, f):
+        self.f = f
+        self.offset = 0
+
+    def write(self, text):
+        self.offset += len(text) if text.isascii() else len(text.encode("utf-8"))
+        return self.f.write(text)
+
+
+def net_index_path(path):
+    return path + NET_INDEX_SUFFIX
+
+
+def _net_index_entry(rec, offset, length):
+    xs = [x for seg in rec.segments for x in (seg.x1, seg.x2)]
+    ys = [y for seg in rec.segments for y in (seg.y1, seg.y2)]
+    names = sorted({lbl.name for lbl in rec.labels})
+    if not xs:
+        return [offset, length, None, None, None, None, names]
+    return [offset, length, min(xs), min(ys), max(xs), max(ys), names]
+
+
+def write_net_records(records, path, index=True):
+    f, used_path = _open_csv_writer(path)
+    rows = []
+    with f:
+        counter = _ByteCounter(f)
+        writer = csv.DictWriter(counter, fieldnames=NETS_FIELDS)
+        writer.writeheader()
+        for rec in records:
+            start = counter.offset
+            writer.writerow(rec.to_row())
+            if index:
+                rows.append(_net_index_entry(rec, start, counter.offset - start))
+    if index:
+        _write_net_index(used_path, NETS_FIELDS, rows)
+    return used_path
+
+
+def _write_net_index(path, fields, rows):
+    # Size and mtime of net.csv are both recorded; a rewrite that keeps the
+    # byte size still invalidates the offsets.
+    st = os.stat(path)
+    doc = {
+        "Version": NET_INDEX_VERSION,
+        "Size": st.st_size,
+        "MTime": st.st_mtime_ns,
+        "Fields": fields,
+        "Rows": rows,
+    }
+    tmp_path = f"{net_index_path(path)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, net_index_path(path))
+
+
+def build_net_index(path):
+    # Indexes a net.csv written elsewhere (or edited by hand) in one pass,
+    # tracking the byte offset of every record the csv reader consumes.
+    rows = []
+    with open(path, "rb") as f:
+        consumed = [0]
+
+        def lines():
+            for line in f:
+                consumed[0] += len(line)
+                yield line.decode("utf-8")
+
+        reader = csv.reader(lines())
+        fields = next(reader, None)
+        if fields is None:
+            return False
+        start = consumed[0]
+        for values in reader:
+            end = consumed[0]
+            rec = parse_net_row(dict(zip(fields, values)))
+            if rec is not None:
+                rows.append(_net_index_entry(rec, start, end - start))
+            start = end
+    _write_net_index(path, fields, rows)
+    return True
+
+
+class NetIndex:
+    # Rows are [Offset, Length, MinX, MinY, MaxX, MaxY, Names] into net.csv.
+    def __init__(self, path, use_mmap=False):
+        self.path = path
+        with open(net_index_path(path), "r", encoding="utf-8") as f:
+            doc = json.load(f)
+        if doc.get("Version") != NET_INDEX_VERSION:
+            raise ValueError(f"Unsupported net index version for {path}")
+        st = os.stat(path)
+        if doc.get("Size") != st.st_size or doc.get("MTime") != st.st_mtime_ns:
+            raise ValueError(f"Net index for {path} is stale")
+        self.fields = doc["Fields"]
+        self.rows = doc["Rows"]
+        self.use_mmap = use_mmap
+        self.by_name = {}
+        for row_id, row in enumerate(self.rows):
+            for name in row[6]:
+                self.by_name.setdefault(name.lower(), []).append(row_id)
+        self.f = None
+        self.data = None
+
+    @classmethod
+    def open(cls, path, use_mmap=False):
+        try:
+            return cls(path, use_mmap)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def find(self, name):
+        return list(self.by_name.get(str(name).strip().lower(), []))
+
+    def in_region(self, box):
+        return [
+            row_id
+            for row_id, row in enumerate(self.rows)
+            if row[2] is not None and box_intersects(box, *row[2:6])
+        ]
+
+    def _read(self, offset, length):
+        if self.f is None:
+            self.f = open(self.path, "rb")
+            if self.use_mmap:
+                self.data = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data is not None:
+            return self.data[offset : offset + length]
+        self.f.seek(offset)
+        return self.f.read(length)
+
+    def iter_rows(self, row_ids):
+        for row_id in sorted(set(row_ids)):
+            offset, length = self.rows[row_id][:2]
+            text = self._read(offset, length).decode("utf-8")
+            for values in csv.reader(io.StringIO(text, newline="")):
+                yield row_id, dict(zip(self.fields, values))
+
+    def records(self, row_ids):
+        for _, row in self.iter_rows(row_ids):
+            rec = parse_net_row(row)
+            if rec is not None:
+                yield rec
+
+
+def read_indexed_net_records(path, names=None, region=None, use_mmap=False):
+    # Seeks straight to the matching rows when net.csv has a current index;
+    # otherwise falls back to filtering a full scan.
+    index = None
+    if os.path.isfile(path):
+        index = NetIndex.open(path, use_mmap)
+        if index is None:
+            try:
+                if build_net_index(path):
+                    index = NetIndex.open(path, use_mmap)
+            except (OSError, ValueError):
+                index = None
+    if index is None:
+        wanted = {str(name).strip().lower() for name in names or ()}
+        records = []
+        for rec in read_net_records(path):
+            if wanted and not any(lbl.name.lower() in wanted for lbl in rec.labels):
+                continue
+            if region is not None and not net_in_region(rec, region):
+                continue
+            records.append(rec)
+        return records
+    with index:
+        row_ids = None
+        if names:
+            row_ids = set()
+            for name in names:
+                row_ids.update(index.find(name))
+        if region is not None:
+            hits = set(index.in_region(region))
+            row_ids = hits if row_ids is None else row_ids & hits
+        if row_ids is None:
+            row_ids = range(len(index))
+        # The index only holds each net's bounding box, so region hits are
+        # checked again segment by segment.
+        return [
+            rec
+            for rec in index.records(row_ids)
+            if region is None or net_in_region(rec, region)
+        ]
+
+
+def write_tables(component_records, net_records, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    files = {}
+    writers = {}
+    try:
+        for table, (filename, fieldnames) in EXPORT_TABLES.items():
+            f = open(os.path.join(out_dir, filename), "w", newline="", encoding="utf-8")
+            files[table] = f
+            writers[table] = csv.writer(f)
+            writers[table].writerow(fieldnames)
+        for comp_id, rec in enumerate(component_records):
+            row = rec.to_row()
+            writers["components"].writerow(
+                [comp_id] + [row[key] for key in PARTS_FIELDS[:-1]]
+            )
+            for attr in rec.attributes:
+                writers["component_attributes"].writerow(
+                    [comp_id] + _attribute_table_cells(attr)
+                )
+        for net_id, rec in enumerate(net_records):
+            writers["nets"].writerow([net_id, len(rec.segments), len(rec.labels)])
+            for seg in rec.segments:
+                writers["segments"].writerow([net_id] + seg.to_list())
+            for lbl in rec.labels:
+                data = lbl.to_dict()
+                writers["labels"].writerow(
+                    [net_id] + [_table_cell(data[key]) for key in LABEL_COLUMNS]
+                )
+            for attr in rec.attributes:
+                writers["net_attributes"].writerow(
+                    [net_id] + _attribute_table_cells(attr)
+                )
+    finally:
+        for f in files.values():
+            f.close()
+    return out_dir
+
+
+def _table_cell(value):
+    return "" if value is None else value
+
+
+def _attribute_table_cells(attr):
+    return [_table_cell(getattr(attr, slot)) for slot, _ in ATTRIBUTE_FIELDS]
+
+
+def _table_scalar(text):
+    if text == "" or text is None:
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _attribute_from_table_row(row):
+    rec = AttributeRecord(row.get("Name", ""))
+    for slot, key in ATTRIBUTE_FIELDS[1:5]:
+        setattr(rec, slot, row.get(key, ""))
+    for slot, key in ATTRIBUTE_FIELDS[5:]:
+        setattr(rec, slot, _table_scalar(row.get(key, "")))
+    return rec
+
+
+def _iter_table_groups(path, id_field):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        group_id = None
+        group = []
+        for row in csv.DictReader(f):
+            row_id = int(row[id_field])
+            if row_id != group_id and group:
+                yield group_id, group
+                group = []
+            group_id = row_id
+            group.append(row)
+        if group:
+            yield group_id, group
+
+
+class _TableCursor:
+    # Child tables are written in parent id order, so each parent row is
+    # joined by advancing the child stream once; nothing is held in memory
+    # beyond the current group.
+    def __init__(self, path, id_field):
+        self.groups = _iter_table_groups(path, id_field)
+        self.current = next(self.groups, None)
+
+    def take(self, parent_id):
+        while self.current is not None and self.current[0] < parent_id:
+            self.current = next(self.groups, None)
+        if self.current is not None and self.current[0] == parent_id:
+            rows = self.current[1]
+            self.current = next(self.groups, None)
+            return rows
+        return []
+
+
+def _table_path(table_dir, table):
+    return os.path.join(table_dir, EXPORT_TABLES[table][0])
+
+
+def is_table_export(path):
+    return os.path.isdir(path) and os.path.exists(_table_path(path, "components"))
+
+
+def iter_table_component_records(table_dir):
+    attrs = _TableCursor(_table_path(table_dir, "component_attributes"), "ComponentId")
+    with open(
+        _table_path(table_dir, "components"), "r", newline="", encoding="utf-8"
+    ) as f:
+        for row in csv.DictReader(f):
+            rec = ComponentRecord.from_row(row)
+            attr_rows = attrs.take(int(row["ComponentId"]))
+            if rec is None:
+                continue
+            rec.attributes = [_attribute_from_table_row(r) for r in attr_rows]
+            yield rec
+
+
+def iter_table_net_records(table_dir):
+    segments = _TableCursor(_table_path(table_dir, "segments"), "NetId")
+    labels = _TableCursor(_table_path(table_dir, "labels"), "NetId")
+    attrs = _TableCursor(_table_path(table_dir, "net_attributes"), "NetId")
+    with open(_table_path(table_dir, "nets"), "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            net_id = int(row["NetId"])
+            rec = NetRecord()
+            for seg in segments.take(net_id):
+                rec.segments.append(
+                    SegmentRecord(
+                        int(seg["X1"]), int(seg["Y1"]), int(seg["X2"]), int(seg["Y2"])
+                    )
+                )
+            for lbl in labels.take(net_id):
+                data = {key: _table_scalar(lbl[key]) for key in LABEL_COLUMNS}
+                data["Name"] = lbl["Name"]
+                rec.labels.append(LabelRecord.from_dict(data))
+            rec.attributes = [_attribute_from_table_row(r) for r in attrs.take(net_id)]
+            if rec.segments:
+                yield rec
+
+
+def iter_csv_component_records(path):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            rec = parse_component_row(row)
+            if rec is not None:
+                yield rec
+
+
+def iter_csv_net_records(path):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            rec = parse_net_row(row)
+            if rec is not None:
+                yield rec
+
+
+def read_component_records(path):
+    if is_table_export(path):
+        return iter_table_component_records(path)
+    if is_template_export(path):
+        return iter(expand_templates(read_template_export(path))[0])
+    if is_encoded_parts(path):
+        return iter_encoded_component_records(path)
+    return iter_csv_component_records(path)
+
+
+def read_net_records(path):
+    if is_table_export(path):
+        return iter_table_net_records(path)
+    if is_template_export(path):
+        return iter(expand_templates(read_template_export(path))[1])
+    return iter_csv_net_records(path)
+
+
+def export_input_files(path):
+    if os.path.isdir(path):
+        return [
+            os.path.join(path, filename)
+            for filename, _ in EXPORT_TABLES.values()
+            if os.path.exists(os.path.join(path, filename))
+        ]
+    if is_encoded_parts(path):
+        return [path, attribute_sets_path(path)]
+    return [path]
+
+
+def parse_component_row(row):
+    return ComponentRecord.from_row(row)
+
+
+def parse_net_row(row):
+    return NetRecord.from_row(row)
+
+
+def decoded_record(rec):
+    # Reading .attributes runs the lazy JSON decode; the pipelined importers
+    # do it on the parse side so the COM thread only places records.
+    if rec is not None:
+        rec.attributes
+    return rec
+
+
+def parse_component_row_decoded(row):
+    return decoded_record(parse_component_row(row))
+
+
+PIPELINE_DONE = object()
+
+
+class _PipelineError:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def _parse_chunk(parse, rows):
+    return [parse(row) for row in rows]
+
+
+def _parse_stage(rows, parse, out_queue, stop, processes, chunksize):
+    try:
+        if processes:
+            import concurrent.futures
+
+            # At most two chunks per worker are in flight, so the pool never
+            # holds more than a window of the input.
+            rows = iter(rows)
+            pending = collections.deque()
+            with concurrent.futures.ProcessPoolExecutor(processes) as pool:
+                while not stop.is_set():
+                    while len(pending) < 2 * processes:
+                        chunk = list(itertools.islice(rows, chunksize))
+                        if not chunk:
+                            break
+                        pending.append(pool.submit(_parse_chunk, parse, chunk))
+                    if not pending:
+                        break
+                    for op in pending.popleft().result():
+                        out_queue.put(op)
+                for future in pending:
+                    future.cancel()
+        else:
+            for row in rows:
+                if stop.is_set():
+                    break
+                out_queue.put(parse(row))
+    except BaseException as exc:
+        out_queue.put(_PipelineError(exc))
+    finally:
+        out_queue.put(PIPELINE_DONE)
+
+
+def iter_parsed_pipeline(rows, parse, queue_size=256, processes=0, chunksize=64):
+    # Parsing runs on a background thread (optionally fanned out to a process
+    # pool) while the caller, which owns the COM objects, drains the queue.
+    out_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    worker = threading.Thread(
+        target=_parse_stage,
+        args=(rows, parse, out_queue, stop, processes, chunksize),
+        daemon=True,
+    )
+    worker.start()
+    try:
+        while True:
+            op = out_queue.get()
+            if op is PIPELINE_DONE:
+                break
+            if isinstance(op, _PipelineError):
+                raise op.exc
+            yield op
+    finally:
+        stop.set()
+        while worker.is_alive():
+            try:
+                out_queue.get(timeout=0.05)
+            except queue.Empty:
+                pass
+        worker.join()
+
+
+def passthrough(rec):
+    return rec
+
+
+def iter_records(rows, parse, pipelined, processes):
+    if pipelined:
+        return iter_parsed_pipeline(rows, parse, processes=processes)
+    return (parse(row) for row in rows)
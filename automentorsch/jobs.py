@@ -0,0 +1,813 @@
+# Long-lived Designer session and job server.
+
+import hmac
+import ipaddress
+import json
+import os
+import socket
+import socketserver
+import time
+
+from .constants import (
+    SERVER_HOST,
+    SERVER_PORT,
+    TEMPLATE_LINK,
+)
+from .records import (
+    component_in_region,
+    normalize_box,
+)
+from .transforms import (
+    replicate_from_spec,
+    replication_hash,
+)
+from .formats import (
+    export_input_files,
+    read_component_records,
+    read_indexed_net_records,
+    read_net_records,
+)
+from .plan import (
+    compile_plan,
+    load_or_compile_plan,
+    plan_input_hash,
+    summarize_plan,
+)
+from .store import (
+    DesignStore,
+)
+from .com import (
+    COM_FAILURES,
+    clear_caches,
+    get_active_app,
+    stringlist_to_list,
+)
+from .report import (
+    timed,
+)
+from .designer import (
+    AuditWriter,
+    ImportJournal,
+    choose_source_sheet,
+    clear_sheet,
+    direct_copy,
+    execute_plan,
+    export_all_sheets,
+    export_components,
+    export_nets,
+    export_stamp_key,
+    export_tables,
+    export_templates,
+    fan_out_copy,
+    get_sheet_object_count,
+    get_view_from_doc,
+    import_component_records,
+    import_components,
+    import_net_records,
+    import_nets,
+    insert_sheet,
+    load_export_stamp,
+    open_sheet,
+    parse_destination,
+    plan_handle_counts,
+    preflight_symbols,
+    save_export_stamp,
+    symbol_placements,
+)
+
+
+class JobError(Exception):
+    pass
+
+
+class DesignerSession:
+    def __init__(self, app_factory=None):
+        self.app_factory = app_factory
+        self.app = None
+        self.sheets = None
+        self.catalog = None
+        self.symbol_cache = {}
+        self.oats_defaults = {}
+        self.exports = {}
+        self.plans = {}
+
+    def connect(self):
+        if self.sheets is not None:
+            try:
+                self.sheets.GetAvailableSchematics()
+                return self.app
+            except Exception:
+                self.reset()
+        if self.app_factory is not None:
+            app = self.app_factory()
+        else:
+            app = get_active_app()
+        if app is None:
+            raise JobError("Please open Xpedition Designer and a schematic page first.")
+        try:
+            sheets = app.SchematicSheetDocuments()
+        except Exception:
+            sheets = app.SchematicSheetDocuments
+        self.app = app
+        self.sheets = sheets
+        return app
+
+    def reset(self):
+        self.app = None
+        self.sheets = None
+        self.catalog = None
+        self.symbol_cache.clear()
+        self.oats_defaults.clear()
+        self.exports.clear()
+        self.plans.clear()
+        clear_caches()
+
+    def get_catalog(self, refresh=False):
+        self.connect()
+        if self.catalog is None or refresh:
+            catalog = {}
+            for schem in stringlist_to_list(self.sheets.GetAvailableSchematics()):
+                try:
+                    sl = self.sheets.GetAvailableSheets(schem)
+                    catalog[schem] = stringlist_to_list(sl)
+                except Exception:
+                    catalog[schem] = []
+            self.catalog = catalog
+        return self.catalog
+
+    def sheet_counts(self, schematic_name):
+        counts = {}
+        for sheet_name in self.get_catalog().get(schematic_name, []):
+            try:
+                view = self.open_view(schematic_name, sheet_name)
+                counts[sheet_name] = get_sheet_object_count(view)
+            except Exception:
+                counts[sheet_name] = None
+        return counts
+
+    def resolve_schematic(self, name=None):
+        schems = list(self.get_catalog())
+        if not schems:
+            raise JobError("Cannot find any schematic.")
+        if name:
+            for schem in schems:
+                if schem.lower() == str(name).lower():
+                    return schem
+            raise JobError(f"Cannot find schematic {name}.")
+        for schem in schems:
+            if schem.lower() == "schematic1":
+                return schem
+        return schems[0]
+
+    def open_doc_view(self, schematic_name, sheet_name, create=False):
+        self.connect()
+        if create and sheet_name not in self.get_catalog().get(schematic_name, []):
+            insert_sheet(self.sheets, schematic_name, sheet_name)
+            self.catalog = None
+        doc = open_sheet(self.sheets, schematic_name, sheet_name)
+        if doc is None:
+            raise JobError(f"Cannot open sheet {schematic_name}:{sheet_name}.")
+        view = get_view_from_doc(doc)
+        if view is None:
+            raise JobError(f"Cannot resolve view for {schematic_name}:{sheet_name}.")
+        return doc, view
+
+    def open_view(self, schematic_name, sheet_name, create=False):
+        return self.open_doc_view(schematic_name, sheet_name, create)[1]
+
+    def load_records(self, path, kind):
+        stamp = []
+        for file_path in export_input_files(path):
+            st = os.stat(file_path)
+            stamp.append((file_path, st.st_mtime_ns, st.st_size))
+        key = (kind, path)
+        cached = self.exports.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        if kind == "parts":
+            records = list(read_component_records(path))
+        else:
+            records = list(read_net_records(path))
+        self.exports[key] = (stamp, records)
+        return records
+
+    def remember_export(self, path, kind):
+        self.exports.pop((kind, path), None)
+        try:
+            self.load_records(path, kind)
+        except Exception:
+            pass
+
+
+def _job_path(job, key, base_dir, default=None):
+    # Relative paths in a job are taken from base_dir, not from the directory
+    # the server process happened to start in.
+    path = job.get(key) or default
+    return os.path.abspath(os.path.join(base_dir, path)) if path else None
+
+
+def _job_paths(job, base_dir):
+    return (
+        _job_path(job, "parts", base_dir, "parts.csv"),
+        _job_path(job, "nets", base_dir, "net.csv"),
+    )
+
+
+def _job_export(session, job, timings, base_dir):
+    schematic_name = session.resolve_schematic(job.get("schematic"))
+    sheet_name = job.get("sheet") or choose_source_sheet(session.sheets, schematic_name)
+    if not sheet_name:
+        raise JobError("Cannot find source sheet.")
+    doc, view = timed(
+        timings, "open_source", session.open_doc_view, schematic_name, sheet_name
+    )
+    region = normalize_box(*job["region"]) if job.get("region") else None
+    parts_csv, nets_csv = _job_paths(job, base_dir)
+    if job.get("tables"):
+        parts_csv = nets_csv = _job_path(job, "tables", base_dir)
+    elif job.get("templates"):
+        parts_csv = nets_csv = _job_path(job, "templates", base_dir)
+    reused = None
+    if job.get("reuse", True):
+        stamp_key = timed(
+            timings,
+            "fingerprint",
+            export_stamp_key,
+            doc,
+            view,
+            schematic_name,
+            sheet_name,
+            tables=bool(job.get("tables")),
+            templates=bool(job.get("templates")),
+            encoded=bool(job.get("encode_attributes")),
+            region=list(region) if region else None,
+        )
+        reused = load_export_stamp(parts_csv, stamp_key)
+    if reused is not None:
+        parts_used, nets_used = reused
+    elif job.get("tables"):
+        timed(timings, "export_tables", export_tables, view, parts_csv, region)
+        parts_used = nets_used = parts_csv
+    elif job.get("templates"):
+        timed(
+            timings,
+            "export_templates",
+            export_templates,
+            view,
+            parts_csv,
+            TEMPLATE_LINK,
+            region,
+        )
+        parts_used = nets_used = parts_csv
+    else:
+        parts_used = timed(
+            timings,
+            "export_components",
+            export_components,
+            view,
+            parts_csv,
+            region,
+            bool(job.get("encode_attributes")),
+        )
+        nets_used = timed(timings, "export_nets", export_nets, view, nets_csv, region)
+    if reused is None and job.get("reuse", True):
+        save_export_stamp(parts_csv, stamp_key, parts_used, nets_used)
+    session.remember_export(parts_used, "parts")
+    session.remember_export(nets_used, "nets")
+    if job.get("db"):
+        with DesignStore(_job_path(job, "db", base_dir)) as store:
+            timed(
+                timings,
+                "write_db",
+                store.write_sheet,
+                schematic_name,
+                str(sheet_name),
+                session.load_records(parts_used, "parts"),
+                session.load_records(nets_used, "nets"),
+            )
+    return {
+        "schematic": schematic_name,
+        "sheet": sheet_name,
+        "parts": parts_used,
+        "nets": nets_used,
+        "reused": reused is not None,
+    }
+
+
+def _job_input_hash(job, parts_csv, nets_csv):
+    if job.get("from_db"):
+        input_hash = plan_input_hash(job["from_db"])
+    else:
+        input_hash = plan_input_hash(parts_csv, nets_csv)
+    if job.get("region") or job.get("from_db") or job.get("net_names"):
+        input_hash = replication_hash(
+            input_hash,
+            {
+                "region": job.get("region"),
+                "db_sheet": job.get("db_sheet"),
+                "net_names": job.get("net_names"),
+            },
+        )
+    if job.get("transform"):
+        input_hash = replication_hash(input_hash, job["transform"])
+    return input_hash
+
+
+def _job_records(session, job, timings, parts_csv, nets_csv):
+    region = job.get("region")
+    if job.get("from_db"):
+        if not region:
+            raise JobError("from_db needs a region.")
+        schematic, sheet = None, None
+        if job.get("db_sheet"):
+            schematic, sheet = parse_destination(job["db_sheet"], None)
+        with DesignStore(job["from_db"]) as store:
+            comp_records, net_records = timed(
+                timings, "load_region", store.load_region, *region, schematic, sheet
+            )
+    else:
+        box = normalize_box(*region) if region else None
+        comp_records = timed(
+            timings, "load_parts", session.load_records, parts_csv, "parts"
+        )
+        if box is not None:
+            comp_records = [r for r in comp_records if component_in_region(r, box)]
+        if box is not None or job.get("net_names"):
+            net_records = timed(
+                timings,
+                "load_nets",
+                read_indexed_net_records,
+                nets_csv,
+                job.get("net_names"),
+                box,
+                bool(job.get("mmap")),
+            )
+        else:
+            net_records = timed(
+                timings, "load_nets", session.load_records, nets_csv, "nets"
+            )
+    if job.get("transform"):
+        comp_records, net_records = timed(
+            timings,
+            "replicate",
+            replicate_from_spec,
+            comp_records,
+            net_records,
+            job["transform"],
+        )
+    return comp_records, net_records
+
+
+def _job_import(session, job, timings, base_dir):
+    schematic_name = session.resolve_schematic(job.get("schematic"))
+    sheet_name = job.get("sheet")
+    if not sheet_name:
+        raise JobError("Import job needs a destination sheet.")
+    view = timed(
+        timings,
+        "open_destination",
+        session.open_view,
+        schematic_name,
+        sheet_name,
+        create=True,
+    )
+    block = view.Block
+    if block is None:
+        raise JobError("Cannot access destination block.")
+    parts_csv, nets_csv = _job_paths(job, base_dir)
+    derived = any(
+        job.get(key) for key in ("transform", "region", "from_db", "net_names")
+    )
+    resume = bool(job.get("resume"))
+    if job.get("plan") and (job.get("journal") or resume):
+        raise JobError("plan replay does not support journal or resume.")
+    journal = None
+    if job.get("journal") or resume:
+        journal = ImportJournal(
+            _job_path(job, "journal", base_dir, "import_journal.jsonl"),
+            _job_input_hash(job, parts_csv, nets_csv),
+            f"{schematic_name}:{sheet_name}",
+            resume=resume,
+        )
+    session.app.SetRedraw(False)
+    try:
+        if resume:
+            timed(timings, "load_destination", journal.load_destination, view)
+        elif job.get("clear", True):
+            timed(timings, "clear_sheet", clear_sheet, view)
+        if derived:
+            comp_records, net_records = _job_records(
+                session, job, timings, parts_csv, nets_csv
+            )
+        batch_oats = session.oats_defaults if job.get("batch_oats") else None
+        missing = []
+        # A pipelined import probes symbols as the rows stream past instead of
+        # reading the parts file a second time up front.
+        stream_preflight = job.get("pipelined") and not derived and not job.get("plan")
+        if job.get("preflight", True) and not stream_preflight:
+            if not derived:
+                comp_records = timed(
+                    timings, "load_parts", session.load_records, parts_csv, "parts"
+                )
+            preflight = timed(
+                timings,
+                "preflight",
+                preflight_symbols,
+                block,
+                symbol_placements(comp_records),
+                session.symbol_cache,
+            )
+            missing = preflight["Missing"]
+        if job.get("plan"):
+            if derived:
+                plan = timed(
+                    timings, "compile_plan", compile_plan, comp_records, net_records
+                )
+            else:
+                plan = timed(
+                    timings,
+                    "compile_plan",
+                    load_or_compile_plan,
+                    parts_csv,
+                    nets_csv,
+                    _job_path(job, "plan_cache", base_dir),
+                    session.plans,
+                )
+            handles = timed(
+                timings,
+                "execute_plan",
+                execute_plan,
+                plan,
+                block,
+                session.symbol_cache,
+            )
+            counts = plan_handle_counts(plan, handles)
+            placed, nets_added = counts["components"], counts["nets"]
+        else:
+            if job.get("pipelined") and not derived:
+                processes = int(job.get("processes") or 0)
+                placed = timed(
+                    timings,
+                    "import_components",
+                    import_components,
+                    parts_csv,
+                    block,
+                    session.symbol_cache,
+                    True,
+                    processes,
+                    journal,
+                    batch_oats,
+                    missing if job.get("preflight", True) else None,
+                )
+                nets_added = timed(
+                    timings,
+                    "import_nets",
+                    import_nets,
+                    nets_csv,
+                    block,
+                    True,
+                    processes,
+                    journal,
+                )
+            else:
+                if not derived:
+                    comp_records = timed(
+                        timings, "load_parts", session.load_records, parts_csv, "parts"
+                    )
+                    net_records = timed(
+                        timings, "load_nets", session.load_records, nets_csv, "nets"
+                    )
+                placed = timed(
+                    timings,
+                    "import_components",
+                    import_component_records,
+                    comp_records,
+                    block,
+                    session.symbol_cache,
+                    journal,
+                    batch_oats,
+                )
+                nets_added = timed(
+                    timings,
+                    "import_nets",
+                    import_net_records,
+                    net_records,
+                    block,
+                    journal,
+                )
+        if journal is not None:
+            journal.close(complete=True)
+    finally:
+        if journal is not None:
+            journal.close()
+        session.app.SetRedraw(True)
+    try:
+        view.Refresh()
+    except Exception:
+        pass
+    return {
+        "schematic": schematic_name,
+        "sheet": sheet_name,
+        "components": placed,
+        "nets": nets_added,
+        "skipped": journal.skipped if journal is not None else 0,
+        "missing_symbols": missing,
+    }
+
+
+DIRECT_UNSUPPORTED = ("plan", "journal", "resume", "transform")
+
+
+def _job_direct_copy(session, job, timings, base_dir):
+    unsupported = [key for key in DIRECT_UNSUPPORTED if job.get(key)]
+    if unsupported:
+        raise JobError(f"direct copy does not support {', '.join(unsupported)}.")
+    schematic_name = session.resolve_schematic(job.get("schematic"))
+    src_sheet = job.get("src_sheet") or choose_source_sheet(
+        session.sheets, schematic_name
+    )
+    if not src_sheet:
+        raise JobError("Cannot find source sheet.")
+    dst_sheet = job.get("dst_sheet") or "Schematic2"
+    src_view = timed(
+        timings, "open_source", session.open_view, schematic_name, src_sheet
+    )
+    dst_view = timed(
+        timings,
+        "open_destination",
+        session.open_view,
+        schematic_name,
+        dst_sheet,
+        create=True,
+    )
+    if dst_view.Block is None:
+        raise JobError("Cannot access destination block.")
+    region = normalize_box(*job["region"]) if job.get("region") else None
+    audit = None
+    if job.get("audit"):
+        audit = AuditWriter(*_job_paths(job, base_dir))
+    session.app.SetRedraw(False)
+    try:
+        if job.get("clear", True):
+            timed(timings, "clear_sheet", clear_sheet, dst_view)
+        placed, nets_added, missing = timed(
+            timings,
+            "direct_copy",
+            direct_copy,
+            src_view,
+            dst_view.Block,
+            session.symbol_cache,
+            region,
+            audit,
+            session.oats_defaults if job.get("batch_oats") else None,
+            job.get("preflight", True),
+        )
+    finally:
+        session.app.SetRedraw(True)
+        if audit is not None:
+            parts_used, nets_used = timed(timings, "audit_wait", audit.close)
+    try:
+        dst_view.Refresh()
+    except Exception:
+        pass
+    result = {
+        "schematic": schematic_name,
+        "sheet": dst_sheet,
+        "components": placed,
+        "nets": nets_added,
+        "src_sheet": src_sheet,
+        "missing_symbols": missing,
+    }
+    if audit is not None:
+        if audit.errors:
+            result["audit_error"] = (
+                f"{type(audit.errors[0]).__name__}: {audit.errors[0]}"
+            )
+        else:
+            session.remember_export(parts_used, "parts")
+            session.remember_export(nets_used, "nets")
+            result["audit_parts"] = parts_used
+            result["audit_nets"] = nets_used
+    return result
+
+
+def _job_copy(session, job, timings, base_dir):
+    if job.get("direct"):
+        return _job_direct_copy(session, job, timings, base_dir)
+    exported = _job_export(
+        session,
+        {
+            "schematic": job.get("schematic"),
+            "sheet": job.get("src_sheet"),
+            "parts": job.get("parts"),
+            "nets": job.get("nets"),
+            "tables": job.get("tables"),
+            "templates": job.get("templates"),
+            "region": job.get("region"),
+            "encode_attributes": job.get("encode_attributes"),
+            "reuse": job.get("reuse", True),
+            "db": job.get("db"),
+        },
+        timings,
+        base_dir,
+    )
+    imported = _job_import(
+        session,
+        {
+            "schematic": exported["schematic"],
+            "sheet": job.get("dst_sheet") or "Schematic2",
+            "parts": exported["parts"],
+            "nets": exported["nets"],
+            "clear": job.get("clear", True),
+            "pipelined": job.get("pipelined", False),
+            "processes": job.get("processes", 0),
+            "plan": job.get("plan", False),
+            "plan_cache": job.get("plan_cache"),
+            "journal": job.get("journal"),
+            "resume": job.get("resume", False),
+            "transform": job.get("transform"),
+            "preflight": job.get("preflight", True),
+            "batch_oats": job.get("batch_oats", False),
+        },
+        timings,
+        base_dir,
+    )
+    imported["src_sheet"] = exported["sheet"]
+    return imported
+
+
+def _job_plan(session, job, timings, base_dir):
+    parts_csv, nets_csv = _job_paths(job, base_dir)
+    plan = timed(
+        timings,
+        "compile_plan",
+        load_or_compile_plan,
+        parts_csv,
+        nets_csv,
+        _job_path(job, "plan_cache", base_dir),
+        session.plans,
+    )
+    return summarize_plan(plan)
+
+
+def _job_export_all(session, job, timings, base_dir):
+    archive = _job_path(job, "archive", base_dir, "design.zip")
+    schematics = job.get("schematics")
+    index = timed(
+        timings,
+        "export_all",
+        export_all_sheets,
+        session.sheets,
+        archive,
+        schematics,
+        job.get("reuse", True),
+    )
+    session.catalog = None
+    return {"archive": archive, "index": index}
+
+
+def _job_fanout(session, job, timings, base_dir):
+    destinations = job.get("destinations") or []
+    if isinstance(destinations, str):
+        destinations = [d for d in destinations.split(",") if d.strip()]
+    if not destinations:
+        raise JobError("fanout needs at least one destination.")
+    schematic_name = session.resolve_schematic(job.get("schematic"))
+    src_sheet = job.get("src_sheet") or choose_source_sheet(
+        session.sheets, schematic_name
+    )
+    if not src_sheet:
+        raise JobError("Cannot find source sheet.")
+    src_view = timed(
+        timings, "open_source", session.open_view, schematic_name, src_sheet
+    )
+    report = timed(
+        timings,
+        "fanout",
+        fan_out_copy,
+        session.app,
+        session.sheets,
+        src_view,
+        destinations,
+        schematic_name,
+        session.symbol_cache,
+        job.get("clear", True),
+    )
+    session.catalog = None
+    return report
+
+
+def _job_catalog(session, job, timings, base_dir):
+    return timed(timings, "catalog", session.get_catalog, bool(job.get("refresh")))
+
+
+def _job_counts(session, job, timings, base_dir):
+    schematic_name = session.resolve_schematic(job.get("schematic"))
+    counts = timed(timings, "counts", session.sheet_counts, schematic_name)
+    return {"schematic": schematic_name, "counts": counts}
+
+
+def _job_reset(session, job, timings, base_dir):
+    session.reset()
+    return {}
+
+
+SERVER_JOBS = {
+    "export": _job_export,
+    "import": _job_import,
+    "copy": _job_copy,
+    "plan": _job_plan,
+    "export_all": _job_export_all,
+    "fanout": _job_fanout,
+    "catalog": _job_catalog,
+    "counts": _job_counts,
+    "reset": _job_reset,
+}
+
+
+def run_job(session, job, base_dir):
+    timings = {}
+    start = time.perf_counter()
+    failures = COM_FAILURES["n"]
+    probes = COM_FAILURES["probes"]
+    kind = str(job.get("job", "")).lower()
+    handler = SERVER_JOBS.get(kind)
+    try:
+        if handler is None:
+            raise JobError(f"Unknown job: {kind or '(empty)'}")
+        if kind != "plan":
+            timed(timings, "connect", session.connect)
+        result = handler(session, job, timings, base_dir)
+        response = {"ok": True, "job": kind, "result": result}
+    except JobError as exc:
+        response = {"ok": False, "job": kind, "error": str(exc)}
+    except Exception as exc:
+        response = {"ok": False, "job": kind, "error": f"{type(exc).__name__}: {exc}"}
+    timings["total"] = round(time.perf_counter() - start, 6)
+    response["timings"] = timings
+    response["failures"] = COM_FAILURES["n"] - failures
+    response["probes"] = COM_FAILURES["probes"] - probes
+    return response
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except Exception as exc:
+                response = {"ok": False, "error": f"Bad request: {exc}"}
+            else:
+                token = self.server.token
+                if token is not None and not hmac.compare_digest(
+                    str(job.pop("token", "")), token
+                ):
+                    response = {"ok": False, "error": "Bad or missing token."}
+                elif str(job.get("job", "")).lower() == "shutdown":
+                    self.server.stop_requested = True
+                    response = {"ok": True, "job": "shutdown"}
+                else:
+                    response = run_job(self.server.session, job, self.server.base_dir)
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+            self.wfile.flush()
+            if self.server.stop_requested:
+                return
+
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except Exception:
+        return False
+
+
+def serve(host=SERVER_HOST, port=SERVER_PORT, base_dir=None, token=None):
+    # Jobs write files wherever they are told to, so anything reachable from
+    # other machines has to present the shared token.
+    if token is None and not is_loopback(host):
+        raise JobError(f"Refusing to serve on {host} without a token.")
+    # Jobs are handled one at a time on this thread so every COM call stays
+    # in the apartment that created the application connection.
+    server = socketserver.TCPServer((host, port), _JobHandler)
+    server.session = DesignerSession()
+    server.base_dir = base_dir or os.getcwd()
+    server.token = token
+    server.stop_requested = False
+    print(f"Serving automation jobs on {host}:{server.server_address[1]}")
+    with server:
+        while not server.stop_requested:
+            server.handle_request()
+
+
+def send_job(job, host=SERVER_HOST, port=SERVER_PORT, timeout=None, token=None):
+    if token is not None:
+        job = dict(job, token=token)
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(job) + "\n").encode("utf-8"))
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("r", encoding="utf-8") as f:
+            line = f.readline()
+    return json.loads(line) if line else None
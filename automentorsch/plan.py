@@ -0,0 +1,148 @@
+# Compiled import plans.
+
+import hashlib
+import json
+import os
+
+from .constants import (
+    PLAN_CALL_MS,
+    PLAN_OP_CALLS,
+    PLAN_VERSION,
+)
+from .formats import (
+    export_input_files,
+    read_component_records,
+    read_net_records,
+)
+
+
+def compile_component_ops(rec, handle, ops):
+    ops.append(["AddSymbolInstance", handle, rec.partition, rec.symbol, rec.x, rec.y])
+    if rec.refdes:
+        ops.append(["SetRefdes", handle, rec.refdes])
+    if rec.orientation is not None:
+        ops.append(["SetOrientation", handle, rec.orientation])
+    if rec.scale is not None:
+        ops.append(["SetScale", handle, rec.scale])
+    if rec.attributes:
+        ops.append(["ApplyAttrs", handle, [attr.to_dict() for attr in rec.attributes]])
+        value = rec.value()
+        if value:
+            ops.append(["SetValue", handle, value])
+
+
+def compile_net_ops(rec, handle, ops):
+    for seg in rec.segments:
+        ops.append(["AddNet", handle, seg.x1, seg.y1, seg.x2, seg.y2])
+    if rec.attributes:
+        ops.append(["ApplyAttrs", handle, [attr.to_dict() for attr in rec.attributes]])
+    for lbl in rec.labels:
+        ops.append(
+            [
+                "AddLabel",
+                handle,
+                lbl.name,
+                lbl.x,
+                lbl.y,
+                list(lbl.key),
+                lbl.orientation,
+                lbl.size,
+            ]
+        )
+
+
+def compile_plan(component_records, net_records, input_hash=""):
+    ops = []
+    handle = 0
+    for rec in component_records:
+        compile_component_ops(rec, handle, ops)
+        handle += 1
+    for rec in net_records:
+        compile_net_ops(rec, handle, ops)
+        handle += 1
+    return {
+        "Version": PLAN_VERSION,
+        "InputHash": input_hash,
+        "Handles": handle,
+        "Ops": ops,
+    }
+
+
+def plan_input_hash(*paths):
+    digest = hashlib.sha256(f"plan-v{PLAN_VERSION}".encode("ascii"))
+    for path in paths:
+        for file_path in export_input_files(path):
+            digest.update(b"\0" + os.path.basename(file_path).encode("utf-8"))
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_plan(plan, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_plan(path):
+    with open(path, "r", encoding="utf-8") as f:
+        plan = json.load(f)
+    if plan.get("Version") != PLAN_VERSION:
+        return None
+    return plan
+
+
+def load_or_compile_plan(parts_csv, nets_csv, cache_dir=None, memo=None):
+    input_hash = plan_input_hash(parts_csv, nets_csv)
+    if memo is not None and input_hash in memo:
+        return memo[input_hash]
+    plan = None
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"plan_{input_hash[:32]}.json")
+        if os.path.exists(cache_path):
+            try:
+                plan = load_plan(cache_path)
+            except Exception:
+                plan = None
+            if plan is not None and plan.get("InputHash") != input_hash:
+                plan = None
+    if plan is None:
+        plan = compile_plan(
+            read_component_records(parts_csv), read_net_records(nets_csv), input_hash
+        )
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            try:
+                save_plan(plan, cache_path)
+            except OSError:
+                pass
+    if memo is not None:
+        memo[input_hash] = plan
+    return plan
+
+
+def _op_call_estimate(op):
+    kind = op[0]
+    if kind == "ApplyAttrs":
+        return 1 + PLAN_OP_CALLS["ApplyAttrs"] * len(op[2])
+    return PLAN_OP_CALLS.get(kind, 1)
+
+
+def summarize_plan(plan, call_ms=PLAN_CALL_MS):
+    counts = {}
+    calls = 0
+    for op in plan["Ops"]:
+        counts[op[0]] = counts.get(op[0], 0) + 1
+        calls += _op_call_estimate(op)
+    return {
+        "InputHash": plan.get("InputHash", ""),
+        "Handles": plan.get("Handles", 0),
+        "Ops": len(plan["Ops"]),
+        "Counts": counts,
+        "EstimatedCalls": calls,
+        "EstimatedSeconds": round(calls * call_ms / 1000.0, 3),
+    }
@@ -0,0 +1,535 @@
+# Record types and pure geometry/attribute helpers.
+
+import json
+
+from .constants import (
+    ATTRIBUTE_FIELDS,
+    ATTRIBUTE_MEMO_SIZE,
+    ATTRIBUTE_SLOTS,
+    REFDES_ATTRIBUTE_KEYS,
+    REFDES_MARK,
+    VDJ_HIGH,
+    VDJ_LOW,
+)
+
+# Decoded attribute payloads, keyed on the refdes-masked JSON text.
+ATTRIBUTE_MEMO = {}
+
+
+class AttributeRecord:
+    __slots__ = tuple(slot for slot, _ in ATTRIBUTE_FIELDS)
+
+    def __init__(self, name="", **values):
+        self.name = name
+        for slot, _ in ATTRIBUTE_FIELDS[1:]:
+            setattr(self, slot, values.get(slot))
+
+    @classmethod
+    def from_dict(cls, data):
+        rec = cls(str(data.get("Name", "")))
+        for slot, key in ATTRIBUTE_FIELDS[1:]:
+            setattr(rec, slot, data.get(key))
+        return rec
+
+    def to_dict(self):
+        data = {"Name": self.name}
+        for slot, key in ATTRIBUTE_FIELDS[1:]:
+            val = getattr(self, slot)
+            if val is not None:
+                data[key] = val
+        return data
+
+    def resolved_value(self):
+        for val in (self.either_value, self.instance_value, self.value):
+            if val is not None and str(val).strip():
+                return str(val)
+        text = str(self.text_string or "").strip()
+        if "=" in text:
+            return text.split("=", 1)[1].strip()
+        return ""
+
+
+class ComponentRecord:
+    __slots__ = (
+        "refdes",
+        "partition",
+        "symbol",
+        "x",
+        "y",
+        "orientation",
+        "scale",
+        "_attributes",
+        "_attributes_text",
+        "_attributes_refdes",
+    )
+
+    def __init__(
+        self,
+        refdes="",
+        partition="",
+        symbol="",
+        x=0,
+        y=0,
+        orientation=None,
+        scale=None,
+        attributes=None,
+    ):
+        self.refdes = refdes
+        self.partition = partition
+        self.symbol = symbol
+        self.x = x
+        self.y = y
+        self.orientation = orientation
+        self.scale = scale
+        self.attributes = attributes if attributes is not None else []
+
+    # Attributes stay as the raw CSV text until something reads them, and
+    # payloads that differ only by refdes share one decoded tuple (see
+    # decode_attributes).
+    @property
+    def attributes(self):
+        if self._attributes is None:
+            self._attributes = list(
+                decode_attributes(self._attributes_text, self._attributes_refdes)[0]
+            )
+            self._attributes_text = None
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, value):
+        self._attributes = value
+        self._attributes_text = None
+
+    @classmethod
+    def from_row(cls, row):
+        part = row.get("Partition", "")
+        sym = row.get("Symbol", "")
+        if not part or not sym:
+            return None
+        try:
+            x = int(float(row.get("X", "0")))
+            y = int(float(row.get("Y", "0")))
+        except Exception:
+            x, y = 0, 0
+        rec = cls(row.get("Refdes", "") or "", part, sym, x, y)
+        try:
+            ori = row.get("Orientation", "")
+            if ori != "":
+                rec.orientation = int(float(ori))
+        except Exception:
+            pass
+        try:
+            scale = row.get("Scale", "")
+            if scale != "":
+                rec.scale = float(scale)
+        except Exception:
+            pass
+        attrs_text = row.get("Attributes", "")
+        if attrs_text:
+            rec._attributes = None
+            rec._attributes_text = attrs_text
+            rec._attributes_refdes = rec.refdes
+        return rec
+
+    def to_row(self):
+        if self._attributes is None:
+            attrs_text = self._attributes_text
+        else:
+            attrs_text = json.dumps(
+                [attr.to_dict() for attr in self._attributes], ensure_ascii=False
+            )
+        return {
+            "Refdes": self.refdes,
+            "Partition": self.partition,
+            "Symbol": self.symbol,
+            "X": self.x,
+            "Y": self.y,
+            "Orientation": "" if self.orientation is None else self.orientation,
+            "Scale": "" if self.scale is None else self.scale,
+            "Attributes": attrs_text,
+        }
+
+    def value(self):
+        if self._attributes is None:
+            return decode_attributes(self._attributes_text, self._attributes_refdes)[1]
+        for attr in self._attributes:
+            if str(attr.name).lower() == "value":
+                return attr.resolved_value()
+        return ""
+
+
+class SegmentRecord:
+    __slots__ = ("x1", "y1", "x2", "y2")
+
+    def __init__(self, x1, y1, x2, y2):
+        self.x1 = x1
+        self.y1 = y1
+        self.x2 = x2
+        self.y2 = y2
+
+    def key(self):
+        return segment_key(self.x1, self.y1, self.x2, self.y2)
+
+    def to_list(self):
+        return [self.x1, self.y1, self.x2, self.y2]
+
+
+class LabelRecord:
+    __slots__ = (
+        "name",
+        "x",
+        "y",
+        "seg_x1",
+        "seg_y1",
+        "seg_x2",
+        "seg_y2",
+        "orientation",
+        "size",
+        "key",
+    )
+
+    def __init__(
+        self,
+        name,
+        x,
+        y,
+        seg_x1,
+        seg_y1,
+        seg_x2,
+        seg_y2,
+        orientation=None,
+        size=None,
+    ):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.seg_x1 = seg_x1
+        self.seg_y1 = seg_y1
+        self.seg_x2 = seg_x2
+        self.seg_y2 = seg_y2
+        self.orientation = orientation
+        self.size = size
+        self.key = segment_key(seg_x1, seg_y1, seg_x2, seg_y2)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            str(data.get("Name", "")).strip(),
+            int(data.get("X", 0)),
+            int(data.get("Y", 0)),
+            int(data.get("SegX1", 0)),
+            int(data.get("SegY1", 0)),
+            int(data.get("SegX2", 0)),
+            int(data.get("SegY2", 0)),
+            data.get("Orientation"),
+            data.get("Size"),
+        )
+
+    def to_dict(self):
+        return {
+            "Name": self.name,
+            "X": self.x,
+            "Y": self.y,
+            "SegX1": self.seg_x1,
+            "SegY1": self.seg_y1,
+            "SegX2": self.seg_x2,
+            "SegY2": self.seg_y2,
+            "Orientation": self.orientation,
+            "Size": self.size,
+        }
+
+
+class NetRecord:
+    __slots__ = ("segments", "labels", "attributes")
+
+    def __init__(self, segments=None, labels=None, attributes=None):
+        self.segments = segments if segments is not None else []
+        self.labels = labels if labels is not None else []
+        self.attributes = attributes if attributes is not None else []
+
+    @classmethod
+    def from_row(cls, row):
+        try:
+            seg_list = json.loads(row.get("Segments", "[]"))
+        except Exception:
+            seg_list = []
+        rec = cls()
+        for seg in seg_list:
+            try:
+                x1, y1, x2, y2 = seg
+                rec.segments.append(SegmentRecord(int(x1), int(y1), int(x2), int(y2)))
+            except Exception:
+                continue
+        if not rec.segments:
+            return None
+        attrs_text = row.get("Attributes", "")
+        if attrs_text:
+            try:
+                rec.attributes = [
+                    AttributeRecord.from_dict(data) for data in json.loads(attrs_text)
+                ]
+            except Exception:
+                rec.attributes = []
+        labels_text = row.get("Labels", "")
+        if labels_text:
+            try:
+                labels_data = json.loads(labels_text)
+            except Exception:
+                labels_data = []
+            for data in labels_data:
+                try:
+                    lbl = LabelRecord.from_dict(data)
+                except Exception:
+                    continue
+                if lbl.name:
+                    rec.labels.append(lbl)
+        return rec
+
+    def to_row(self):
+        return {
+            "Segments": json.dumps(
+                [seg.to_list() for seg in self.segments], ensure_ascii=False
+            ),
+            "Labels": json.dumps(
+                [lbl.to_dict() for lbl in self.labels], ensure_ascii=False
+            ),
+            "Attributes": json.dumps(
+                [attr.to_dict() for attr in self.attributes], ensure_ascii=False
+            ),
+        }
+
+
+def _mask_refdes(text, refdes):
+    # Values that are, or end in, the row's refdes are masked so rows that
+    # differ only by refdes share one memo entry. The mark never occurs in
+    # real data, so unmasking restores the text exactly.
+    if not refdes or REFDES_MARK in text or "\\u0000" in text:
+        return text
+    quoted = json.dumps(refdes, ensure_ascii=False)[1:-1]
+    return text.replace(f'"{quoted}"', '"\\u0000"').replace(f'={quoted}"', '=\\u0000"')
+
+
+def _is_masked(attr):
+    return any(
+        isinstance(getattr(attr, slot), str) and REFDES_MARK in getattr(attr, slot)
+        for slot in AttributeRecord.__slots__
+    )
+
+
+def _unmask_attribute(attr, refdes):
+    attr = AttributeRecord.from_dict(attr.to_dict())
+    for slot in AttributeRecord.__slots__:
+        val = getattr(attr, slot)
+        if isinstance(val, str) and REFDES_MARK in val:
+            setattr(attr, slot, val.replace(REFDES_MARK, refdes))
+    return attr
+
+
+def decode_attributes(text, refdes=""):
+    key = _mask_refdes(text, refdes)
+    entry = ATTRIBUTE_MEMO.get(key)
+    if entry is None:
+        try:
+            attrs = tuple(AttributeRecord.from_dict(data) for data in json.loads(key))
+        except Exception as exc:
+            raise ValueError(
+                f"Bad Attributes JSON for component {refdes or '(no refdes)'}: {exc}"
+            ) from None
+        value = ""
+        for attr in attrs:
+            if str(attr.name).lower() == "value":
+                value = attr.resolved_value()
+                break
+        if len(ATTRIBUTE_MEMO) >= ATTRIBUTE_MEMO_SIZE:
+            ATTRIBUTE_MEMO.clear()
+        masked = tuple(_is_masked(attr) for attr in attrs)
+        entry = ATTRIBUTE_MEMO[key] = (attrs, masked, value)
+    attrs, masked, value = entry
+    if any(masked):
+        attrs = tuple(
+            _unmask_attribute(attr, refdes) if mark else attr
+            for attr, mark in zip(attrs, masked)
+        )
+        value = value.replace(REFDES_MARK, refdes)
+    return attrs, value
+
+
+def as_attribute_record(data):
+    if isinstance(data, AttributeRecord):
+        return data
+    return AttributeRecord.from_dict(data)
+
+
+def encode_attribute_set(attrs, refdes):
+    # Fields that only repeat the row's refdes are dropped and listed in
+    # RefdesFields, so every R0603 resistor shares one attribute set.
+    encoded = []
+    for attr in attrs:
+        data = attr.to_dict()
+        if refdes:
+            fields = []
+            for key in REFDES_ATTRIBUTE_KEYS:
+                val = data.get(key)
+                if val == refdes or (
+                    key == "TextString" and val == f"{attr.name}={refdes}"
+                ):
+                    fields.append(key)
+                    del data[key]
+            if fields:
+                data["RefdesFields"] = fields
+        encoded.append(data)
+    return encoded
+
+
+def decode_attribute_set(encoded):
+    # Returns (shared AttributeRecord, refdes fields) pairs; records without
+    # refdes fields are shared by every row that uses the set.
+    decoded = []
+    for data in encoded:
+        fields = tuple(data.get("RefdesFields", ()))
+        decoded.append((AttributeRecord.from_dict(data), fields))
+    return decoded
+
+
+def attribute_set_records(decoded, refdes):
+    attrs = []
+    for attr, fields in decoded:
+        if fields:
+            attr = AttributeRecord.from_dict(attr.to_dict())
+            for key in fields:
+                slot = ATTRIBUTE_SLOTS[key]
+                if key == "TextString":
+                    setattr(attr, slot, f"{attr.name}={refdes}")
+                else:
+                    setattr(attr, slot, refdes)
+        attrs.append(attr)
+    return attrs
+
+
+def attribute_value_from_data(data):
+    return as_attribute_record(data).resolved_value()
+
+
+def convert_oats(oats):
+    lines = []
+    for line in oats.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split(None, 1)
+        if len(parts) == 2 and parts[0].isdigit():
+            vis = parts[0]
+            rest = parts[1]
+        else:
+            vis = "1"
+            rest = line
+        lines.append(f"{vis} 1 {rest}\r")
+    return "".join(lines)
+
+
+def encode_batch_oats(attrs_data):
+    # Returns the AddBatchOats text for the attributes it can carry (name,
+    # value, visibility) and the records that still need single writes.
+    lines = []
+    rest = []
+    for data in attrs_data:
+        rec = as_attribute_record(data)
+        name = str(rec.name).strip()
+        if not name:
+            continue
+        value = rec.resolved_value()
+        if not value or "\r" in value or "\n" in value or "=" in name:
+            rest.append(rec)
+            continue
+        vis = 1 if rec.visible is None else int(rec.visible)
+        lines.append(f"{vis} 1 {name}={value}\r")
+    return "".join(lines), rest
+
+
+def segment_midpoint(seg):
+    try:
+        p_low = seg.Location(VDJ_LOW)
+        p_high = seg.Location(VDJ_HIGH)
+        return int((p_low.X + p_high.X) / 2), int((p_low.Y + p_high.Y) / 2)
+    except Exception:
+        return None, None
+
+
+def segment_key(x1, y1, x2, y2):
+    if (x1, y1) <= (x2, y2):
+        return (x1, y1, x2, y2)
+    return (x2, y2, x1, y1)
+
+
+def point_on_segment(x, y, x1, y1, x2, y2, tol=1):
+    if x1 == x2:
+        return abs(x - x1) <= tol and min(y1, y2) - tol <= y <= max(y1, y2) + tol
+    if y1 == y2:
+        return abs(y - y1) <= tol and min(x1, x2) - tol <= x <= max(x1, x2) + tol
+    return point_to_segment_distance(x, y, x1, y1, x2, y2) <= tol
+
+
+def point_to_segment_distance(x, y, x1, y1, x2, y2):
+    if x1 == x2:
+        if min(y1, y2) <= y <= max(y1, y2):
+            return abs(x - x1)
+        return min(
+            ((x - x1) ** 2 + (y - y1) ** 2) ** 0.5,
+            ((x - x2) ** 2 + (y - y2) ** 2) ** 0.5,
+        )
+    if y1 == y2:
+        if min(x1, x2) <= x <= max(x1, x2):
+            return abs(y - y1)
+        return min(
+            ((x - x1) ** 2 + (y - y1) ** 2) ** 0.5,
+            ((x - x2) ** 2 + (y - y2) ** 2) ** 0.5,
+        )
+    # general fallback
+    return min(
+        ((x - x1) ** 2 + (y - y1) ** 2) ** 0.5, ((x - x2) ** 2 + (y - y2) ** 2) ** 0.5
+    )
+
+
+def normalize_box(x1, y1, x2, y2):
+    return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+
+def box_intersects(box, min_x, min_y, max_x, max_y):
+    return max_x >= box[0] and min_x <= box[2] and max_y >= box[1] and min_y <= box[3]
+
+
+def _segment_intersects_box(seg, box):
+    x1, y1, x2, y2 = seg.x1, seg.y1, seg.x2, seg.y2
+    if not box_intersects(box, min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)):
+        return False
+    if x1 == x2 or y1 == y2:
+        return True
+    # Diagonal segment: clip it against the box (Liang-Barsky).
+    t0, t1 = 0.0, 1.0
+    dx, dy = x2 - x1, y2 - y1
+    for p, q in (
+        (-dx, x1 - box[0]),
+        (dx, box[2] - x1),
+        (-dy, y1 - box[1]),
+        (dy, box[3] - y1),
+    ):
+        t = q / p
+        if p < 0:
+            t0 = max(t0, t)
+        else:
+            t1 = min(t1, t)
+    return t0 <= t1
+
+
+def segments_intersect_box(segments, box):
+    # Each segment is tested on its own; the net's overall bounding box can
+    # overlap the window while none of its wires do.
+    return any(_segment_intersects_box(seg, box) for seg in segments)
+
+
+def component_in_region(rec, box):
+    return box_intersects(box, rec.x, rec.y, rec.x, rec.y)
+
+
+def net_in_region(rec, box):
+    return segments_intersect_box(rec.segments, box)
@@ -0,0 +1,168 @@
+# Per-phase run reports.
+
+import contextlib
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+from .constants import (
+    MEMORY_FRAMES,
+    MEMORY_TOP,
+)
+from .com import (
+    COM_FAILURES,
+    ComProxy,
+)
+
+
+def timed(timings, name, func, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        timings[name] = round(time.perf_counter() - start, 6)
+
+
+def live_com_objects():
+    proxies = sum(1 for obj in gc.get_objects() if type(obj) is ComProxy)
+    try:
+        import pythoncom
+
+        interfaces = pythoncom._GetInterfaceCount()
+    except Exception:
+        interfaces = None
+    return proxies, interfaces
+
+
+def _memory_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        )
+    )
+
+
+def _memory_entry(before):
+    current, peak = tracemalloc.get_traced_memory()
+    top = []
+    for stat in _memory_snapshot().compare_to(before, "lineno")[:MEMORY_TOP]:
+        frame = stat.traceback[0]
+        top.append(
+            {
+                "Site": f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                "Size": stat.size_diff,
+                "Count": stat.count_diff,
+            }
+        )
+    proxies, interfaces = live_com_objects()
+    return {
+        "Current": current,
+        "Peak": peak,
+        "Top": top,
+        "Proxies": proxies,
+        "Interfaces": interfaces,
+    }
+
+
+class RunReport:
+    # Per-phase wall time, object count, throughput and the COM failures the
+    # helpers swallowed along the way. With memory=True every phase also gets
+    # its tracemalloc peak, the allocation sites that grew most and the number
+    # of live COM proxies at its end.
+    def __init__(self, memory=False, **info):
+        self.info = info
+        self.phases = []
+        self.memory = memory
+        self.owns_tracing = memory and not tracemalloc.is_tracing()
+        if self.owns_tracing:
+            tracemalloc.start(MEMORY_FRAMES)
+        self.start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        entry = {"Phase": name, "Count": None}
+        failures = COM_FAILURES["n"]
+        probes = COM_FAILURES["probes"]
+        before = None
+        if self.memory:
+            before = _memory_snapshot()
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield entry
+        except Exception as exc:
+            entry["Error"] = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            entry["Seconds"] = round(seconds, 6)
+            entry["Failures"] = COM_FAILURES["n"] - failures
+            entry["Probes"] = COM_FAILURES["probes"] - probes
+            if entry["Count"] is not None and seconds > 0:
+                entry["PerSecond"] = round(entry["Count"] / seconds, 1)
+            if before is not None:
+                entry["Memory"] = _memory_entry(before)
+            self.phases.append(entry)
+
+    def close(self):
+        if self.owns_tracing:
+            tracemalloc.stop()
+            self.owns_tracing = False
+
+    def to_dict(self):
+        data = dict(self.info)
+        data["Started"] = time.strftime(
+            "%Y-%m-%dT%H:%M:%S",
+            time.localtime(time.time() - (time.perf_counter() - self.start)),
+        )
+        data["Seconds"] = round(time.perf_counter() - self.start, 6)
+        data["Failures"] = sum(entry["Failures"] for entry in self.phases)
+        data["Phases"] = self.phases
+        return data
+
+    def table(self):
+        lines = [f"{'Phase':<18}{'Seconds':>10}{'Count':>8}{'Per s':>10}{'Failed':>8}"]
+        for entry in self.phases:
+            count = "" if entry["Count"] is None else entry["Count"]
+            rate = entry.get("PerSecond", "")
+            lines.append(
+                f"{entry['Phase']:<18}{entry['Seconds']:>10.3f}{count:>8}"
+                f"{rate:>10}{entry['Failures']:>8}"
+            )
+            if "Error" in entry:
+                lines.append(f"  {entry['Error']}")
+            memory = entry.get("Memory")
+            if memory:
+                lines.append(
+                    f"  peak {memory['Peak'] / 1024:.1f} KiB, "
+                    f"now {memory['Current'] / 1024:.1f} KiB, "
+                    f"{memory['Proxies']} COM proxies"
+                    + (
+                        f", {memory['Interfaces']} interfaces"
+                        if memory["Interfaces"] is not None
+                        else ""
+                    )
+                )
+                for site in memory["Top"][:3]:
+                    lines.append(
+                        f"    {site['Size'] / 1024:+.1f} KiB "
+                        f"{site['Count']:+d} blocks {site['Site']}"
+                    )
+        lines.append(
+            f"{'total':<18}{time.perf_counter() - self.start:>10.3f}"
+            f"{'':>18}{sum(e['Failures'] for e in self.phases):>8}"
+        )
+        return "\n".join(lines)
+
+
+def finish_report(report, path):
+    report.close()
+    print(report.table())
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report.to_dict()) + "\n")
+    except OSError as exc:
+        print(f"Cannot write run report {path}: {exc}")
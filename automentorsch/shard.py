@@ -0,0 +1,204 @@
+# Sharded multi-sheet copy across several Designer instances.
+
+import importlib
+import os
+import time
+
+from .constants import (
+    SERVER_HOST,
+    SHARD_SHEET_OVERHEAD,
+)
+from .store import (
+    archive_part,
+)
+from .jobs import (
+    DesignerSession,
+    JobError,
+    run_job,
+    send_job,
+)
+
+
+def parse_backend(spec):
+    spec = str(spec).strip()
+    if spec.lower() == "active":
+        return "active", None
+    head, sep, tail = spec.rpartition(":")
+    if sep and tail.isdigit():
+        return "server", (head or SERVER_HOST, int(tail))
+    if sep and head and tail:
+        return "factory", (head, tail)
+    raise ValueError(f"Expected active, HOST:PORT or MODULE:FACTORY, got {spec!r}")
+
+
+def _send_shard_job(job, address, token=None):
+    kind = job.get("job")
+    try:
+        response = send_job(job, *address, token=token)
+    except Exception as exc:
+        response = {"ok": False, "job": kind, "error": f"{type(exc).__name__}: {exc}"}
+    if response is None:
+        response = {"ok": False, "job": kind, "error": "No response from server."}
+    response.setdefault("timings", {})
+    return response
+
+
+def run_shard(backend, jobs, base_dir, token=None):
+    # Runs in a worker process. The shard keeps one backend for all of its
+    # jobs, so COM calls never cross instances or apartments.
+    start = time.perf_counter()
+    kind, target = parse_backend(backend)
+    session = None
+    if kind == "factory":
+        module_name, name = target
+        session = DesignerSession(getattr(importlib.import_module(module_name), name))
+    elif kind == "active":
+        session = DesignerSession()
+    results = []
+    for job in jobs:
+        if session is None:
+            results.append(_send_shard_job(job, target, token))
+        else:
+            results.append(run_job(session, job, base_dir))
+    return {
+        "Backend": backend,
+        "Pid": os.getpid(),
+        "Seconds": round(time.perf_counter() - start, 6),
+        "Results": results,
+    }
+
+
+def balance_shards(weights, shard_count):
+    # Heaviest sheets first, each onto the least loaded shard.
+    shards = [[] for _ in range(shard_count)]
+    loads = [0] * shard_count
+    for index in sorted(range(len(weights)), key=lambda i: -weights[i]):
+        slot = loads.index(min(loads))
+        shards[slot].append(index)
+        loads[slot] += weights[index]
+    for indices in shards:
+        indices.sort()
+    return shards, loads
+
+
+def check_shard_plan(backends, copies):
+    # Two shards on one running Designer (the active instance, or the same
+    # job server twice) would edit it concurrently, and two copies onto one
+    # destination would share its stem files across worker processes.
+    seen = set()
+    for backend in backends:
+        kind, target = parse_backend(backend)
+        if kind == "factory":
+            continue
+        if (kind, target) in seen:
+            raise JobError(f"Backend {backend} is listed more than once.")
+        seen.add((kind, target))
+    stems = {}
+    for _, dst_sheet in copies:
+        stem = archive_part(dst_sheet).lower()
+        if stem in stems:
+            raise JobError(
+                f"Destination sheets {stems[stem]} and {dst_sheet} "
+                "would write the same files."
+            )
+        stems[stem] = dst_sheet
+
+
+def _sheet_job(job, src_sheet, dst_sheet, work_dir):
+    # Every destination gets its own exports (and journal, when one was asked
+    # for) so concurrent shards never write the same file.
+    stem = os.path.join(work_dir, archive_part(dst_sheet))
+    sheet_job = dict(job, job="copy", src_sheet=src_sheet, dst_sheet=dst_sheet)
+    sheet_job["parts"] = stem + "_parts.csv"
+    sheet_job["nets"] = stem + "_net.csv"
+    if job.get("journal") or job.get("resume"):
+        sheet_job["journal"] = stem + "_journal.jsonl"
+    return sheet_job
+
+
+def _sheet_entry(copy, backend, objects, response):
+    entry = {
+        "Source": copy[0],
+        "Sheet": copy[1],
+        "Backend": backend,
+        "Objects": objects,
+        "Timings": response.get("timings", {}),
+    }
+    if response.get("ok"):
+        result = response["result"]
+        entry["Components"] = result.get("components")
+        entry["NetCount"] = result.get("nets")
+        if result.get("missing_symbols"):
+            entry["MissingSymbols"] = result["missing_symbols"]
+    else:
+        entry["Error"] = response.get("error")
+    entry["Seconds"] = entry["Timings"].get("total")
+    return entry
+
+
+def shard_copy(
+    backends, copies, job=None, base_dir=None, counts=None, work_dir=None, token=None
+):
+    import concurrent.futures
+
+    if not backends:
+        raise JobError("shard copy needs at least one backend.")
+    check_shard_plan(backends, copies)
+    base_dir = base_dir or os.getcwd()
+    work_dir = os.path.abspath(work_dir or os.path.join(base_dir, "shards"))
+    os.makedirs(work_dir, exist_ok=True)
+    job = dict(job or {})
+    report = {"Backends": [], "Sheets": [None] * len(copies), "Timings": {}}
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(len(backends)) as pool:
+        if counts is None:
+            counts_job = {"job": "counts", "schematic": job.get("schematic")}
+            shard = pool.submit(run_shard, backends[0], [counts_job], base_dir, token)
+            response = shard.result()["Results"][0]
+            if not response["ok"]:
+                raise JobError(f"Cannot count sheet objects: {response['error']}")
+            job["schematic"] = response["result"]["schematic"]
+            counts = response["result"]["counts"]
+            report["Timings"]["counts"] = response["timings"].get("total")
+        objects = [counts.get(src_sheet) or 0 for src_sheet, _ in copies]
+        shards, loads = balance_shards(
+            [count + SHARD_SHEET_OVERHEAD for count in objects], len(backends)
+        )
+        futures = {}
+        for slot, indices in enumerate(shards):
+            if indices:
+                jobs = [_sheet_job(job, *copies[i], work_dir) for i in indices]
+                futures[slot] = pool.submit(
+                    run_shard, backends[slot], jobs, base_dir, token
+                )
+        for slot, future in futures.items():
+            entry = {
+                "Backend": backends[slot],
+                "Sheets": len(shards[slot]),
+                "Objects": loads[slot],
+            }
+            try:
+                shard = future.result()
+            except Exception as exc:
+                entry["Error"] = f"{type(exc).__name__}: {exc}"
+                results = [{"ok": False, "error": entry["Error"]}] * len(shards[slot])
+            else:
+                entry["Pid"] = shard["Pid"]
+                entry["Seconds"] = shard["Seconds"]
+                results = shard["Results"]
+            report["Backends"].append(entry)
+            for i, response in zip(shards[slot], results):
+                report["Sheets"][i] = _sheet_entry(
+                    copies[i], backends[slot], objects[i], response
+                )
+    timings = report["Timings"]
+    for entry in report["Sheets"]:
+        for name, seconds in entry["Timings"].items():
+            if name != "total":
+                timings[name] = round(timings.get(name, 0) + seconds, 6)
+    report["Seconds"] = round(time.perf_counter() - start, 6)
+    report["Busy"] = round(sum(e.get("Seconds", 0) for e in report["Backends"]), 6)
+    report["Speedup"] = (
+        round(report["Busy"] / report["Seconds"], 2) if report["Seconds"] else None
+    )
+    return report
@@ -0,0 +1,486 @@
+# SQLite design store and archive readers.
+
+import csv
+import io
+import json
+import sqlite3
+import time
+import zipfile
+
+from .constants import (
+    ATTRIBUTE_FIELDS,
+    DB_CHUNK,
+)
+from .records import (
+    AttributeRecord,
+    ComponentRecord,
+    LabelRecord,
+    NetRecord,
+    SegmentRecord,
+)
+from .formats import (
+    parse_component_row,
+    parse_net_row,
+)
+
+DESIGN_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheets (
+    id INTEGER PRIMARY KEY,
+    schematic TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    exported_at REAL,
+    UNIQUE (schematic, sheet)
+);
+CREATE TABLE IF NOT EXISTS components (
+    id INTEGER PRIMARY KEY,
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    refdes TEXT,
+    partition TEXT,
+    symbol TEXT,
+    x INTEGER,
+    y INTEGER,
+    orientation INTEGER,
+    scale REAL
+);
+CREATE TABLE IF NOT EXISTS component_attributes (
+    component_id INTEGER NOT NULL REFERENCES components(id) ON DELETE CASCADE,
+    name TEXT,
+    value TEXT,
+    either_value TEXT,
+    instance_value TEXT,
+    text_string TEXT,
+    visible INTEGER,
+    name_visible INTEGER,
+    value_visible INTEGER,
+    orientation INTEGER,
+    size INTEGER,
+    origin_x INTEGER,
+    origin_y INTEGER
+);
+CREATE TABLE IF NOT EXISTS nets (
+    id INTEGER PRIMARY KEY,
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    net_id INTEGER NOT NULL REFERENCES nets(id) ON DELETE CASCADE,
+    x1 INTEGER,
+    y1 INTEGER,
+    x2 INTEGER,
+    y2 INTEGER
+);
+CREATE TABLE IF NOT EXISTS labels (
+    id INTEGER PRIMARY KEY,
+    net_id INTEGER NOT NULL REFERENCES nets(id) ON DELETE CASCADE,
+    name TEXT,
+    x INTEGER,
+    y INTEGER,
+    seg_x1 INTEGER,
+    seg_y1 INTEGER,
+    seg_x2 INTEGER,
+    seg_y2 INTEGER,
+    orientation INTEGER,
+    size INTEGER
+);
+CREATE TABLE IF NOT EXISTS net_attributes (
+    net_id INTEGER NOT NULL REFERENCES nets(id) ON DELETE CASCADE,
+    name TEXT,
+    value TEXT,
+    either_value TEXT,
+    instance_value TEXT,
+    text_string TEXT,
+    visible INTEGER,
+    name_visible INTEGER,
+    value_visible INTEGER,
+    orientation INTEGER,
+    size INTEGER,
+    origin_x INTEGER,
+    origin_y INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_components_refdes ON components(refdes);
+CREATE INDEX IF NOT EXISTS idx_components_sheet ON components(sheet_id);
+CREATE INDEX IF NOT EXISTS idx_component_attributes_component
+    ON component_attributes(component_id);
+CREATE INDEX IF NOT EXISTS idx_component_attributes_name
+    ON component_attributes(name, either_value);
+CREATE INDEX IF NOT EXISTS idx_nets_sheet ON nets(sheet_id);
+CREATE INDEX IF NOT EXISTS idx_segments_net ON segments(net_id);
+CREATE INDEX IF NOT EXISTS idx_labels_name ON labels(name);
+CREATE INDEX IF NOT EXISTS idx_labels_net ON labels(net_id);
+CREATE INDEX IF NOT EXISTS idx_net_attributes_net ON net_attributes(net_id);
+"""
+
+DESIGN_DB_RTREE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS segment_rtree
+    USING rtree(id, min_x, max_x, min_y, max_y);
+CREATE VIRTUAL TABLE IF NOT EXISTS component_rtree
+    USING rtree(id, min_x, max_x, min_y, max_y);
+"""
+
+DESIGN_DB_FALLBACK_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_segments_x ON segments(x1, x2);
+CREATE INDEX IF NOT EXISTS idx_components_xy ON components(x, y);
+"""
+
+
+def _db_attribute_values(attr):
+    return tuple(getattr(attr, slot) for slot, _ in ATTRIBUTE_FIELDS)
+
+
+class DesignStore:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(DESIGN_DB_SCHEMA)
+        try:
+            self.conn.executescript(DESIGN_DB_RTREE)
+            self.has_rtree = True
+        except sqlite3.OperationalError:
+            self.conn.executescript(DESIGN_DB_FALLBACK_INDEXES)
+            self.has_rtree = False
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _drop_sheet(self, sheet_id):
+        cur = self.conn
+        if self.has_rtree:
+            cur.execute(
+                "DELETE FROM segment_rtree WHERE id IN (SELECT s.id FROM segments s "
+                "JOIN nets n ON n.id = s.net_id WHERE n.sheet_id = ?)",
+                (sheet_id,),
+            )
+            cur.execute(
+                "DELETE FROM component_rtree WHERE id IN "
+                "(SELECT id FROM components WHERE sheet_id = ?)",
+                (sheet_id,),
+            )
+        cur.execute("DELETE FROM sheets WHERE id = ?", (sheet_id,))
+
+    def write_sheet(self, schematic, sheet, component_records, net_records):
+        cur = self.conn
+        counts = {"components": 0, "nets": 0, "segments": 0, "labels": 0}
+        with cur:
+            row = cur.execute(
+                "SELECT id FROM sheets WHERE schematic = ? AND sheet = ?",
+                (schematic, sheet),
+            ).fetchone()
+            if row is not None:
+                self._drop_sheet(row[0])
+            sheet_id = cur.execute(
+                "INSERT INTO sheets (schematic, sheet, exported_at) VALUES (?, ?, ?)",
+                (schematic, sheet, time.time()),
+            ).lastrowid
+            for rec in component_records:
+                comp_id = cur.execute(
+                    "INSERT INTO components (sheet_id, refdes, partition, symbol, "
+                    "x, y, orientation, scale) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        sheet_id,
+                        rec.refdes,
+                        rec.partition,
+                        rec.symbol,
+                        rec.x,
+                        rec.y,
+                        rec.orientation,
+                        rec.scale,
+                    ),
+                ).lastrowid
+                cur.executemany(
+                    "INSERT INTO component_attributes VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(comp_id,) + _db_attribute_values(a) for a in rec.attributes],
+                )
+                if self.has_rtree:
+                    cur.execute(
+                        "INSERT INTO component_rtree VALUES (?, ?, ?, ?, ?)",
+                        (comp_id, rec.x, rec.x, rec.y, rec.y),
+                    )
+                counts["components"] += 1
+            for rec in net_records:
+                net_id = cur.execute(
+                    "INSERT INTO nets (sheet_id) VALUES (?)", (sheet_id,)
+                ).lastrowid
+                for seg in rec.segments:
+                    seg_id = cur.execute(
+                        "INSERT INTO segments (net_id, x1, y1, x2, y2) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (net_id, seg.x1, seg.y1, seg.x2, seg.y2),
+                    ).lastrowid
+                    if self.has_rtree:
+                        cur.execute(
+                            "INSERT INTO segment_rtree VALUES (?, ?, ?, ?, ?)",
+                            (
+                                seg_id,
+                                min(seg.x1, seg.x2),
+                                max(seg.x1, seg.x2),
+                                min(seg.y1, seg.y2),
+                                max(seg.y1, seg.y2),
+                            ),
+                        )
+                    counts["segments"] += 1
+                cur.executemany(
+                    "INSERT INTO labels (net_id, name, x, y, seg_x1, seg_y1, "
+                    "seg_x2, seg_y2, orientation, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            net_id,
+                            lbl.name,
+                            lbl.x,
+                            lbl.y,
+                            lbl.seg_x1,
+                            lbl.seg_y1,
+                            lbl.seg_x2,
+                            lbl.seg_y2,
+                            lbl.orientation,
+                            lbl.size,
+                        )
+                        for lbl in rec.labels
+                    ],
+                )
+                cur.executemany(
+                    "INSERT INTO net_attributes VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(net_id,) + _db_attribute_values(a) for a in rec.attributes],
+                )
+                counts["nets"] += 1
+                counts["labels"] += len(rec.labels)
+        return counts
+
+    def sheets(self):
+        return self.conn.execute(
+            "SELECT schematic, sheet, exported_at FROM sheets ORDER BY id"
+        ).fetchall()
+
+    def find_component(self, refdes):
+        return self.conn.execute(
+            "SELECT s.schematic, s.sheet, c.refdes, c.partition, c.symbol, c.x, c.y "
+            "FROM components c JOIN sheets s ON s.id = c.sheet_id "
+            "WHERE c.refdes = ?",
+            (refdes,),
+        ).fetchall()
+
+    def find_attribute(self, name, value=None):
+        sql = (
+            "SELECT s.schematic, s.sheet, c.refdes, a.name, a.either_value "
+            "FROM component_attributes a "
+            "JOIN components c ON c.id = a.component_id "
+            "JOIN sheets s ON s.id = c.sheet_id WHERE a.name = ?"
+        )
+        args = [name]
+        if value is not None:
+            sql += " AND a.either_value = ?"
+            args.append(value)
+        return self.conn.execute(sql, args).fetchall()
+
+    def segments_for_net(self, name):
+        return self.conn.execute(
+            "SELECT s.schematic, s.sheet, g.net_id, g.x1, g.y1, g.x2, g.y2 "
+            "FROM segments g JOIN nets n ON n.id = g.net_id "
+            "JOIN sheets s ON s.id = n.sheet_id "
+            "WHERE g.net_id IN (SELECT net_id FROM labels WHERE name = ?) "
+            "ORDER BY g.net_id, g.id",
+            (name,),
+        ).fetchall()
+
+    def _sheet_filter(self, schematic, sheet):
+        where = ""
+        args = []
+        if schematic is not None:
+            where += " AND s.schematic = ?"
+            args.append(schematic)
+        if sheet is not None:
+            where += " AND s.sheet = ?"
+            args.append(str(sheet))
+        return where, args
+
+    def query_region(self, x1, y1, x2, y2, schematic=None, sheet=None):
+        min_x, max_x = min(x1, x2), max(x1, x2)
+        min_y, max_y = min(y1, y2), max(y1, y2)
+        where, args = self._sheet_filter(schematic, sheet)
+        if self.has_rtree:
+            comp_sql = (
+                "SELECT s.schematic, s.sheet, c.refdes, c.partition, c.symbol, "
+                "c.x, c.y FROM component_rtree r "
+                "JOIN components c ON c.id = r.id "
+                "JOIN sheets s ON s.id = c.sheet_id "
+                "WHERE r.max_x >= ? AND r.min_x <= ? "
+                "AND r.max_y >= ? AND r.min_y <= ?"
+            )
+            seg_sql = (
+                "SELECT s.schematic, s.sheet, g.net_id, g.x1, g.y1, g.x2, g.y2 "
+                "FROM segment_rtree r JOIN segments g ON g.id = r.id "
+                "JOIN nets n ON n.id = g.net_id "
+                "JOIN sheets s ON s.id = n.sheet_id "
+                "WHERE r.max_x >= ? AND r.min_x <= ? "
+                "AND r.max_y >= ? AND r.min_y <= ?"
+            )
+        else:
+            comp_sql = (
+                "SELECT s.schematic, s.sheet, c.refdes, c.partition, c.symbol, "
+                "c.x, c.y FROM components c JOIN sheets s ON s.id = c.sheet_id "
+                "WHERE c.x >= ? AND c.x <= ? AND c.y >= ? AND c.y <= ?"
+            )
+            seg_sql = (
+                "SELECT s.schematic, s.sheet, g.net_id, g.x1, g.y1, g.x2, g.y2 "
+                "FROM segments g JOIN nets n ON n.id = g.net_id "
+                "JOIN sheets s ON s.id = n.sheet_id "
+                "WHERE max(g.x1, g.x2) >= ? AND min(g.x1, g.x2) <= ? "
+                "AND max(g.y1, g.y2) >= ? AND min(g.y1, g.y2) <= ?"
+            )
+        box = [min_x, max_x, min_y, max_y]
+        return {
+            "components": self.conn.execute(comp_sql + where, box + args).fetchall(),
+            "segments": self.conn.execute(seg_sql + where, box + args).fetchall(),
+        }
+
+    def _grouped(self, sql, ids):
+        groups = {}
+        for chunk in _db_chunks(ids):
+            marks = ",".join("?" * len(chunk))
+            for row in self.conn.execute(sql.format(marks=marks), chunk):
+                groups.setdefault(row[0], []).append(row[1:])
+        return groups
+
+    def load_region(self, x1, y1, x2, y2, schematic=None, sheet=None):
+        # The spatial index picks the matching ids; only those rows are read
+        # back into records. A net is returned whole when any segment hits.
+        min_x, max_x = min(x1, x2), max(x1, x2)
+        min_y, max_y = min(y1, y2), max(y1, y2)
+        where, args = self._sheet_filter(schematic, sheet)
+        box = [min_x, max_x, min_y, max_y]
+        comp_cols = (
+            "SELECT c.id, c.refdes, c.partition, c.symbol, c.x, c.y, "
+            "c.orientation, c.scale "
+        )
+        if self.has_rtree:
+            comp_sql = (
+                comp_cols + "FROM component_rtree r "
+                "JOIN components c ON c.id = r.id "
+                "JOIN sheets s ON s.id = c.sheet_id "
+                "WHERE r.max_x >= ? AND r.min_x <= ? "
+                "AND r.max_y >= ? AND r.min_y <= ?"
+            )
+            net_sql = (
+                "SELECT DISTINCT g.net_id FROM segment_rtree r "
+                "JOIN segments g ON g.id = r.id "
+                "JOIN nets n ON n.id = g.net_id "
+                "JOIN sheets s ON s.id = n.sheet_id "
+                "WHERE r.max_x >= ? AND r.min_x <= ? "
+                "AND r.max_y >= ? AND r.min_y <= ?"
+            )
+        else:
+            comp_sql = (
+                comp_cols + "FROM components c JOIN sheets s ON s.id = c.sheet_id "
+                "WHERE c.x >= ? AND c.x <= ? AND c.y >= ? AND c.y <= ?"
+            )
+            net_sql = (
+                "SELECT DISTINCT g.net_id FROM segments g "
+                "JOIN nets n ON n.id = g.net_id "
+                "JOIN sheets s ON s.id = n.sheet_id "
+                "WHERE max(g.x1, g.x2) >= ? AND min(g.x1, g.x2) <= ? "
+                "AND max(g.y1, g.y2) >= ? AND min(g.y1, g.y2) <= ?"
+            )
+        comp_rows = self.conn.execute(
+            comp_sql + where + " ORDER BY c.id", box + args
+        ).fetchall()
+        comp_ids = [row[0] for row in comp_rows]
+        comp_attrs = self._grouped(
+            "SELECT * FROM component_attributes WHERE component_id IN ({marks}) "
+            "ORDER BY rowid",
+            comp_ids,
+        )
+        component_records = []
+        for comp_id, refdes, part, sym, x, y, orientation, scale in comp_rows:
+            component_records.append(
+                ComponentRecord(
+                    refdes or "",
+                    part,
+                    sym,
+                    x,
+                    y,
+                    orientation,
+                    scale,
+                    [_db_attribute_record(r) for r in comp_attrs.get(comp_id, [])],
+                )
+            )
+        net_ids = sorted(
+            row[0] for row in self.conn.execute(net_sql + where, box + args)
+        )
+        segments = self._grouped(
+            "SELECT net_id, x1, y1, x2, y2 FROM segments "
+            "WHERE net_id IN ({marks}) ORDER BY net_id, id",
+            net_ids,
+        )
+        labels = self._grouped(
+            "SELECT net_id, name, x, y, seg_x1, seg_y1, seg_x2, seg_y2, "
+            "orientation, size FROM labels WHERE net_id IN ({marks}) "
+            "ORDER BY net_id, id",
+            net_ids,
+        )
+        net_attrs = self._grouped(
+            "SELECT * FROM net_attributes WHERE net_id IN ({marks}) ORDER BY rowid",
+            net_ids,
+        )
+        net_records = []
+        for net_id in net_ids:
+            net_records.append(
+                NetRecord(
+                    [SegmentRecord(*row) for row in segments.get(net_id, [])],
+                    [LabelRecord(*row) for row in labels.get(net_id, [])],
+                    [_db_attribute_record(r) for r in net_attrs.get(net_id, [])],
+                )
+            )
+        return component_records, net_records
+
+
+def _db_chunks(ids, size=DB_CHUNK):
+    for start in range(0, len(ids), size):
+        yield ids[start : start + size]
+
+
+def _db_attribute_record(row):
+    rec = AttributeRecord()
+    for (slot, _), val in zip(ATTRIBUTE_FIELDS, row):
+        setattr(rec, slot, val)
+    return rec
+
+
+def archive_part(name):
+    return str(name).replace("/", "_").replace("\\", "_")
+
+
+def read_archive_index(archive_path):
+    with zipfile.ZipFile(archive_path) as zf:
+        return json.loads(zf.read("index.json").decode("utf-8"))
+
+
+def read_archive_sheet(archive_path, schematic, sheet):
+    with zipfile.ZipFile(archive_path) as zf:
+        index = json.loads(zf.read("index.json").decode("utf-8"))
+        for entry in index["Sheets"]:
+            if entry["Schematic"] == schematic and str(entry["Sheet"]) == str(sheet):
+                break
+        else:
+            return None
+        if "Error" in entry:
+            return None
+        result = []
+        for member, parse in (
+            (entry["Parts"], parse_component_row),
+            (entry["Nets"], parse_net_row),
+        ):
+            with zf.open(member) as raw:
+                with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+                    records = [parse(row) for row in csv.DictReader(f)]
+            result.append([rec for rec in records if rec is not None])
+        return result[0], result[1]
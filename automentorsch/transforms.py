@@ -0,0 +1,457 @@
+# Record transforms: placement, replication and template compression.
+
+import hashlib
+import json
+import os
+
+from .constants import (
+    ARRAY_GAP,
+    ATTRIBUTE_FIELDS,
+    IDENTITY_TRANSFORM,
+    ORIENTATION_MIRRORED,
+    ORIENTATION_ROTATIONS,
+    REFDES_PATTERN,
+    ROTATION_MATRICES,
+    TEMPLATE_LINK,
+    TEMPLATE_SUFFIX,
+    TEMPLATE_VERSION,
+)
+from .records import (
+    AttributeRecord,
+    ComponentRecord,
+    LabelRecord,
+    NetRecord,
+    SegmentRecord,
+    attribute_set_records,
+    encode_attribute_set,
+)
+
+
+def make_transform(rotate=0, mirror=False):
+    turns = (int(rotate) // 90) % ORIENTATION_ROTATIONS
+    a, b, c, d = ROTATION_MATRICES[turns]
+    if mirror:
+        a, c = -a, -c
+    return (a, b, c, d, turns, bool(mirror))
+
+
+def transform_orientation(orientation, transform):
+    turns, mirrored = transform[4], transform[5]
+    if orientation is None:
+        if not turns and not mirrored:
+            return None
+        orientation = 0
+    try:
+        code = int(orientation)
+    except Exception:
+        return orientation
+    rot = code % ORIENTATION_ROTATIONS
+    flip = bool(code & ORIENTATION_MIRRORED)
+    if mirrored:
+        rot = (turns - rot) % ORIENTATION_ROTATIONS
+        flip = not flip
+    else:
+        rot = (turns + rot) % ORIENTATION_ROTATIONS
+    return rot + (ORIENTATION_MIRRORED if flip else 0)
+
+
+def _offset_refdes(refdes, offset):
+    match = REFDES_PATTERN.match(refdes or "")
+    if not offset or match is None:
+        return refdes
+    prefix, number, suffix = match.groups()
+    return f"{prefix}{int(number) + offset}{suffix}"
+
+
+def _refdes_step(component_records):
+    step = 0
+    for rec in component_records:
+        match = REFDES_PATTERN.match(rec.refdes or "")
+        if match is not None:
+            step = max(step, int(match.group(2)))
+    return step
+
+
+def _renumber_attributes(attrs, old, new):
+    renamed = []
+    for attr in attrs:
+        if str(attr.name).lower() == "ref designator":
+            copy = AttributeRecord(attr.name)
+            for slot, _ in ATTRIBUTE_FIELDS[1:]:
+                val = getattr(attr, slot)
+                if val == old:
+                    val = new
+                elif slot == "text_string" and str(val or "").endswith("=" + old):
+                    val = val[: -len(old)] + new
+                setattr(copy, slot, val)
+            attr = copy
+        renamed.append(attr)
+    return renamed
+
+
+def _gather_attribute_points(attrs, xs, ys):
+    for attr in attrs:
+        if attr.origin_x is not None and attr.origin_y is not None:
+            xs.append(attr.origin_x)
+            ys.append(attr.origin_y)
+
+
+def _gather_points(component_records, net_records):
+    xs = []
+    ys = []
+    for rec in component_records:
+        xs.append(rec.x)
+        ys.append(rec.y)
+        _gather_attribute_points(rec.attributes, xs, ys)
+    for rec in net_records:
+        for seg in rec.segments:
+            xs.extend((seg.x1, seg.x2))
+            ys.extend((seg.y1, seg.y2))
+        for lbl in rec.labels:
+            xs.extend((lbl.x, lbl.seg_x1, lbl.seg_x2))
+            ys.extend((lbl.y, lbl.seg_y1, lbl.seg_y2))
+        _gather_attribute_points(rec.attributes, xs, ys)
+    return xs, ys
+
+
+def _place_attributes(attrs, points):
+    # Attribute records can be shared between rows, so moved ones are copies.
+    placed = []
+    for attr in attrs:
+        if attr.origin_x is not None and attr.origin_y is not None:
+            attr = AttributeRecord.from_dict(attr.to_dict())
+            attr.origin_x, attr.origin_y = next(points)
+        placed.append(attr)
+    return placed
+
+
+def _place_points(xs, ys, transform):
+    a, b, c, d = transform[:4]
+    return (
+        [a * x + b * y for x, y in zip(xs, ys)],
+        [c * x + d * y for x, y in zip(xs, ys)],
+    )
+
+
+def _rebuild_records(
+    component_records, net_records, xs, ys, dx, dy, transform, refdes_offset
+):
+    # Consumes the points in the order _gather_points produced them.
+    points = zip([x + dx for x in xs], [y + dy for y in ys])
+    components = []
+    for rec in component_records:
+        x, y = next(points)
+        refdes = _offset_refdes(rec.refdes, refdes_offset)
+        attrs = _place_attributes(rec.attributes, points)
+        if refdes != rec.refdes:
+            attrs = _renumber_attributes(attrs, rec.refdes, refdes)
+        components.append(
+            ComponentRecord(
+                refdes,
+                rec.partition,
+                rec.symbol,
+                x,
+                y,
+                transform_orientation(rec.orientation, transform),
+                rec.scale,
+                attrs,
+            )
+        )
+    nets = []
+    for rec in net_records:
+        segments = []
+        for _ in rec.segments:
+            x1, y1 = next(points)
+            x2, y2 = next(points)
+            segments.append(SegmentRecord(x1, y1, x2, y2))
+        labels = []
+        for lbl in rec.labels:
+            x, y = next(points)
+            sx1, sy1 = next(points)
+            sx2, sy2 = next(points)
+            labels.append(
+                LabelRecord(
+                    lbl.name,
+                    x,
+                    y,
+                    sx1,
+                    sy1,
+                    sx2,
+                    sy2,
+                    transform_orientation(lbl.orientation, transform),
+                    lbl.size,
+                )
+            )
+        attrs = _place_attributes(rec.attributes, points)
+        nets.append(NetRecord(segments, labels, attrs))
+    return components, nets
+
+
+def replicate_records(
+    component_records,
+    net_records,
+    transform=IDENTITY_TRANSFORM,
+    dx=0,
+    dy=0,
+    rows=1,
+    cols=1,
+    pitch_x=None,
+    pitch_y=None,
+    renumber=True,
+):
+    # Rotation and mirroring are applied to the flattened coordinates once;
+    # every array copy is then only a translation of the same point lists.
+    # The block keeps its lower-left corner unless dx/dy move it.
+    component_records = list(component_records)
+    net_records = list(net_records)
+    xs, ys = _gather_points(component_records, net_records)
+    if not xs:
+        return component_records, net_records
+    txs, tys = _place_points(xs, ys, transform)
+    base_x = min(xs) - min(txs) + dx
+    base_y = min(ys) - min(tys) + dy
+    if pitch_x is None:
+        pitch_x = max(txs) - min(txs) + ARRAY_GAP
+    if pitch_y is None:
+        pitch_y = max(tys) - min(tys) + ARRAY_GAP
+    step = _refdes_step(component_records) if renumber else 0
+    components = []
+    nets = []
+    for row in range(rows):
+        for col in range(cols):
+            copy_comps, copy_nets = _rebuild_records(
+                component_records,
+                net_records,
+                txs,
+                tys,
+                base_x + col * pitch_x,
+                base_y + row * pitch_y,
+                transform,
+                (row * cols + col) * step,
+            )
+            components.extend(copy_comps)
+            nets.extend(copy_nets)
+    return components, nets
+
+
+def replicate_from_spec(component_records, net_records, spec):
+    return replicate_records(
+        component_records,
+        net_records,
+        make_transform(spec.get("rotate", 0), spec.get("mirror", False)),
+        int(spec.get("dx", 0)),
+        int(spec.get("dy", 0)),
+        int(spec.get("rows", 1)),
+        int(spec.get("cols", 1)),
+        spec.get("pitch_x"),
+        spec.get("pitch_y"),
+        spec.get("renumber", True),
+    )
+
+
+def replication_hash(input_hash, spec):
+    text = json.dumps(spec, sort_keys=True)
+    return hashlib.sha256(f"{input_hash}:{text}".encode("utf-8")).hexdigest()
+
+
+def _cluster_records(component_records, net_records, link=TEMPLATE_LINK):
+    # Union-find over a grid of link-sized cells: two objects belong to the
+    # same sub-circuit when any of their points are closer than link.
+    items = []
+    for rec in component_records:
+        items.append([(rec.x, rec.y)])
+    for rec in net_records:
+        points = []
+        for seg in rec.segments:
+            points.extend(((seg.x1, seg.y1), (seg.x2, seg.y2)))
+        items.append(points)
+    parent = list(range(len(items)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    grid = {}
+    for index, points in enumerate(items):
+        for x, y in points:
+            cx, cy = x // link, y // link
+            for nx in (cx - 1, cx, cx + 1):
+                for ny in (cy - 1, cy, cy + 1):
+                    for other, ox, oy in grid.get((nx, ny), ()):
+                        if abs(ox - x) < link and abs(oy - y) < link:
+                            root_a, root_b = find(index), find(other)
+                            if root_a != root_b:
+                                parent[root_b] = root_a
+            grid.setdefault((cx, cy), []).append((index, x, y))
+    groups = {}
+    for index in range(len(items)):
+        groups.setdefault(find(index), []).append(index)
+    count = len(component_records)
+    clusters = []
+    for members in groups.values():
+        clusters.append(
+            (
+                [component_records[i] for i in members if i < count],
+                [net_records[i - count] for i in members if i >= count],
+            )
+        )
+    return clusters
+
+
+def _component_doc(rec):
+    # The refdes lives on the instance; attribute fields that held it are
+    # listed in RefdesFields, as in encoded parts exports.
+    row = rec.to_row()
+    del row["Refdes"]
+    row["Attributes"] = encode_attribute_set(rec.attributes, rec.refdes)
+    return row
+
+
+def _component_from_doc(data):
+    return ComponentRecord(
+        data.get("Refdes", ""),
+        data["Partition"],
+        data["Symbol"],
+        data["X"],
+        data["Y"],
+        None if data.get("Orientation", "") == "" else data["Orientation"],
+        None if data.get("Scale", "") == "" else data["Scale"],
+        [AttributeRecord.from_dict(a) for a in data.get("Attributes", [])],
+    )
+
+
+def _net_doc(rec):
+    return {
+        "Segments": [seg.to_list() for seg in rec.segments],
+        "Labels": [lbl.to_dict() for lbl in rec.labels],
+        "Attributes": [attr.to_dict() for attr in rec.attributes],
+    }
+
+
+def _net_from_doc(data):
+    return NetRecord(
+        [SegmentRecord(*seg) for seg in data["Segments"]],
+        [LabelRecord.from_dict(lbl) for lbl in data.get("Labels", [])],
+        [AttributeRecord.from_dict(a) for a in data.get("Attributes", [])],
+    )
+
+
+def _canonical_template(component_records, net_records):
+    xs, ys = _gather_points(component_records, net_records)
+    anchor_x, anchor_y = min(xs), min(ys)
+    comps, nets = _rebuild_records(
+        component_records,
+        net_records,
+        xs,
+        ys,
+        -anchor_x,
+        -anchor_y,
+        IDENTITY_TRANSFORM,
+        0,
+    )
+    comp_entries = []
+    for rec in comps:
+        comp_entries.append((json.dumps(_component_doc(rec), sort_keys=True), rec))
+    comp_entries.sort(key=lambda entry: entry[0])
+    net_entries = []
+    for rec in nets:
+        net_entries.append((json.dumps(_net_doc(rec), sort_keys=True), rec))
+    net_entries.sort(key=lambda entry: entry[0])
+    digest = hashlib.sha256()
+    for text, _ in comp_entries:
+        digest.update(b"C" + text.encode("utf-8"))
+    for text, _ in net_entries:
+        digest.update(b"N" + text.encode("utf-8"))
+    return (
+        digest.hexdigest(),
+        anchor_x,
+        anchor_y,
+        [rec for _, rec in comp_entries],
+        [rec for _, rec in net_entries],
+    )
+
+
+def compress_records(component_records, net_records, link=TEMPLATE_LINK):
+    templates = []
+    template_ids = {}
+    instances = []
+    for comps, nets in _cluster_records(
+        list(component_records), list(net_records), link
+    ):
+        key, anchor_x, anchor_y, comps, nets = _canonical_template(comps, nets)
+        template_id = template_ids.get(key)
+        if template_id is None:
+            template_id = template_ids[key] = len(templates)
+            templates.append(
+                {
+                    "Components": [_component_doc(rec) for rec in comps],
+                    "Nets": [_net_doc(rec) for rec in nets],
+                }
+            )
+        instances.append(
+            {
+                "Template": template_id,
+                "X": anchor_x,
+                "Y": anchor_y,
+                "Refdes": [rec.refdes for rec in comps],
+            }
+        )
+    instances.sort(key=lambda inst: (inst["Template"], inst["X"], inst["Y"]))
+    return {
+        "Version": TEMPLATE_VERSION,
+        "Link": link,
+        "Templates": templates,
+        "Instances": instances,
+    }
+
+
+def expand_templates(doc):
+    # Each template's points are gathered once; every instance is only a
+    # translation of them plus its own refdes list.
+    prepared = []
+    for template in doc["Templates"]:
+        comps = [_component_from_doc(data) for data in template["Components"]]
+        fields = [
+            [tuple(attr.get("RefdesFields", ())) for attr in data.get("Attributes", [])]
+            for data in template["Components"]
+        ]
+        nets = [_net_from_doc(data) for data in template["Nets"]]
+        xs, ys = _gather_points(comps, nets)
+        prepared.append((comps, fields, nets, xs, ys))
+    component_records = []
+    net_records = []
+    for inst in doc["Instances"]:
+        comps, fields, nets, xs, ys = prepared[inst["Template"]]
+        new_comps, new_nets = _rebuild_records(
+            comps, nets, xs, ys, inst["X"], inst["Y"], IDENTITY_TRANSFORM, 0
+        )
+        for rec, rec_fields, refdes in zip(new_comps, fields, inst["Refdes"]):
+            rec.refdes = refdes
+            rec.attributes = attribute_set_records(
+                list(zip(rec.attributes, rec_fields)), refdes
+            )
+        component_records.extend(new_comps)
+        net_records.extend(new_nets)
+    return component_records, net_records
+
+
+def is_template_export(path):
+    return os.path.isfile(path) and path.lower().endswith(TEMPLATE_SUFFIX)
+
+
+def write_template_export(doc, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_template_export(path):
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    if doc.get("Version") != TEMPLATE_VERSION:
+        raise ValueError(f"Unsupported template export version in {path}")
+    return doc
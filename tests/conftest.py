@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from automentorsch.formats import read_component_records, read_net_records
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_PARTS = os.path.join(ROOT, "parts_v3.0.csv")
+SAMPLE_NETS = os.path.join(ROOT, "net_v3.0.csv")
+
+
+@pytest.fixture
+def repo_root():
+    return ROOT
+
+
+@pytest.fixture
+def sample_paths():
+    return SAMPLE_PARTS, SAMPLE_NETS
+
+
+@pytest.fixture
+def sample_records():
+    return list(read_component_records(SAMPLE_PARTS)), list(
+        read_net_records(SAMPLE_NETS)
+    )
+
+
+@pytest.fixture
+def import_job():
+    def make(sheet, **options):
+        job = {
+            "job": "import",
+            "sheet": sheet,
+            "parts": SAMPLE_PARTS,
+            "nets": SAMPLE_NETS,
+        }
+        job.update(options)
+        return job
+
+    return make
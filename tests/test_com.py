@@ -0,0 +1,118 @@
+import gzip
+
+import pytest
+
+from automentorsch import com, designer, fake
+from automentorsch.com import (
+    COM_FAILURES,
+    TraceRecorder,
+    TraceReplay,
+    com_proxy,
+    get_accessor,
+    iter_collection,
+    unwrap_com,
+)
+from automentorsch.designer import (
+    direct_copy,
+    export_components,
+    export_nets,
+    find_attribute,
+)
+from automentorsch.jobs import DesignerSession, run_job
+
+
+def _sheet():
+    app = fake.make_app(1)
+    return app.view(1)
+
+
+def test_fallback_probes_are_not_failures(monkeypatch):
+    monkeypatch.delattr(fake.Component, "FindAttribute")
+    view = _sheet()
+    comp = com_proxy(view.Block.components[0])
+    failures, probes = COM_FAILURES["n"], COM_FAILURES["probes"]
+    assert find_attribute(comp, "Value").Name == "Value"
+    assert get_accessor(comp, "Refdes") == "R6"
+    assert len(list(iter_collection(comp.Attributes))) == 3
+    assert COM_FAILURES["n"] == failures
+    assert COM_FAILURES["probes"] > probes
+
+
+def test_last_strategy_failure_is_counted():
+    comp = com_proxy(_sheet().Block.components[0])
+    failures = COM_FAILURES["n"]
+    assert get_accessor(comp, "NoSuchMember") is None
+    assert COM_FAILURES["n"] == failures + 1
+
+
+def test_export_counts_written_records(tmp_path):
+    view = _sheet()
+    counts = {}
+    export_components(view, str(tmp_path / "p.csv"), (450, 0, 550, 60), counts=counts)
+    export_nets(view, str(tmp_path / "n.csv"), (450, 0, 550, 60), counts)
+    assert counts == {"Components": 1, "Nets": 1}
+
+
+def test_proxy_memoizes_reads_until_a_write():
+    raw = _sheet().Block.components[0]
+    comp = com_proxy(raw)
+    assert com_proxy(comp) is comp and unwrap_com(comp) is raw
+    calls = fake.FAKE_STATS["calls"]
+    assert comp.Refdes == comp.Refdes == "R6"
+    assert comp.GetLocation().X == comp.GetLocation().X == raw.x
+    assert fake.FAKE_STATS["calls"] == calls + 2
+    raw.x += 10
+    assert comp.GetLocation().X == raw.x - 10
+    comp.Refdes = "R9"
+    assert comp.Refdes == "R9"
+    assert comp.GetLocation().X == raw.x
+
+
+def _copy_calls(app, sheet):
+    app.sheets.InsertSheet("Schematic1", sheet)
+    calls = fake.FAKE_STATS["calls"]
+    direct_copy(app.view("1"), app.view(sheet).Block, {})
+    assert fake.summary(app.view(sheet)) == fake.summary(app.view("1"))
+    return fake.FAKE_STATS["calls"] - calls
+
+
+def test_proxied_copy_matches_source_with_fewer_calls(monkeypatch):
+    app = fake.make_app(1)
+    proxied = _copy_calls(app, "A")
+    for module in (com, designer):
+        monkeypatch.setattr(module, "com_proxy", lambda obj: obj)
+    assert proxied < _copy_calls(app, "B")
+
+
+def _export_files(app, out_dir):
+    out_dir.mkdir()
+    job = {
+        "job": "export",
+        "sheet": "1",
+        "parts": str(out_dir / "p.csv"),
+        "nets": str(out_dir / "n.csv"),
+        "reuse": False,
+    }
+    assert run_job(DesignerSession(lambda: app), job, str(out_dir))["ok"]
+    return [(out_dir / name).read_bytes() for name in ("p.csv", "n.csv")]
+
+
+def test_replayed_trace_reproduces_the_recorded_export(tmp_path):
+    trace = str(tmp_path / "trace.jsonl.gz")
+    with TraceRecorder(trace) as recorder:
+        recorded = _export_files(recorder.wrap(fake.make_app(1)), tmp_path / "rec")
+    with TraceReplay(trace, 0) as replay:
+        replayed = _export_files(replay.root(), tmp_path / "rep")
+        with pytest.raises(AttributeError):
+            replay.root().NoSuchMember
+    assert replayed == recorded
+    assert replay.calls == recorder.calls + 1
+    assert replay.misses == 1
+
+
+def test_replay_rejects_other_files(tmp_path):
+    path = str(tmp_path / "other.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write('{"Kind": "Report"}\n')
+    with pytest.raises(ValueError):
+        TraceReplay(path)
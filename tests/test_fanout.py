@@ -0,0 +1,34 @@
+from automentorsch import fake
+from automentorsch.jobs import DesignerSession, run_job
+
+
+def test_fanout_replays_one_plan_to_every_destination(tmp_path, monkeypatch):
+    app = fake.make_app(1)
+    session = DesignerSession(lambda: app)
+    walks = {"n": 0}
+    query = fake.View.Query
+
+    def counting(self, mask, flag):
+        if self is app.view("1") and mask & 128:
+            walks["n"] += 1
+        return query(self, mask, flag)
+
+    monkeypatch.setattr(fake.View, "Query", counting)
+    job = {"job": "fanout", "src_sheet": "1", "destinations": "A,Schematic1:B"}
+    for _ in range(2):
+        report = run_job(session, job, str(tmp_path))["result"]
+        assert [
+            (d["Sheet"], d["Components"], d["NetCount"]) for d in report["Destinations"]
+        ] == [
+            ("A", 6, 9),
+            ("B", 6, 9),
+        ]
+        for sheet in ("A", "B"):
+            assert fake.summary(app.view(sheet)) == fake.summary(app.view("1"))
+    assert walks["n"] == 2
+
+
+def test_fanout_needs_a_destination(tmp_path):
+    session = DesignerSession(lambda: fake.make_app(1))
+    response = run_job(session, {"job": "fanout", "destinations": ""}, str(tmp_path))
+    assert "destination" in response["error"]
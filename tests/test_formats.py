@@ -0,0 +1,113 @@
+import json
+import os
+
+from automentorsch import fake
+from automentorsch.formats import (
+    attribute_sets_path,
+    is_table_export,
+    net_index_path,
+    read_component_records,
+    read_indexed_net_records,
+    read_net_records,
+    write_encoded_component_records,
+    write_net_records,
+)
+from automentorsch.jobs import DesignerSession, run_job
+from automentorsch.records import AttributeRecord, ComponentRecord
+
+
+def _resistor(refdes):
+    attrs = [
+        AttributeRecord(
+            "Ref Designator",
+            either_value=refdes,
+            instance_value=refdes,
+            text_string=f"Ref Designator={refdes}",
+            origin_x=15,
+            origin_y=10,
+        ),
+        AttributeRecord("Value", either_value="10k", text_string="Value=10k"),
+    ]
+    return ComponentRecord(refdes, "Discrete", "RES", 0, 0, 0, 1.0, attrs)
+
+
+def test_refdes_fields_round_trip(tmp_path):
+    path = str(tmp_path / "parts.csv")
+    records = [_resistor("R1"), _resistor("R2")]
+    write_encoded_component_records(records, path)
+    with open(attribute_sets_path(path), encoding="utf-8") as f:
+        sets = json.load(f)["Sets"]
+    assert len(sets) == 1
+    assert sets[0][0]["RefdesFields"] == ["EitherValue", "InstanceValue", "TextString"]
+    assert "R1" not in json.dumps(sets)
+    loaded = list(read_component_records(path))
+    assert [r.refdes for r in loaded] == ["R1", "R2"]
+    for rec, orig in zip(loaded, records):
+        assert [a.to_dict() for a in rec.attributes] == [
+            a.to_dict() for a in orig.attributes
+        ]
+    assert loaded[0].attributes[1] is loaded[1].attributes[1]
+
+
+def test_net_index_rebuilt_after_same_size_rewrite(tmp_path, sample_paths):
+    path = str(tmp_path / "net.csv")
+    write_net_records(read_net_records(sample_paths[1]), path)
+    before = read_indexed_net_records(path, ["net5v"])
+    assert [r.labels[0].name for r in before] == ["net5v"] * 3
+    with open(path, encoding="utf-8", newline="") as f:
+        text = f.read()
+    size = os.path.getsize(path)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text.replace("net5v", "net9v"))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert os.path.getsize(path) == size
+    assert read_indexed_net_records(path, ["net5v"]) == []
+    hits = read_indexed_net_records(path, ["net9v"])
+    assert [r.labels[0].name for r in hits] == ["net9v"] * 3
+    with open(net_index_path(path), encoding="utf-8") as f:
+        assert json.load(f)["MTime"] == os.stat(path).st_mtime_ns
+
+
+def test_export_not_reused_after_moving_a_component(tmp_path):
+    app = fake.make_app(1)
+    session = DesignerSession(lambda: app)
+    job = {
+        "job": "export",
+        "sheet": "1",
+        "parts": str(tmp_path / "p.csv"),
+        "nets": str(tmp_path / "n.csv"),
+    }
+    assert not run_job(session, job, str(tmp_path))["result"]["reused"]
+    assert run_job(session, job, str(tmp_path))["result"]["reused"]
+    comp = app.view(1).Block.components[0]
+    comp.x += 10
+    response = run_job(session, job, str(tmp_path))
+    assert not response["result"]["reused"]
+    parts = read_component_records(response["result"]["parts"])
+    assert comp.x in [r.x for r in parts]
+
+
+def test_table_export_round_trips_through_import(tmp_path):
+    app = fake.make_app(1)
+    session = DesignerSession(lambda: app)
+    tables = str(tmp_path / "tables")
+    export = {"job": "export", "sheet": "1", "tables": tables, "reuse": False}
+    assert run_job(session, export, str(tmp_path))["ok"]
+    assert is_table_export(tables)
+    for name in os.listdir(tables):
+        with open(os.path.join(tables, name), encoding="utf-8") as f:
+            assert "{" not in f.read()
+    classic = dict(export, parts=str(tmp_path / "p.csv"), nets=str(tmp_path / "n.csv"))
+    del classic["tables"]
+    result = run_job(session, classic, str(tmp_path))["result"]
+    for read, path in (
+        (read_component_records, result["parts"]),
+        (read_net_records, result["nets"]),
+    ):
+        assert [r.to_row() for r in read(tables)] == [r.to_row() for r in read(path)]
+    app.sheets.InsertSheet("Schematic1", "A")
+    job = {"job": "import", "sheet": "A", "parts": tables, "nets": tables}
+    response = run_job(session, job, str(tmp_path))
+    assert response["result"]["components"] == 6
+    assert fake.summary(app.view("A")) == fake.summary(app.view("1"))
@@ -0,0 +1,110 @@
+import pytest
+
+from automentorsch import fake
+from automentorsch.cli import parse_args
+from automentorsch.designer import preflight_symbols
+from automentorsch.jobs import DesignerSession, run_job
+
+
+def _fail_first_placement(monkeypatch):
+    add_symbol = fake.Block.AddSymbolInstance
+    calls = {"n": 0}
+
+    def flaky(self, *args):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            return None
+        return add_symbol(self, *args)
+
+    monkeypatch.setattr(fake.Block, "AddSymbolInstance", flaky)
+
+
+def test_failed_placement_is_counted_not_cached(monkeypatch, tmp_path, import_job):
+    for options in ({"preflight": False}, {"preflight": False, "plan": True}):
+        app = fake.make_app(1)
+        session = DesignerSession(lambda: app)
+        _fail_first_placement(monkeypatch)
+        first = run_job(session, import_job("A", **options), str(tmp_path))
+        assert first["result"]["components"] == 5
+        assert first["failures"] == 1
+        assert session.symbol_cache.get(("Discrete", "RES")) is not False
+        second = run_job(session, import_job("B", **options), str(tmp_path))
+        assert second["result"]["components"] == 6
+        assert second["failures"] == 0
+
+
+def test_direct_copy_preflights_missing_symbols(tmp_path):
+    app = fake.make_app(1)
+    app.sheets.InsertSheet("Schematic1", "A")
+    app.view("A").Block.symbols = ("CAP",)
+    session = DesignerSession(lambda: app)
+    job = {"job": "copy", "direct": True, "src_sheet": "1", "dst_sheet": "A"}
+    response = run_job(session, job, str(tmp_path))
+    result = response["result"]
+    assert result["components"] == 0
+    assert result["missing_symbols"] == [
+        {"Partition": "Discrete", "Symbol": "RES", "Rows": 6}
+    ]
+    assert response["failures"] == 0
+
+
+def test_direct_copy_rejects_unsupported_options(tmp_path):
+    session = DesignerSession(lambda: fake.make_app(1))
+    for key in ("plan", "journal", "resume", "transform"):
+        job = {"job": "copy", "direct": True, "src_sheet": "1", key: True}
+        response = run_job(session, job, str(tmp_path))
+        assert key in response["error"]
+    for flags in (["--plan"], ["--resume"], ["--offset", "10,0"]):
+        with pytest.raises(SystemExit):
+            parse_args(["--direct"] + flags)
+
+
+def test_preflight_probes_each_symbol_once():
+    block = fake.Block()
+    placements = [
+        ("Discrete", "RES", 0, 0),
+        ("Discrete", "NOPE", 10, 0),
+        ("Discrete", "RES", 20, 0),
+        ("Discrete", "NOPE", 30, 0),
+    ]
+    cache = {}
+    result = preflight_symbols(block, placements, cache)
+    assert result == {
+        "Symbols": 2,
+        "Probed": 2,
+        "Missing": [{"Partition": "Discrete", "Symbol": "NOPE", "Rows": 2}],
+    }
+    assert cache == {("Discrete", "RES"): True, ("Discrete", "NOPE"): False}
+    assert block.components == []
+    again = preflight_symbols(block, placements, cache)
+    assert again["Probed"] == 0
+    assert again["Missing"] == result["Missing"]
+
+
+def test_import_skips_rows_of_missing_symbols(tmp_path, import_job):
+    app = fake.make_app(1)
+    app.sheets.InsertSheet("Schematic1", "A")
+    app.view("A").Block.symbols = ("CAP",)
+    session = DesignerSession(lambda: app)
+    response = run_job(session, import_job("A"), str(tmp_path))
+    result = response["result"]
+    assert result["components"] == 0
+    assert result["missing_symbols"] == [
+        {"Partition": "Discrete", "Symbol": "RES", "Rows": 6}
+    ]
+    assert response["failures"] == 0
+    assert session.symbol_cache[("Discrete", "RES")] is False
+
+
+def test_ignored_flag_combinations_are_rejected():
+    for argv in (
+        ["--pipelined", "--plan"],
+        ["--pipelined", "--offset", "10,0"],
+        ["--audit"],
+        ["--fanout", "A,B", "--window", "0,0,10,10"],
+        ["--fanout", "A,B", "--mirror"],
+    ):
+        with pytest.raises(SystemExit):
+            parse_args(argv)
+    assert parse_args(["--direct", "--audit"]).audit
+    assert parse_args(["--pipelined", "--window", "0,0,10,10"]).pipelined
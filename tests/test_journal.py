@@ -0,0 +1,62 @@
+import pytest
+
+from automentorsch import fake
+from automentorsch.cli import parse_args
+from automentorsch.jobs import DesignerSession, run_job
+
+
+@pytest.fixture
+def journal_job(tmp_path, import_job):
+    def make(**options):
+        return import_job("D", journal=str(tmp_path / "journal.jsonl"), **options)
+
+    return make
+
+
+def test_resume_after_crash_between_segments_and_labels(
+    tmp_path, monkeypatch, journal_job
+):
+    app = fake.make_app(1)
+    add_label = fake.Net.AddLabel
+    calls = {"n": 0}
+
+    def crashing_add_label(self, *args):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise KeyboardInterrupt
+        return add_label(self, *args)
+
+    monkeypatch.setattr(fake.Net, "AddLabel", crashing_add_label)
+    with pytest.raises(KeyboardInterrupt):
+        run_job(DesignerSession(lambda: app), journal_job(), str(tmp_path))
+    monkeypatch.setattr(fake.Net, "AddLabel", add_label)
+    assert fake.summary(app.view("D"))[1] != fake.summary(app.view("1"))[1]
+
+    response = run_job(
+        DesignerSession(lambda: app), journal_job(resume=True), str(tmp_path)
+    )
+    assert response["ok"], response
+    assert response["result"]["skipped"] > 0
+    assert fake.summary(app.view("D")) == fake.summary(app.view("1"))
+
+
+def test_resume_skips_only_finished_nets(tmp_path, journal_job):
+    app = fake.make_app(1)
+    session = DesignerSession(lambda: app)
+    assert run_job(session, journal_job(), str(tmp_path))["ok"]
+    response = run_job(session, journal_job(resume=True), str(tmp_path))
+    assert response["result"]["nets"] == 0
+    assert response["result"]["skipped"] == 6 + 9
+    assert fake.summary(app.view("D")) == fake.summary(app.view("1"))
+
+
+def test_plan_is_rejected_with_journal(tmp_path, journal_job):
+    session = DesignerSession(lambda: fake.make_app(1))
+    for options in ({"plan": True}, {"plan": True, "resume": True}):
+        response = run_job(session, journal_job(**options), str(tmp_path))
+        assert not response["ok"]
+        assert "plan" in response["error"]
+    assert not (tmp_path / "journal.jsonl").exists()
+    for flags in (["--journal", "j.jsonl"], ["--resume"]):
+        with pytest.raises(SystemExit):
+            parse_args(["--plan"] + flags)
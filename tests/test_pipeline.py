@@ -0,0 +1,60 @@
+import threading
+import time
+
+from automentorsch import fake, formats, records
+from automentorsch.designer import import_components
+from automentorsch.jobs import DesignerSession, run_job
+
+
+def test_pipelined_import_decodes_attributes_off_the_com_thread(
+    monkeypatch, sample_paths
+):
+    decode = records.decode_attributes
+    threads = []
+
+    def tracking_decode(text, refdes=""):
+        threads.append(threading.current_thread())
+        return decode(text, refdes)
+
+    monkeypatch.setattr(records, "decode_attributes", tracking_decode)
+    records.ATTRIBUTE_MEMO.clear()
+    block = fake.Block()
+    placed = import_components(sample_paths[0], block, {}, pipelined=True)
+    assert placed == 6
+    assert threads
+    assert threading.main_thread() not in threads
+    values = [a.EitherValue for c in block.components for a in c.attrs.items]
+    assert "R6" in values
+
+
+def test_process_pool_reads_rows_in_bounded_windows():
+    consumed = {"n": 0}
+
+    def rows():
+        for index in range(20000):
+            consumed["n"] += 1
+            yield {"Refdes": f"R{index}", "Partition": "Discrete", "Symbol": "RES"}
+
+    records_iter = formats.iter_parsed_pipeline(
+        rows(), formats.parse_component_row, queue_size=8, processes=2, chunksize=16
+    )
+    assert next(records_iter).refdes == "R0"
+    time.sleep(0.5)
+    assert consumed["n"] < 500
+    assert sum(1 for _ in records_iter) == 19999
+    assert consumed["n"] == 20000
+
+
+def test_pipelined_import_preflights_while_streaming(tmp_path, import_job):
+    app = fake.make_app(1)
+    app.sheets.InsertSheet("Schematic1", "A")
+    app.view("A").Block.symbols = ("CAP",)
+    session = DesignerSession(lambda: app)
+    job = import_job("A", pipelined=True)
+    response = run_job(session, job, str(tmp_path))
+    assert response["result"]["missing_symbols"] == [
+        {"Partition": "Discrete", "Symbol": "RES", "Rows": 6}
+    ]
+    assert response["result"]["components"] == 0
+    assert "load_parts" not in response["timings"]
+    assert "preflight" not in response["timings"]
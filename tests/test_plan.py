@@ -0,0 +1,31 @@
+from automentorsch import fake
+from automentorsch.designer import execute_plan, plan_handle_counts
+from automentorsch.plan import load_or_compile_plan, load_plan, save_plan
+
+
+def test_plan_round_trip_matches_source_sheet(tmp_path, sample_paths):
+    cache_dir = str(tmp_path / "plans")
+    plan = load_or_compile_plan(*sample_paths, cache_dir)
+    cached = load_or_compile_plan(*sample_paths, cache_dir)
+    assert cached == plan
+    save_plan(plan, str(tmp_path / "plan.json"))
+    assert load_plan(str(tmp_path / "plan.json")) == plan
+    app = fake.make_app(1)
+    for sheet, batched in (("A", True), ("B", False)):
+        app.sheets.InsertSheet("Schematic1", sheet)
+        handles = execute_plan(plan, app.view(sheet).Block, {}, batched=batched)
+        assert plan_handle_counts(plan, handles) == {"components": 6, "nets": 9}
+        assert fake.summary(app.view(sheet)) == fake.summary(app.view("1"))
+
+
+def test_plan_cache_is_invalidated_by_input_changes(tmp_path, sample_paths):
+    parts = tmp_path / "parts.csv"
+    parts.write_bytes(open(sample_paths[0], "rb").read())
+    memo = {}
+    plan = load_or_compile_plan(str(parts), sample_paths[1], str(tmp_path), memo)
+    assert load_or_compile_plan(str(parts), sample_paths[1], None, memo) is plan
+    text = parts.read_text(encoding="utf-8")
+    parts.write_text(text.replace("R6", "R7"), encoding="utf-8")
+    changed = load_or_compile_plan(str(parts), sample_paths[1], str(tmp_path), memo)
+    assert changed["InputHash"] != plan["InputHash"]
+    assert len(memo) == 2
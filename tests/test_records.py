@@ -0,0 +1,46 @@
+import pytest
+
+from automentorsch import records
+from automentorsch.records import ComponentRecord
+
+
+def _row(refdes, attrs_text):
+    return {
+        "Refdes": refdes,
+        "Partition": "Discrete",
+        "Symbol": "RES",
+        "X": "0",
+        "Y": "0",
+        "Attributes": attrs_text,
+    }
+
+
+def _attrs_text(refdes):
+    return (
+        f'[{{"Name": "Ref Designator", "EitherValue": "{refdes}", '
+        f'"TextString": "Ref Designator={refdes}"}}, '
+        '{"Name": "Value", "EitherValue": "10k", "TextString": "Value=10k"}]'
+    )
+
+
+def test_attribute_memo_is_shared_across_refdes():
+    records.ATTRIBUTE_MEMO.clear()
+    first = ComponentRecord.from_row(_row("R1", _attrs_text("R1")))
+    second = ComponentRecord.from_row(_row("R2", _attrs_text("R2")))
+    assert first.value() == second.value() == "10k"
+    assert len(records.ATTRIBUTE_MEMO) == 1
+    assert first.attributes[0].either_value == "R1"
+    assert second.attributes[0].text_string == "Ref Designator=R2"
+    assert first.attributes[1] is second.attributes[1]
+
+
+def test_renamed_record_keeps_source_attributes():
+    rec = ComponentRecord.from_row(_row("R1", _attrs_text("R1")))
+    rec.refdes = "R9"
+    assert rec.attributes[0].either_value == "R1"
+
+
+def test_malformed_attributes_raise():
+    rec = ComponentRecord.from_row(_row("R3", "[{broken"))
+    with pytest.raises(ValueError, match="R3"):
+        rec.attributes
@@ -0,0 +1,29 @@
+from automentorsch.formats import read_indexed_net_records, write_net_records
+from automentorsch.records import NetRecord, SegmentRecord, net_in_region
+
+WINDOW = (40, 40, 60, 60)
+
+
+def _net(*segments):
+    return NetRecord([SegmentRecord(*seg) for seg in segments])
+
+
+def test_net_in_region_tests_each_segment():
+    # An L around the window: the net's bounding box covers it, no wire does.
+    around = _net((0, 0, 100, 0), (100, 0, 100, 100))
+    assert not net_in_region(around, WINDOW)
+    assert net_in_region(_net((0, 0, 100, 0), (50, 0, 50, 100)), WINDOW)
+    assert net_in_region(_net((0, 0, 100, 100)), WINDOW)
+    assert not net_in_region(_net((0, 30, 30, 0)), WINDOW)
+    assert not net_in_region(_net(), WINDOW)
+
+
+def test_indexed_region_read_filters_by_segment(tmp_path):
+    path = str(tmp_path / "nets.csv")
+    around = _net((0, 0, 100, 0), (100, 0, 100, 100))
+    crossing = _net((50, 0, 50, 100))
+    write_net_records([around, crossing], path)
+    hits = read_indexed_net_records(path, region=WINDOW)
+    assert [[(s.x1, s.y1, s.x2, s.y2) for s in r.segments] for r in hits] == [
+        [(50, 0, 50, 100)]
+    ]
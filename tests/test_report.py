@@ -0,0 +1,37 @@
+import json
+import tracemalloc
+
+from automentorsch import fake
+from automentorsch.constants import MEMORY_TOP
+from automentorsch.designer import export_components
+from automentorsch.report import RunReport, finish_report
+
+
+def test_memory_report_per_phase(tmp_path, capsys):
+    view = fake.make_app(1).view("1")
+    report = RunReport(True, Mode="csv")
+    assert tracemalloc.is_tracing()
+    with report.phase("export_components") as entry:
+        counts = {}
+        export_components(view, str(tmp_path / "p.csv"), counts=counts)
+        entry["Count"] = counts["Components"]
+    path = str(tmp_path / "run_report.jsonl")
+    finish_report(report, path)
+    assert not tracemalloc.is_tracing()
+    with open(path, encoding="utf-8") as f:
+        phase = json.loads(f.readline())["Phases"][0]
+    memory = phase["Memory"]
+    assert phase["Count"] == 6
+    assert memory["Peak"] >= memory["Current"] > 0
+    assert len(memory["Top"]) <= MEMORY_TOP
+    assert memory["Proxies"] == 0
+    assert "0 COM proxies" in capsys.readouterr().out
+
+
+def test_report_without_memory_leaves_tracing_alone():
+    report = RunReport()
+    with report.phase("walk"):
+        pass
+    report.close()
+    assert not tracemalloc.is_tracing()
+    assert "Memory" not in report.to_dict()["Phases"][0]
@@ -0,0 +1,44 @@
+import socket
+import threading
+
+import pytest
+
+from automentorsch.jobs import JobError, is_loopback, send_job, serve
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_refuses_public_address_without_token(repo_root):
+    assert is_loopback("127.0.0.1")
+    assert is_loopback("localhost")
+    assert not is_loopback("0.0.0.0")
+    with pytest.raises(JobError):
+        serve("0.0.0.0", _free_port(), repo_root)
+
+
+def test_token_and_base_dir(monkeypatch, tmp_path, repo_root):
+    monkeypatch.chdir(tmp_path)
+    port = _free_port()
+    server = threading.Thread(
+        target=serve, args=("127.0.0.1", port, repo_root, "s3cret"), daemon=True
+    )
+    server.start()
+    job = {"job": "plan", "parts": "parts_v3.0.csv", "nets": "net_v3.0.csv"}
+    for _ in range(100):
+        try:
+            denied = send_job(job, "127.0.0.1", port, timeout=5)
+            break
+        except ConnectionRefusedError:
+            threading.Event().wait(0.02)
+    assert not denied["ok"]
+    assert "token" in denied["error"]
+    allowed = send_job(job, "127.0.0.1", port, timeout=5, token="s3cret")
+    assert allowed["ok"], allowed
+    assert allowed["result"]
+    send_job({"job": "shutdown"}, "127.0.0.1", port, timeout=5, token="s3cret")
+    server.join(5)
+    assert not server.is_alive()
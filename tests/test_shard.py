@@ -0,0 +1,64 @@
+import pytest
+
+from automentorsch.jobs import JobError
+from automentorsch.shard import (
+    balance_shards,
+    check_shard_plan,
+    parse_backend,
+    shard_copy,
+)
+
+FAKE = "automentorsch.fake:make_app"
+
+
+def test_balance_shards_puts_heaviest_on_least_loaded():
+    shards, loads = balance_shards([30, 5, 20, 20, 10], 2)
+    assert shards == [[0, 1, 4], [2, 3]]
+    assert loads == [45, 40]
+    assert sorted(i for shard in shards for i in shard) == list(range(5))
+
+
+def test_balance_shards_more_shards_than_sheets():
+    shards, loads = balance_shards([7], 3)
+    assert shards == [[0], [], []]
+    assert loads == [7, 0, 0]
+
+
+def test_parse_backend():
+    assert parse_backend("active") == ("active", None)
+    assert parse_backend("10.0.0.2:7777") == ("server", ("10.0.0.2", 7777))
+    assert parse_backend(FAKE) == ("factory", ("automentorsch.fake", "make_app"))
+
+
+def test_shard_copy_on_two_fake_backends(tmp_path):
+    copies = [("1", "A"), ("2", "B"), ("1", "C")]
+    report = shard_copy([FAKE, FAKE], copies, {"plan": True}, str(tmp_path))
+    assert [(e["Source"], e["Sheet"]) for e in report["Sheets"]] == copies
+    for entry in report["Sheets"]:
+        assert "Error" not in entry
+        assert (entry["Components"], entry["NetCount"]) == (6, 9)
+        assert entry["Objects"] == 15
+        assert "execute_plan" in entry["Timings"]
+    assert [b["Sheets"] for b in report["Backends"]] == [2, 1]
+    assert "counts" in report["Timings"]
+    merged = sum(e["Timings"]["execute_plan"] for e in report["Sheets"])
+    assert abs(report["Timings"]["execute_plan"] - merged) < 1e-5
+    assert not list(tmp_path.glob("shards/*_journal.jsonl"))
+
+
+def test_shard_copy_reports_unreachable_server(tmp_path):
+    report = shard_copy(
+        ["127.0.0.1:1"], [("1", "X")], counts={"1": 5}, base_dir=str(tmp_path)
+    )
+    assert report["Sheets"][0]["Error"]
+    assert report["Sheets"][0]["Objects"] == 5
+
+
+def test_shard_plan_rejects_conflicts():
+    with pytest.raises(JobError, match="more than once"):
+        check_shard_plan(["active", "active"], [("1", "A"), ("2", "B")])
+    with pytest.raises(JobError, match="more than once"):
+        check_shard_plan(["10.0.0.2:7777", "10.0.0.2:7777"], [("1", "A")])
+    with pytest.raises(JobError, match="same files"):
+        check_shard_plan([FAKE, FAKE], [("1", "A"), ("2", "a")])
+    check_shard_plan([FAKE, FAKE, "active"], [("1", "A"), ("2", "B")])
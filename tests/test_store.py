@@ -0,0 +1,80 @@
+from automentorsch import fake
+from automentorsch.designer import import_component_records, import_net_records
+from automentorsch.jobs import DesignerSession, run_job
+from automentorsch.store import DesignStore, read_archive_index, read_archive_sheet
+
+EVERYTHING = [-(10**6), -(10**6), 10**6, 10**6]
+
+
+def _export_to_db(tmp_path):
+    app = fake.make_app(1)
+    session = DesignerSession(lambda: app)
+    db = str(tmp_path / "design.db")
+    job = {
+        "job": "export",
+        "sheet": "1",
+        "parts": str(tmp_path / "p.csv"),
+        "nets": str(tmp_path / "n.csv"),
+        "db": db,
+    }
+    assert run_job(session, job, str(tmp_path))["ok"]
+    return app, session, db
+
+
+def test_store_lookups_after_export(tmp_path):
+    app, session, db = _export_to_db(tmp_path)
+    comp = app.view("1").Block.components[0]
+    with DesignStore(db) as store:
+        assert [row[:2] for row in store.sheets()] == [("Schematic1", "1")]
+        hits = store.find_component(comp.refdes)
+        assert [row[2:] for row in hits] == [
+            (comp.refdes, "Discrete", "RES", comp.x, comp.y)
+        ]
+        assert len(store.find_attribute("Value")) == 6
+        assert len({row[2] for row in store.segments_for_net("net5v")}) == 3
+        box = (comp.x - 1, comp.y - 1, comp.x + 1, comp.y + 1)
+        indexed = store.query_region(*box)
+        store.has_rtree = False
+        assert store.query_region(*box) == indexed
+        assert comp.refdes in [row[2] for row in indexed["components"]]
+
+
+def test_import_from_db_region_matches_source_sheet(tmp_path):
+    app, session, db = _export_to_db(tmp_path)
+    app.sheets.InsertSheet("Schematic1", "A")
+    job = {
+        "job": "import",
+        "sheet": "A",
+        "from_db": db,
+        "region": EVERYTHING,
+        "db_sheet": "Schematic1:1",
+    }
+    response = run_job(session, job, str(tmp_path))
+    assert response["result"]["components"] == 6
+    assert fake.summary(app.view("A")) == fake.summary(app.view("1"))
+
+
+def test_export_all_archive_round_trip(tmp_path):
+    app = fake.make_app(2)
+    session = DesignerSession(lambda: app)
+    job = {"job": "export_all", "archive": str(tmp_path / "design.zip")}
+    archive = run_job(session, job, str(tmp_path))["result"]["archive"]
+    index = read_archive_index(archive)
+    assert [(e["Sheet"], e["Components"]) for e in index["Sheets"]] == [
+        ("1", 6),
+        ("2", 6),
+    ]
+    assert read_archive_sheet(archive, "Schematic1", "9") is None
+    comps, nets = read_archive_sheet(archive, "Schematic1", "2")
+    app.sheets.InsertSheet("Schematic1", "A")
+    block = app.view("A").Block
+    import_component_records(comps, block, {})
+    import_net_records(nets, block)
+    assert fake.summary(app.view("A")) == fake.summary(app.view("2"))
+
+    app.view("2").Block.components[0].x += 10
+    index = run_job(session, job, str(tmp_path))["result"]["index"]
+    reused = {e["Sheet"]: e.get("Reused", False) for e in index["Sheets"]}
+    assert reused == {"1": True, "2": False, "A": False}
+    comps, nets = read_archive_sheet(archive, "Schematic1", "1")
+    assert len(comps) == 6 and len(nets) == 9
@@ -0,0 +1,87 @@
+import json
+
+from automentorsch.records import (
+    AttributeRecord,
+    ComponentRecord,
+    NetRecord,
+    SegmentRecord,
+)
+from automentorsch.transforms import (
+    compress_records,
+    expand_templates,
+    read_template_export,
+    replicate_records,
+    write_template_export,
+)
+
+
+def _divider():
+    comps = []
+    for refdes, y in (("R1", 30), ("R2", 120)):
+        attrs = [
+            AttributeRecord(
+                "Ref Designator",
+                value="",
+                instance_value=refdes,
+                text_string=f"Ref Designator={refdes}",
+                origin_x=515,
+                origin_y=y + 10,
+            ),
+            AttributeRecord("Value", either_value="4.7K", origin_x=515, origin_y=y),
+        ]
+        comps.append(ComponentRecord(refdes, "Discrete", "RES", 500, y, 0, 1.0, attrs))
+    nets = [NetRecord([SegmentRecord(500, 30, 500, 120)], [], [])]
+    return comps, nets
+
+
+def _canonical(comps, nets):
+    comp_rows = sorted(
+        json.dumps(
+            [
+                rec.refdes,
+                rec.partition,
+                rec.symbol,
+                rec.x,
+                rec.y,
+                rec.orientation,
+                rec.scale,
+                [attr.to_dict() for attr in rec.attributes],
+            ]
+        )
+        for rec in comps
+    )
+    net_rows = sorted(
+        json.dumps(
+            [
+                [seg.to_list() for seg in rec.segments],
+                [lbl.to_dict() for lbl in rec.labels],
+                [attr.to_dict() for attr in rec.attributes],
+            ]
+        )
+        for rec in nets
+    )
+    return comp_rows, net_rows
+
+
+def test_round_trip_on_sample(tmp_path, sample_records):
+    comps, nets = sample_records
+    path = str(tmp_path / "sample.json")
+    write_template_export(compress_records(comps, nets), path)
+    assert _canonical(*expand_templates(read_template_export(path))) == _canonical(
+        comps, nets
+    )
+
+
+def test_round_trip_keeps_refdes_field():
+    comps, nets = _divider()
+    out_comps, _ = expand_templates(compress_records(comps, nets))
+    ref = {rec.refdes: rec.attributes[0] for rec in out_comps}["R1"]
+    assert (ref.value, ref.instance_value) == ("", "R1")
+
+
+def test_identical_blocks_share_one_template():
+    comps, nets = replicate_records(*_divider(), rows=1, cols=3)
+    doc = compress_records(comps, nets)
+    assert len(doc["Templates"]) == 1
+    assert len(doc["Instances"]) == 3
+    assert _canonical(*expand_templates(doc)) == _canonical(comps, nets)
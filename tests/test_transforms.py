@@ -0,0 +1,105 @@
+from automentorsch.records import (
+    AttributeRecord,
+    ComponentRecord,
+    LabelRecord,
+    NetRecord,
+    SegmentRecord,
+)
+from automentorsch.transforms import make_transform, replicate_records
+
+
+def _attr(name, value, x, y):
+    return AttributeRecord(
+        name, either_value=value, text_string=f"{name}={value}", origin_x=x, origin_y=y
+    )
+
+
+def _block():
+    comps = [
+        ComponentRecord(
+            "R1",
+            "Discrete",
+            "RES",
+            500,
+            30,
+            0,
+            1.0,
+            [_attr("Ref Designator", "R1", 515, 40), _attr("Value", "4.7K", 515, 30)],
+        ),
+        ComponentRecord("R2", "Discrete", "RES", 500, 120, 0, 1.0, []),
+    ]
+    nets = [
+        NetRecord(
+            [SegmentRecord(500, 0, 500, 30), SegmentRecord(500, 30, 560, 30)],
+            [LabelRecord("netgnd", 510, 10, 500, 0, 500, 30)],
+            [_attr("NET_CLASS", "PWR", 520, 5)],
+        )
+    ]
+    return comps, nets
+
+
+def _points(comps, nets):
+    points = []
+    for rec in comps:
+        points.append((rec.x, rec.y))
+        points.extend((a.origin_x, a.origin_y) for a in rec.attributes)
+    for rec in nets:
+        points.extend((s.x1, s.y1, s.x2, s.y2) for s in rec.segments)
+        points.extend((l.x, l.y) for l in rec.labels)
+        points.extend((a.origin_x, a.origin_y) for a in rec.attributes)
+    return points
+
+
+def test_offset_moves_attribute_origins():
+    comps, nets = _block()
+    moved, moved_nets = replicate_records(comps, nets, dx=1000, dy=-20)
+    assert (moved[0].x, moved[0].y) == (1500, 10)
+    assert [(a.origin_x, a.origin_y) for a in moved[0].attributes] == [
+        (1515, 20),
+        (1515, 10),
+    ]
+    assert (
+        moved_nets[0].attributes[0].origin_x,
+        moved_nets[0].attributes[0].origin_y,
+    ) == (
+        1520,
+        -15,
+    )
+    assert comps[0].attributes[0].origin_x == 515
+
+
+def test_four_quarter_turns_are_identity():
+    comps, nets = _block()
+    quarter = make_transform(90)
+    for _ in range(4):
+        comps, nets = replicate_records(comps, nets, quarter, renumber=False)
+    assert _points(comps, nets) == _points(*_block())
+    assert [rec.orientation for rec in comps] == [0, 0]
+
+
+def test_double_mirror_is_identity():
+    comps, nets = _block()
+    mirror = make_transform(mirror=True)
+    once = replicate_records(comps, nets, mirror)
+    assert _points(*once) != _points(comps, nets)
+    twice = replicate_records(*once, mirror)
+    assert _points(*twice) == _points(comps, nets)
+
+
+def test_transform_keeps_relative_layout():
+    comps, nets = _block()
+    rotated, _ = replicate_records(comps, nets, make_transform(180), dx=300)
+    for old, new in zip(comps, rotated):
+        for old_attr, new_attr in zip(old.attributes, new.attributes):
+            assert new_attr.origin_x - new.x == -(old_attr.origin_x - old.x)
+            assert new_attr.origin_y - new.y == -(old_attr.origin_y - old.y)
+
+
+def test_array_renumbers_and_counts(sample_records):
+    comps, nets = sample_records
+    out_comps, out_nets = replicate_records(comps, nets, rows=2, cols=2)
+    assert len(out_comps) == 4 * len(comps)
+    assert len(out_nets) == 4 * len(nets)
+    refdes = [rec.refdes for rec in out_comps]
+    assert len(set(refdes)) == len(refdes)
+    assert "R24" in refdes